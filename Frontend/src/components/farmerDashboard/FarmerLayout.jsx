@@ -4,7 +4,7 @@ import { useState, useEffect, useCallback } from 'react';
 import { useTranslation } from 'react-i18next';
 import { getUserProfile } from '../../services/profileApi';
 import { getReceivedRequests } from '../../services/friendsApi';
-import { getUnreadMessageCount } from '../../services/messagesApi';
+import { useNotifications } from '../../context/NotificationContext';
 import LanguageSwitcher from '../common/LanguageSwitcher';
 import NotificationBell from '../notifications/NotificationBell';
 
@@ -15,7 +15,8 @@ function FarmerLayout({ children, pageTitle = "Dashboard" }) {
   const [profileData, setProfileData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [friendRequestCount, setFriendRequestCount] = useState(0);
-  const [unreadMessageCount, setUnreadMessageCount] = useState(0);
+  // Pushed over the notification socket (NotificationContext); no polling
+  const { unreadMessageCount } = useNotifications();
 
   const fetchProfile = useCallback(async () => {
     try {
@@ -58,10 +59,6 @@ function FarmerLayout({ children, pageTitle = "Dashboard" }) {
   useEffect(() => {
     fetchProfile();
     loadFriendRequestCount();
-    loadUnreadMessageCount();
-    // Re-poll the unread message count every 30s so the badge stays in sync
-    const interval = setInterval(loadUnreadMessageCount, 30000);
-    return () => clearInterval(interval);
   }, [fetchProfile]);
 
   const loadFriendRequestCount = async () => {
@@ -71,13 +68,6 @@ function FarmerLayout({ children, pageTitle = "Dashboard" }) {
     }
   };
 
-  const loadUnreadMessageCount = async () => {
-    const result = await getUnreadMessageCount();
-    if (result.success) {
-      setUnreadMessageCount(result.data.unread_count || 0);
-    }
-  };
-
   // Listen for login events to force profile refresh (only for this tab)
   useEffect(() => {
     const handleUserLogin = () => {
@@ -3,7 +3,7 @@ import { FaHome, FaPaw, FaSyringe, FaNotesMedical, FaChartLine, FaShieldAlt, FaE
 import { useState, useEffect } from "react";
 import { useTranslation } from "react-i18next";
 import { getReceivedRequests } from "../../services/friendsApi";
-import { getUnreadMessageCount } from "../../services/messagesApi";
+import { useNotifications } from "../../context/NotificationContext";
 import "../../styles/farmerdashboard.css";
 
 const SideNav = () => {
@@ -11,13 +11,10 @@ const SideNav = () => {
   const location = useLocation();
   const { t } = useTranslation('dashboard');
   const [friendRequestCount, setFriendRequestCount] = useState(0);
-  const [unreadMessageCount, setUnreadMessageCount] = useState(0);
+  const { unreadMessageCount } = useNotifications();
 
   useEffect(() => {
     loadFriendRequestCount();
-    loadUnreadMessageCount();
-    const interval = setInterval(loadUnreadMessageCount, 30000);
-    return () => clearInterval(interval);
   }, []);
 
   const loadFriendRequestCount = async () => {
@@ -27,13 +24,6 @@ const SideNav = () => {
     }
   };
 
-  const loadUnreadMessageCount = async () => {
-    const result = await getUnreadMessageCount();
-    if (result.success) {
-      setUnreadMessageCount(result.data.unread_count || 0);
-    }
-  };
-
   const menuItems = [
     { name: t('sidebar.dashboard'), icon: FaHome, path: "/farmerpage" },
     { name: t('sidebar.vetAppointment'), icon: FaCalendarCheck, path: "/farmerappointment" },
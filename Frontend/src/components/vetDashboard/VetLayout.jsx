@@ -4,7 +4,7 @@ import { useState, useEffect } from 'react';
 import { useTranslation } from 'react-i18next';
 import { getUserProfile } from '../../services/profileApi';
 import { getReceivedRequests } from '../../services/friendsApi';
-import { getUnreadMessageCount } from '../../services/messagesApi';
+import { useNotifications } from '../../context/NotificationContext';
 import LanguageSwitcher from '../common/LanguageSwitcher';
 import NotificationBell from '../notifications/NotificationBell';
 import '../../styles/languageSwitcher.css';
@@ -19,24 +19,12 @@ function VetLayout({ children, pageTitle = "Dashboard" }) {
   const [profileData, setProfileData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [friendRequestCount, setFriendRequestCount] = useState(0);
-  const [unreadMessageCount, setUnreadMessageCount] = useState(0);
+  // Pushed over the notification socket (NotificationContext); no polling
+  const { unreadMessageCount } = useNotifications();
 
   useEffect(() => {
     fetchProfile();
     loadFriendRequestCount();
-    loadUnreadMessageCount();
-    
-    // Listen for messages read event to refresh unread count
-    const handleMessagesRead = () => {
-      console.log('[VetLayout] Messages read event detected, refreshing unread count');
-      loadUnreadMessageCount();
-    };
-    
-    window.addEventListener('messagesRead', handleMessagesRead);
-    
-    return () => {
-      window.removeEventListener('messagesRead', handleMessagesRead);
-    };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
@@ -47,13 +35,6 @@ function VetLayout({ children, pageTitle = "Dashboard" }) {
     }
   };
 
-  const loadUnreadMessageCount = async () => {
-    const result = await getUnreadMessageCount();
-    if (result.success) {
-      setUnreadMessageCount(result.data.unread_count);
-    }
-  };
-
   // Listen for login events to force profile refresh (only for this tab)
   useEffect(() => {
     const handleUserLogin = () => {
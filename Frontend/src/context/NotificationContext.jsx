@@ -1,6 +1,7 @@
 import React, { createContext, useContext, useState, useCallback, useEffect } from 'react';
 import { useNotificationWebSocket } from '../hooks/useNotificationWebSocket';
 import { getNotifications, getUnreadCount, markAsRead, markAllAsRead } from '../services/notificationApi';
+import { getUnreadMessageCount } from '../services/messagesApi';
 
 const NotificationContext = createContext();
 
@@ -15,6 +16,7 @@ export const useNotifications = () => {
 export const NotificationProvider = ({ children }) => {
   const [notifications, setNotifications] = useState([]);
   const [unreadCount, setUnreadCount] = useState(0);
+  const [unreadMessageCount, setUnreadMessageCount] = useState(0);
   const [loading, setLoading] = useState(false);
 
   // Fetch initial notifications
@@ -45,25 +47,47 @@ export const NotificationProvider = ({ children }) => {
     }
   }, []);
 
+  // Fetch unread message count (once; the socket keeps it current afterwards)
+  const fetchUnreadMessageCount = useCallback(async () => {
+    const result = await getUnreadMessageCount();
+    if (result.success) {
+      setUnreadMessageCount(result.data.unread_count || 0);
+    }
+  }, []);
+
+  // Server-pushed unread totals after every read/unread change
+  const handleUnreadCount = useCallback((counts) => {
+    setUnreadCount(counts.notifications);
+    setUnreadMessageCount(counts.messages);
+  }, []);
+
   // Handle new notification from WebSocket
   const handleNewNotification = useCallback((notification) => {
     console.log('[Notification] New notification received:', notification);
     
-    // Add to notifications list
-    setNotifications(prev => [notification, ...prev]);
-    
-    // Increment unread count
-    setUnreadCount(prev => prev + 1);
+    // Admin broadcasts arrive once per role group without a per-user id;
+    // reload the list so the user's own row (with its id) shows up. Their
+    // counters are not pushed, so count them here; every other notification
+    // is followed by an unread_count frame (handleUnreadCount).
+    if (notification.id == null) {
+      fetchNotifications();
+      setUnreadCount(prev => prev + 1);
+    } else {
+      // Add to notifications list
+      setNotifications(prev => [notification, ...prev]);
+    }
 
     // Play notification sound (optional)
     playNotificationSound();
 
     // Show browser notification (optional)
     showBrowserNotification(notification);
-  }, []);
+  }, [fetchNotifications]);
 
-  // WebSocket connection
-  const { isConnected } = useNotificationWebSocket(handleNewNotification);
+  // WebSocket connection, shared with the chat pages
+  const { isConnected, subscribeChat, sendChatMessage } = useNotificationWebSocket(
+    handleNewNotification, handleUnreadCount,
+  );
 
   // Mark notification as read
   const markNotificationAsRead = useCallback(async (notificationId) => {
@@ -72,7 +96,7 @@ export const NotificationProvider = ({ children }) => {
       setNotifications(prev =>
         prev.map(n => n.id === notificationId ? { ...n, is_read: true } : n)
       );
-      setUnreadCount(prev => Math.max(0, prev - 1));
+      // The new count arrives as an unread_count frame
     }
   }, []);
 
@@ -102,7 +126,7 @@ export const NotificationProvider = ({ children }) => {
       new Notification(notification.title, {
         body: notification.message,
         icon: '/logo.png',
-        tag: notification.id,
+        tag: notification.id ?? `broadcast-${notification.data?.broadcast_id}`,
       });
     }
   };
@@ -120,18 +144,23 @@ export const NotificationProvider = ({ children }) => {
     if (token) {
       fetchNotifications();
       fetchUnreadCount();
+      fetchUnreadMessageCount();
       requestNotificationPermission();
     }
-  }, [fetchNotifications, fetchUnreadCount, requestNotificationPermission]);
+  }, [fetchNotifications, fetchUnreadCount, fetchUnreadMessageCount, requestNotificationPermission]);
 
   const value = {
     notifications,
     unreadCount,
+    unreadMessageCount,
     loading,
     isConnected,
     fetchNotifications,
+    fetchUnreadMessageCount,
     markNotificationAsRead,
     markAllNotificationsAsRead,
+    subscribeChat,
+    sendChatMessage,
   };
 
   return (
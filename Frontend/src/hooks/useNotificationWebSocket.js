@@ -3,11 +3,29 @@ import { useEffect, useRef, useState, useCallback } from 'react';
 const MAX_RECONNECT_ATTEMPTS = 5;
 const RECONNECT_DELAY_MS = 5000;
 
-export const useNotificationWebSocket = (onNotification) => {
+// One socket per client for notifications and every open chat
+// (ClientConsumer on the backend). Chats are followed with subscribe /
+// unsubscribe frames; subscriptions are sent again after a reconnect.
+// Messages only go over the socket once the server has confirmed the
+// subscription, and error frames reach the conversation's listeners so a
+// page can fall back to REST.
+export const useNotificationWebSocket = (onNotification, onUnreadCount) => {
   const ws = useRef(null);
   const [isConnected, setIsConnected] = useState(false);
   const reconnectTimeout = useRef(null);
   const reconnectAttempts = useRef(0);
+  // friendship id -> Set of { onMessage, onError } for that conversation
+  const chatListeners = useRef(new Map());
+  // friendship ids the server has answered "subscribed" for
+  const confirmedChats = useRef(new Set());
+
+  const sendFrame = useCallback((frame) => {
+    if (ws.current?.readyState === WebSocket.OPEN) {
+      ws.current.send(JSON.stringify(frame));
+      return true;
+    }
+    return false;
+  }, []);
 
   const connect = useCallback(() => {
     const token = sessionStorage.getItem('token') || localStorage.getItem('token');
@@ -21,7 +39,7 @@ export const useNotificationWebSocket = (onNotification) => {
       return;
     }
 
-    const wsUrl = `ws://localhost:8000/ws/notifications/?token=${token}`;
+    const wsUrl = `ws://localhost:8000/ws/client/?token=${token}`;
 
     try {
       ws.current = new WebSocket(wsUrl);
@@ -35,10 +53,12 @@ export const useNotificationWebSocket = (onNotification) => {
           reconnectTimeout.current = null;
         }
 
+        chatListeners.current.forEach((_, friendshipId) => {
+          sendFrame({ type: 'subscribe', friendship_id: friendshipId });
+        });
+
         const pingInterval = setInterval(() => {
-          if (ws.current?.readyState === WebSocket.OPEN) {
-            ws.current.send(JSON.stringify({ type: 'ping' }));
-          }
+          sendFrame({ type: 'ping' });
         }, 30000);
 
         ws.current.pingInterval = pingInterval;
@@ -49,6 +69,20 @@ export const useNotificationWebSocket = (onNotification) => {
           const data = JSON.parse(event.data);
           if (data.type === 'notification' && onNotification) {
             onNotification(data.notification);
+          } else if (data.type === 'unread_count' && onUnreadCount) {
+            onUnreadCount(data);
+          } else if (data.type === 'chat_message') {
+            chatListeners.current.get(data.friendship_id)?.forEach((listener) => listener.onMessage(data.message));
+          } else if (data.type === 'subscribed') {
+            confirmedChats.current.add(data.friendship_id);
+          } else if (data.type === 'unsubscribed') {
+            confirmedChats.current.delete(data.friendship_id);
+          } else if (data.type === 'error') {
+            console.warn('[WebSocket] Chat error for conversation', data.friendship_id, data.error);
+            if (data.error !== 'not_saved') {
+              confirmedChats.current.delete(data.friendship_id);
+            }
+            chatListeners.current.get(data.friendship_id)?.forEach((listener) => listener.onError?.(data.error));
           }
         } catch (error) {
           console.error('[WebSocket] Error parsing message:', error);
@@ -61,6 +95,7 @@ export const useNotificationWebSocket = (onNotification) => {
 
       ws.current.onclose = () => {
         setIsConnected(false);
+        confirmedChats.current.clear();
 
         if (ws.current?.pingInterval) {
           clearInterval(ws.current.pingInterval);
@@ -76,7 +111,7 @@ export const useNotificationWebSocket = (onNotification) => {
     } catch (error) {
       console.error('[WebSocket] Connection error:', error);
     }
-  }, [onNotification]);
+  }, [onNotification, onUnreadCount, sendFrame]);
 
   useEffect(() => {
     connect();
@@ -95,10 +130,41 @@ export const useNotificationWebSocket = (onNotification) => {
   }, [connect]);
 
   const sendMessage = useCallback((message) => {
-    if (ws.current?.readyState === WebSocket.OPEN) {
-      ws.current.send(JSON.stringify(message));
+    sendFrame(message);
+  }, [sendFrame]);
+
+  // Follow a conversation; returns the function that stops following it.
+  // onError(error) gets the server's error frames for the conversation.
+  const subscribeChat = useCallback((friendshipId, onMessage, onError) => {
+    const id = Number(friendshipId);
+    const listener = { onMessage, onError };
+    let listeners = chatListeners.current.get(id);
+    if (!listeners) {
+      listeners = new Set();
+      chatListeners.current.set(id, listeners);
+      sendFrame({ type: 'subscribe', friendship_id: id });
     }
-  }, []);
+    listeners.add(listener);
+
+    return () => {
+      listeners.delete(listener);
+      if (listeners.size === 0 && chatListeners.current.get(id) === listeners) {
+        chatListeners.current.delete(id);
+        confirmedChats.current.delete(id);
+        sendFrame({ type: 'unsubscribe', friendship_id: id });
+      }
+    };
+  }, [sendFrame]);
+
+  // False when the socket is not open or the subscription is not confirmed,
+  // so the caller can fall back to REST
+  const sendChatMessage = useCallback((friendshipId, text, messageType = 'text') => {
+    const id = Number(friendshipId);
+    if (!confirmedChats.current.has(id)) {
+      return false;
+    }
+    return sendFrame({ type: 'chat', friendship_id: id, text, message_type: messageType });
+  }, [sendFrame]);
 
-  return { isConnected, sendMessage };
+  return { isConnected, sendMessage, subscribeChat, sendChatMessage };
 };
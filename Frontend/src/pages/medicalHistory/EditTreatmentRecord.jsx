@@ -46,6 +46,7 @@ const EditTreatmentRecord = () => {
               // Convert start_time from "HH:MM:SS" to "HH:MM" for HTML time input
               const startTime = med.start_time ? med.start_time.substring(0, 5) : "08:00";
               return {
+                id: med.id,
                 name: med.name,
                 dosage: med.dosage,
                 frequency: med.frequency,
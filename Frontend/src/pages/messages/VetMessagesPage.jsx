@@ -1,13 +1,12 @@
-import { useState, useEffect, useRef, useCallback } from "react";
+import { useState, useEffect, useRef } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import { useTranslation } from 'react-i18next';
 import VetLayout from "../../components/vetDashboard/VetLayout";
+import { useNotifications } from "../../context/NotificationContext";
 import { getFriends } from "../../services/friendsApi";
-import { getMessages, sendMessage, markAllMessagesRead } from "../../services/messagesApi";
+import { getArchivedMessages, getMessages, sendMessage, markAllMessagesRead } from "../../services/messagesApi";
 import { FaSearch, FaPaperPlane, FaSmile, FaCalendarAlt } from "react-icons/fa";
 
-const WS_BASE = "ws://localhost:8000";
-
 const VetMessagesPage = () => {
   const navigate = useNavigate();
   const { friendId } = useParams();
@@ -19,13 +18,17 @@ const VetMessagesPage = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [isConversationExpanded, setIsConversationExpanded] = useState(true);
   const [currentUserId, setCurrentUserId] = useState(null);
-  const wsRef = useRef(null);
+  const [hasOlder, setHasOlder] = useState(true);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const messagesEndRef = useRef(null);
-  const tokenRef = useRef(null);
+  // Texts sent over the socket and not echoed back yet, oldest first
+  const pendingTextsRef = useRef([]);
+  // Set while prepending archived messages, so the view stays where it is
+  const keepScrollRef = useRef(false);
+  const { subscribeChat, sendChatMessage } = useNotifications();
 
   useEffect(() => {
     const token = sessionStorage.getItem('token') || localStorage.getItem('token');
-    tokenRef.current = token;
     if (token) {
       try {
         const payload = JSON.parse(atob(token.split('.')[1]));
@@ -38,66 +41,36 @@ const VetMessagesPage = () => {
   }, []);
 
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages]);
 
-  const connectWebSocket = useCallback((friendshipId) => {
-    if (wsRef.current) {
-      wsRef.current.close();
-      wsRef.current = null;
-    }
-
-    const token = tokenRef.current;
-    if (!token || !friendshipId) return;
-
-    const ws = new WebSocket(`${WS_BASE}/ws/chat/${friendshipId}/?token=${token}`);
-
-    ws.onopen = () => {
-      console.log('[WS] Chat connected for friendship', friendshipId);
-    };
-
-    ws.onmessage = (event) => {
-      try {
-        const message = JSON.parse(event.data);
-        setMessages(prev => {
-          if (prev.some(m => m.id === message.id)) return prev;
-          return [...prev, message];
-        });
-      } catch (e) {
-        console.error('[WS] Failed to parse message', e);
-      }
-    };
-
-    ws.onclose = (event) => {
-      console.log('[WS] Chat disconnected', event.code);
-    };
-
-    ws.onerror = (error) => {
-      console.error('[WS] Chat error', error);
-    };
-
-    wsRef.current = ws;
-  }, []);
-
+  // Follow the open conversation over the shared client socket
   useEffect(() => {
-    return () => {
-      if (wsRef.current) {
-        wsRef.current.close();
-        wsRef.current = null;
-      }
-    };
-  }, []);
+    if (!friendId || friends.length === 0) return undefined;
+    const friendship = friends.find(f => f.id === parseInt(friendId));
+    if (!friendship) return undefined;
 
-  useEffect(() => {
-    if (friendId && friends.length > 0) {
-      const friendship = friends.find(f => f.id === parseInt(friendId));
-      if (friendship) {
-        setSelectedFriend(friendship.friend);
-        loadMessages(friendId);
-        connectWebSocket(friendId);
-      }
-    }
-  }, [friendId, friends, connectWebSocket]);
+    setSelectedFriend(friendship.friend);
+    loadMessages(friendId);
+    pendingTextsRef.current = [];
+    return subscribeChat(friendId, (message) => {
+      const pending = pendingTextsRef.current.indexOf(message.text);
+      if (pending !== -1) pendingTextsRef.current.splice(pending, 1);
+      setMessages(prev => {
+        // Avoid duplicates (REST optimistic add vs WS echo)
+        if (prev.some(m => m.id === message.id)) return prev;
+        return [...prev, message];
+      });
+    }, () => {
+      // The socket did not deliver the oldest unconfirmed message
+      const text = pendingTextsRef.current.shift();
+      if (text) sendOverRest(text);
+    });
+  }, [friendId, friends, subscribeChat]);
 
   const loadFriends = async () => {
     setIsLoading(true);
@@ -119,6 +92,7 @@ const VetMessagesPage = () => {
   };
 
   const loadMessages = async (friendshipId) => {
+    setHasOlder(true);
     const result = await getMessages(friendshipId);
 
     if (result.success) {
@@ -137,24 +111,49 @@ const VetMessagesPage = () => {
     }
   };
 
+  // Messages older than MESSAGE_HOT_MONTHS live in the archive, which the
+  // conversation endpoint does not read
+  const loadOlderMessages = async () => {
+    if (!friendId || loadingOlder) return;
+
+    setLoadingOlder(true);
+    const result = await getArchivedMessages(friendId, messages[0]?.created_at);
+
+    if (result.success) {
+      keepScrollRef.current = result.data.length > 0;
+      setMessages(prev => [
+        ...result.data.filter(older => !prev.some(m => m.id === older.id)),
+        ...prev,
+      ]);
+      setHasOlder(result.hasMore);
+    } else {
+      console.error('Failed to load older messages:', result.error);
+    }
+    setLoadingOlder(false);
+  };
+
   const handleSendMessage = async () => {
     if (!messageText.trim() || !friendId) return;
 
     const text = messageText.trim();
     setMessageText("");
 
-    const ws = wsRef.current;
-    if (ws && ws.readyState === WebSocket.OPEN) {
-      ws.send(JSON.stringify({ text, message_type: 'text' }));
+    if (sendChatMessage(friendId, text)) {
+      pendingTextsRef.current.push(text);
     } else {
-      const result = await sendMessage(friendId, text, 'text');
-      if (result.success) {
-        setMessages(prev => [...prev, result.data]);
-      } else {
-        console.error('Failed to send message:', result.error);
-        alert(t('errors.sendFailed'));
-        setMessageText(text);
-      }
+      // Fallback to REST if the conversation is not live on the socket
+      await sendOverRest(text);
+    }
+  };
+
+  const sendOverRest = async (text) => {
+    const result = await sendMessage(friendId, text, 'text');
+    if (result.success) {
+      setMessages(prev => [...prev, result.data]);
+    } else {
+      console.error('Failed to send message:', result.error);
+      alert(t('errors.sendFailed'));
+      setMessageText(text);
     }
   };
 
@@ -262,6 +261,17 @@ const VetMessagesPage = () => {
 
                 {/* Messages Container */}
                 <div className="flex-1 overflow-y-auto p-6 space-y-4 bg-gray-50">
+                  {hasOlder && (
+                    <div className="text-center">
+                      <button
+                        onClick={loadOlderMessages}
+                        disabled={loadingOlder}
+                        className="text-sm text-emerald-600 hover:text-emerald-700 transition disabled:opacity-50"
+                      >
+                        {loadingOlder ? t('loadingOlder') : t('loadOlder')}
+                      </button>
+                    </div>
+                  )}
                   {messages.map((message) => {
                     const isMyMessage = Number(message.sender) === Number(currentUserId);
 
@@ -18,6 +18,9 @@ const VaccinationPage = () => {
   const [activeTab, setActiveTab] = useState("upcoming");
   const [vaccinations, setVaccinations] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [page, setPage] = useState(1);
+  const [hasMore, setHasMore] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [counts, setCounts] = useState({ upcoming: 0, completed: 0, overdue: 0 });
   const [searchTerm, setSearchTerm] = useState("");
   const navigate = useNavigate();
@@ -50,28 +53,41 @@ const VaccinationPage = () => {
     fetchCounts();
   }, [activeTab]);
 
+  // The status tabs are paginated; later pages are appended by "Load more"
+  const fetchTabPage = (pageNumber) => {
+    if (activeTab === "upcoming") return getUpcomingVaccinations(pageNumber);
+    if (activeTab === "overdue") return getOverdueVaccinations(pageNumber);
+    if (activeTab === "completed") return getCompletedVaccinations(pageNumber);
+    return getAllVaccinations();
+  };
+
   const fetchVaccinations = async () => {
     setLoading(true);
-    let result;
-    
-    if (activeTab === "upcoming") {
-      result = await getUpcomingVaccinations();
-    } else if (activeTab === "overdue") {
-      result = await getOverdueVaccinations();
-    } else if (activeTab === "completed") {
-      result = await getCompletedVaccinations();
-    } else {
-      result = await getAllVaccinations();
-    }
+    const result = await fetchTabPage(1);
     
     if (result.success) {
       setVaccinations(result.data);
+      setPage(1);
+      setHasMore(Boolean(result.hasMore));
     } else {
       console.error('Failed to fetch vaccinations:', result.error);
     }
     setLoading(false);
   };
 
+  const loadMoreVaccinations = async () => {
+    setLoadingMore(true);
+    const result = await fetchTabPage(page + 1);
+    if (result.success) {
+      setVaccinations(prev => [...prev, ...result.data]);
+      setPage(page + 1);
+      setHasMore(Boolean(result.hasMore));
+    } else {
+      console.error('Failed to fetch vaccinations:', result.error);
+    }
+    setLoadingMore(false);
+  };
+
   const fetchCounts = async () => {
     const result = await getVaccinationCounts();
     if (result.success) {
@@ -220,6 +236,19 @@ const VaccinationPage = () => {
             </div>
           )}
         </div>
+
+        {!loading && hasMore && (
+          <div className="text-center mt-4">
+            <button
+              type="button"
+              onClick={loadMoreVaccinations}
+              disabled={loadingMore}
+              className="px-4 py-2 rounded-lg border border-gray-300 text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? t('page.loading') : t('page.loadMore')}
+            </button>
+          </div>
+        )}
       </div>
     </Layout>
   );
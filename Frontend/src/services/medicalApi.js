@@ -215,6 +215,8 @@ export const updateTreatment = async (id, treatmentData) => {
     // Convert medicines from camelCase to snake_case
     if (treatmentData.medicines && treatmentData.medicines.length > 0) {
       const medicinesSnakeCase = treatmentData.medicines.map(med => ({
+        // Existing medicines keep their id so the backend updates them in place
+        ...(med.id ? { id: med.id } : {}),
         name: med.name,
         dosage: med.dosage,
         frequency: med.frequency,
@@ -298,6 +300,28 @@ export const getActiveTrackingTreatments = async () => {
   }
 };
 
+// Get doses due in the next `hours` across the herd
+export const getDueDoses = async (hours = 24, includeGiven = false) => {
+  try {
+    const response = await medicalApi.get('/doses/due/', {
+      params: { hours, include_given: includeGiven }
+    });
+    return { success: true, data: response.data.results || response.data };
+  } catch (error) {
+    return { success: false, error: error.response?.data || error.message };
+  }
+};
+
+// Mark a batch of doses as given
+export const markDosesGiven = async (ids) => {
+  try {
+    const response = await medicalApi.post('/doses/mark_given/', { ids });
+    return { success: true, data: response.data };
+  } catch (error) {
+    return { success: false, error: error.response?.data || error.message };
+  }
+};
+
 // Get treatments by livestock tag ID
 export const getTreatmentsByLivestock = async (tagId) => {
   try {
@@ -39,6 +39,28 @@ export const getMessages = async (friendshipId) => {
   }
 };
 
+// Older messages of a conversation from the monthly archive, oldest first.
+// Pass the created_at of the oldest message shown as ``before``.
+const ARCHIVE_PAGE_SIZE = 100;
+
+export const getArchivedMessages = async (friendshipId, before) => {
+  try {
+    const response = await messagesApi.get(`${MESSAGES_BASE_URL}/archive/`, {
+      params: { friendship_id: friendshipId, before }
+    });
+    return {
+      success: true,
+      data: response.data,
+      hasMore: response.data.length === ARCHIVE_PAGE_SIZE,
+    };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data?.error || 'Failed to fetch older messages'
+    };
+  }
+};
+
 // Send a message
 export const sendMessage = async (friendshipId, text, messageType = 'text') => {
   try {
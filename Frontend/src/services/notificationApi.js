@@ -69,6 +69,7 @@ export const deleteNotification = async (notificationId) => {
 };
 
 // Admin-only: broadcast a system message to all farmers and/or vets.
+// Returns 202 with { broadcast_id, count }; the fan-out runs in the background.
 // payload: { title, message, audience: 'all'|'farmers'|'vets', urgency: 'normal'|'important'|'urgent', link? }
 export const broadcastNotification = async (payload) => {
   try {
@@ -83,3 +84,18 @@ export const broadcastNotification = async (payload) => {
     };
   }
 };
+
+// Admin-only: progress of a broadcast ({ status, total, delivered, progress, ... })
+export const getBroadcastStatus = async (broadcastId) => {
+  try {
+    const response = await notificationApi.get(`/broadcasts/${broadcastId}/`, {
+      headers: getAuthHeaders(),
+    });
+    return { success: true, data: response.data };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data || { message: 'Could not load broadcast status.' },
+    };
+  }
+};
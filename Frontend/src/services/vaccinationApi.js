@@ -64,11 +64,11 @@ export const getVaccinationCounts = async () => {
   }
 };
 
-// Get upcoming vaccinations
-export const getUpcomingVaccinations = async () => {
+// Get upcoming vaccinations (one page; hasMore when there is a next page)
+export const getUpcomingVaccinations = async (page = 1) => {
   try {
-    const response = await vaccinationApi.get('/upcoming/');
-    return { success: true, data: response.data };
+    const response = await vaccinationApi.get('/upcoming/', { params: { page } });
+    return { success: true, data: response.data.results || response.data, hasMore: Boolean(response.data.next) };
   } catch (error) {
     return {
       success: false,
@@ -78,10 +78,10 @@ export const getUpcomingVaccinations = async () => {
 };
 
 // Get overdue vaccinations
-export const getOverdueVaccinations = async () => {
+export const getOverdueVaccinations = async (page = 1) => {
   try {
-    const response = await vaccinationApi.get('/overdue/');
-    return { success: true, data: response.data };
+    const response = await vaccinationApi.get('/overdue/', { params: { page } });
+    return { success: true, data: response.data.results || response.data, hasMore: Boolean(response.data.next) };
   } catch (error) {
     return {
       success: false,
@@ -91,10 +91,10 @@ export const getOverdueVaccinations = async () => {
 };
 
 // Get completed vaccinations
-export const getCompletedVaccinations = async () => {
+export const getCompletedVaccinations = async (page = 1) => {
   try {
-    const response = await vaccinationApi.get('/completed/');
-    return { success: true, data: response.data };
+    const response = await vaccinationApi.get('/completed/', { params: { page } });
+    return { success: true, data: response.data.results || response.data, hasMore: Boolean(response.data.next) };
   } catch (error) {
     return {
       success: false,
@@ -137,6 +137,59 @@ export const createVaccination = async (formData) => {
   }
 };
 
+// Vaccinate many animals at once: pass `livestockTags`, or herd filters
+// (`species`, `tagPrefix`, `allActive`). Per-animal failures come back in `failed`.
+export const runVaccinationCampaign = async (formData) => {
+  try {
+    const payload = {
+      vaccine_name: formData.vaccineName,
+      vaccine_type: formData.vaccineType,
+      date_given: formData.dateGiven,
+      next_due_date: formData.nextDueDate,
+      notes: formData.notes || '',
+      vet_name: formData.vetName || '',
+    };
+    if (formData.livestockTags) payload.livestock_tags = formData.livestockTags;
+    if (formData.species) payload.species = formData.species;
+    if (formData.tagPrefix) payload.tag_prefix = formData.tagPrefix;
+    if (formData.allActive) payload.all_active = true;
+
+    const response = await vaccinationApi.post('/campaign/', payload);
+    return { success: true, data: response.data };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data || { message: 'Failed to run vaccination campaign.' }
+    };
+  }
+};
+
+// Protocol-based upcoming doses for the herd
+export const getVaccinationSchedule = async (page = 1) => {
+  try {
+    const response = await vaccinationApi.get('/schedule/', { params: { page } });
+    return { success: true, data: response.data };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data || { message: 'Failed to fetch vaccination schedule.' }
+    };
+  }
+};
+
+// Recompute the herd schedule from the species protocols
+export const regenerateVaccinationSchedule = async () => {
+  try {
+    const response = await vaccinationApi.post('/regenerate_schedule/');
+    return { success: true, data: response.data };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data || { message: 'Failed to regenerate vaccination schedule.' }
+    };
+  }
+};
+
 // Update existing vaccination
 export const updateVaccination = async (id, formData) => {
   try {
@@ -1,6 +1,6 @@
 # appointment/admin.py
 from django.contrib import admin
-from .models import Appointment
+from .models import Appointment, VetFarmerRelation
 
 
 @admin.register(Appointment)
@@ -32,3 +32,10 @@ class AppointmentAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('farmer', 'veterinarian')
+
+
+@admin.register(VetFarmerRelation)
+class VetFarmerRelationAdmin(admin.ModelAdmin):
+    list_display = ['veterinarian', 'farmer', 'appointment_count', 'updated_at']
+    search_fields = ['veterinarian__email', 'farmer__email']
+    readonly_fields = ['created_at', 'updated_at']
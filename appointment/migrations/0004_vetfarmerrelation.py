@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_relations(apps, schema_editor):
+    Appointment = apps.get_model('appointment', 'Appointment')
+    VetFarmerRelation = apps.get_model('appointment', 'VetFarmerRelation')
+    pairs = (
+        Appointment.objects.filter(status__in=['Approved', 'Completed'])
+        .values('veterinarian', 'farmer')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    VetFarmerRelation.objects.bulk_create(
+        [
+            VetFarmerRelation(
+                veterinarian_id=pair['veterinarian'],
+                farmer_id=pair['farmer'],
+                appointment_count=pair['n'],
+            )
+            for pair in pairs
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment', '0003_appointment_livestock_alter_appointment_animal_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VetFarmerRelation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_count', models.PositiveIntegerField(default=0, help_text='Approved or completed appointments between the pair')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vet_relations', to=settings.AUTH_USER_MODEL)),
+                ('veterinarian', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='farmer_relations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farmer', 'veterinarian'], name='appointment_farmer__e7db30_idx')],
+                'unique_together': {('veterinarian', 'farmer')},
+            },
+        ),
+        migrations.RunPython(backfill_relations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointment', '0004_vetfarmerrelation'),
+        ('livestockcrud', '0003_tagsequence'),
+        ('payment', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['status', 'preferred_date'], name='appointment_status_3bc617_idx'),
+        ),
+    ]
@@ -16,6 +16,14 @@ class Appointment(models.Model):
         ('Declined', 'Declined'),
     ]
 
+    # target status: statuses it can be reached from (see backend.transitions)
+    TRANSITIONS = {
+        'Approved': ('Pending',),
+        'Declined': ('Pending',),
+        'Completed': ('Approved',),
+        'Cancelled': ('Pending', 'Approved'),
+    }
+
     PAYMENT_STATUS_CHOICES = [
         ('not_required', 'Not Required'),
         ('pending', 'Payment Pending'),
@@ -88,6 +96,7 @@ class Appointment(models.Model):
             models.Index(fields=['farmer', 'status']),
             models.Index(fields=['veterinarian', 'status']),
             models.Index(fields=['preferred_date']),
+            models.Index(fields=['status', 'preferred_date']),
         ]
     
     def clean(self):
@@ -115,3 +124,62 @@ class Appointment(models.Model):
         self.payment = payment
         self.payment_status = 'paid'
         self.save()
+
+
+class VetFarmerRelation(models.Model):
+    """
+    Materialized "farmers this vet has worked with" set.
+    A row exists while the pair has at least one Approved or Completed
+    appointment; it is kept in sync by appointment.signals whenever an
+    appointment's status, vet or farmer changes.
+    """
+
+    CARE_STATUSES = ['Approved', 'Completed']
+
+    veterinarian = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='farmer_relations'
+    )
+    farmer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='vet_relations'
+    )
+    appointment_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Approved or completed appointments between the pair"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['veterinarian', 'farmer']
+        indexes = [
+            models.Index(fields=['farmer', 'veterinarian']),
+        ]
+
+    def __str__(self):
+        return f"{self.veterinarian} cares for {self.farmer} ({self.appointment_count})"
+
+    @classmethod
+    def sync(cls, veterinarian_id, farmer_id):
+        """Recount the pair's care appointments and create, update or drop the row."""
+        count = Appointment.objects.filter(
+            veterinarian_id=veterinarian_id,
+            farmer_id=farmer_id,
+            status__in=cls.CARE_STATUSES
+        ).count()
+        if count:
+            cls.objects.update_or_create(
+                veterinarian_id=veterinarian_id,
+                farmer_id=farmer_id,
+                defaults={'appointment_count': count}
+            )
+        else:
+            cls.objects.filter(veterinarian_id=veterinarian_id, farmer_id=farmer_id).delete()
+
+    @classmethod
+    def farmer_ids_for(cls, vet):
+        """Subquery of farmer ids for ``vet``, for use in ``user__in=`` filters."""
+        return cls.objects.filter(veterinarian=vet).values('farmer')
@@ -1,5 +1,6 @@
 # appointment/serializers.py
 from rest_framework import serializers
+from backend.transitions import allowed_sources
 from .models import Appointment
 from django.contrib.auth import get_user_model
 from livestockcrud.models import Livestock
@@ -92,21 +93,18 @@ class AppointmentStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = ['status', 'vet_notes']
+
+    # Narrower than Appointment.TRANSITIONS, which also covers the farmer's
+    # cancel action: a vet declines a pending request rather than cancelling it
+    SOURCES = {'Cancelled': ('Approved',)}
+
+    @classmethod
+    def allowed_sources(cls, target):
+        return cls.SOURCES.get(target, allowed_sources(Appointment, target))
     
     def validate_status(self, value):
-        valid_transitions = {
-            'Pending': ['Approved', 'Declined'],
-            'Approved': ['Completed', 'Cancelled'],
-            'Completed': [],
-            'Cancelled': [],
-            'Declined': [],
-        }
-        
-        if self.instance:
-            current_status = self.instance.status
-            if value not in valid_transitions.get(current_status, []):
-                raise serializers.ValidationError(
-                    f"Cannot change status from {current_status} to {value}"
-                )
-        
+        if self.instance and self.instance.status not in self.allowed_sources(value):
+            raise serializers.ValidationError(
+                f"Cannot change status from {self.instance.status} to {value}"
+            )
         return value
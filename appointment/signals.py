@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from backend.transitions import status_changed
+from .models import Appointment, VetFarmerRelation
+
+
+def _care_key(instance):
+    """(vet, farmer) pair if the appointment counts towards a care relationship."""
+    if instance.status in VetFarmerRelation.CARE_STATUSES:
+        return (instance.veterinarian_id, instance.farmer_id)
+    return None
+
+
+@receiver(post_init, sender=Appointment)
+def remember_care_key(sender, instance, **kwargs):
+    """
+    Remember the relationship this row counted towards when it was loaded,
+    so saves only touch VetFarmerRelation when that actually changes.
+    """
+    if instance.pk and 'status' in instance.__dict__:
+        instance._care_key = _care_key(instance)
+
+
+@receiver(post_save, sender=Appointment)
+def sync_care_relation_on_save(sender, instance, created, **kwargs):
+    old_key = None if created else getattr(instance, '_care_key', _care_key(instance))
+    new_key = _care_key(instance)
+    if old_key != new_key:
+        for key in {old_key, new_key} - {None}:
+            VetFarmerRelation.sync(*key)
+    instance._care_key = new_key
+
+
+@receiver(post_delete, sender=Appointment)
+def sync_care_relation_on_delete(sender, instance, **kwargs):
+    # Deletes are rare; recount the pair whatever status the instance last held.
+    VetFarmerRelation.sync(instance.veterinarian_id, instance.farmer_id)
+
+
+@receiver(status_changed, sender=Appointment)
+def sync_care_relation_on_transition(sender, instance, previous, target, **kwargs):
+    # Workflow steps are plain UPDATEs, so post_save never sees them
+    care = VetFarmerRelation.CARE_STATUSES
+    if (previous in care) != (target in care):
+        VetFarmerRelation.sync(instance.veterinarian_id, instance.farmer_id)
+    instance._care_key = _care_key(instance)
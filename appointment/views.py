@@ -6,8 +6,11 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db import transaction
 from django.db.models import Q, Count
 from django.utils import timezone
+from backend.aggregates import breakdown, status_in
+from backend.transitions import TransitionError, transition
 from .models import Appointment
 from .serializers import AppointmentSerializer, AppointmentStatusUpdateSerializer
 from .permissions import AppointmentPermission
@@ -15,12 +18,11 @@ from .permissions import AppointmentPermission
 logger = logging.getLogger(__name__)
 
 
-def _notify_farmer_appointment_decision(appointment, decision):
+def _decision_messages(appointment, decision):
     """
-    Best-effort: send an in-app notification (real-time bell) AND an email to
-    the farmer when a vet approves/declines/completes their appointment.
-    Failures are logged but never bubble up — they must not break the vet's
-    button click.
+    (title, message, email_subject, email_body) telling the farmer that a vet
+    approved/declined/completed their appointment, or None for any other
+    decision.
 
     decision is one of: 'approved', 'declined', 'completed'.
     """
@@ -78,30 +80,51 @@ def _notify_farmer_appointment_decision(appointment, decision):
             f"— LHMMS Team"
         )
     else:
-        return
+        return None
+    return title, message, email_subject, email_body
+
+
+def _queue_farmer_decision_email(appointment, decision):
+    """
+    Queue the decision email in the outbox, inside the status change's
+    transaction, unless the farmer switched e-mails off. Returns whether it
+    was queued.
+    """
+    from notifications.digest import emails_immediately
+
+    messages = _decision_messages(appointment, decision)
+    if not messages or not emails_immediately(appointment.farmer_id, 'appointment'):
+        return False
+    from authentication.email_utils import send_email_sync
+    send_email_sync(appointment.farmer.email, messages[2], messages[3])
+    return True
+
 
-    # 1) In-app notification (real-time via WebSocket)
+def _notify_farmer_appointment_decision(appointment, decision, emailed=False):
+    """
+    Best-effort in-app notification (real-time bell) for the farmer, sent once
+    the decision has committed. Failures are logged but never bubble up — they
+    must not break the vet's button click.
+    """
+    messages = _decision_messages(appointment, decision)
+    if not messages:
+        return
+    title, message = messages[:2]
     try:
         from notifications.utils import create_notification
         create_notification(
-            recipient=farmer,
-            sender=vet,
+            recipient=appointment.farmer,
+            sender=appointment.veterinarian,
             notification_type='appointment',
             title=title,
             message=message,
             link='/appointments',
             data={'appointment_id': appointment.id, 'decision': decision},
+            emailed=emailed,
         )
     except Exception as exc:  # noqa: BLE001
         logger.warning("Could not create in-app notification: %s", exc)
 
-    # 2) Email
-    try:
-        from authentication.email_utils import send_email_sync
-        send_email_sync(farmer.email, email_subject, email_body)
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("Could not send appointment email: %s", exc)
-
 
 class AppointmentViewSet(viewsets.ModelViewSet):
     """
@@ -172,21 +195,38 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         else:
             queryset = Appointment.objects.all()
         
-        stats = {
-            'upcoming': queryset.filter(
-                status='Approved',
-                preferred_date__gte=timezone.now().date()
-            ).count(),
-            'pending': queryset.filter(status='Pending').count(),
-            'completed': queryset.filter(status='Completed').count(),
-            'cancelled': queryset.filter(
-                status__in=['Cancelled', 'Declined']
-            ).count(),
-            'total': queryset.count(),
-        }
+        stats = breakdown(queryset, {
+            'upcoming': status_in('Approved') & Q(preferred_date__gte=timezone.now().date()),
+            'pending': status_in('Pending'),
+            'completed': status_in('Completed'),
+            'cancelled': status_in('Cancelled', 'Declined'),
+            'total': None,
+        })
         
         return Response(stats)
     
+    def _transition(self, appointment, target, error, sources=None, decision=None, **changes):
+        """
+        Run one workflow step as a conditional UPDATE (see backend.transitions)
+        and let the farmer know: the email is queued in the same transaction,
+        the in-app notification goes out once it commits.
+        """
+        try:
+            with transaction.atomic():
+                transition(appointment, target, sources=sources, **changes)
+                if decision:
+                    emailed = _queue_farmer_decision_email(appointment, decision)
+                    transaction.on_commit(
+                        lambda: _notify_farmer_appointment_decision(appointment, decision, emailed)
+                    )
+        except TransitionError as exc:
+            # ``{current}`` in the message is the status the row really had
+            return Response(
+                {'error': error.format(current=exc.current) if error else str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(AppointmentSerializer(appointment).data, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Update appointment status (for vets)"""
@@ -197,98 +237,53 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             partial=True
         )
         
-        if serializer.is_valid():
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = dict(serializer.validated_data)
+        target = changes.pop('status', None)
+        if target is None:
             serializer.save()
-            return Response(
-                AppointmentSerializer(appointment).data,
-                status=status.HTTP_200_OK
-            )
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return Response(AppointmentSerializer(appointment).data, status=status.HTTP_200_OK)
+        return self._transition(
+            appointment, target, None,
+            sources=AppointmentStatusUpdateSerializer.allowed_sources(target), **changes
+        )
     
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve a pending appointment (vet only)"""
-        appointment = self.get_object()
-
-        if appointment.status != 'Pending':
-            return Response(
-                {'error': 'Only pending appointments can be approved'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        appointment.status = 'Approved'
-        appointment.save()
-
-        # Notify farmer (in-app + email) — best-effort
-        _notify_farmer_appointment_decision(appointment, 'approved')
-
-        return Response(
-            AppointmentSerializer(appointment).data,
-            status=status.HTTP_200_OK
+        return self._transition(
+            self.get_object(), 'Approved',
+            'Only pending appointments can be approved',
+            decision='approved',
         )
 
     @action(detail=True, methods=['post'])
     def decline(self, request, pk=None):
         """Decline a pending appointment (vet only)"""
-        appointment = self.get_object()
-
-        if appointment.status != 'Pending':
-            return Response(
-                {'error': 'Only pending appointments can be declined'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        appointment.status = 'Declined'
-        appointment.vet_notes = request.data.get('vet_notes', '')
-        appointment.save()
-
-        # Notify farmer (in-app + email) — best-effort
-        _notify_farmer_appointment_decision(appointment, 'declined')
-
-        return Response(
-            AppointmentSerializer(appointment).data,
-            status=status.HTTP_200_OK
+        return self._transition(
+            self.get_object(), 'Declined',
+            'Only pending appointments can be declined',
+            decision='declined',
+            vet_notes=request.data.get('vet_notes', ''),
         )
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Complete an approved appointment (vet only)"""
         appointment = self.get_object()
-        
-        if appointment.status != 'Approved':
-            return Response(
-                {'error': 'Only approved appointments can be completed'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        appointment.status = 'Completed'
-        appointment.vet_notes = request.data.get('vet_notes', appointment.vet_notes or '')
-        appointment.save()
-
-        # Notify farmer the appointment is wrapped up
-        _notify_farmer_appointment_decision(appointment, 'completed')
-
-        return Response(
-            AppointmentSerializer(appointment).data,
-            status=status.HTTP_200_OK
+        return self._transition(
+            appointment, 'Completed',
+            'Only approved appointments can be completed',
+            decision='completed',
+            vet_notes=request.data.get('vet_notes', appointment.vet_notes or ''),
         )
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel an appointment (farmer only)"""
-        appointment = self.get_object()
-        
-        if appointment.status in ['Completed', 'Cancelled', 'Declined']:
-            return Response(
-                {'error': f'{appointment.status} appointments cannot be cancelled'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        appointment.status = 'Cancelled'
-        appointment.save()
-        
-        return Response(
-            AppointmentSerializer(appointment).data,
-            status=status.HTTP_200_OK
+        return self._transition(
+            self.get_object(), 'Cancelled',
+            '{current} appointments cannot be cancelled',
         )
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import AdminKpiSnapshot
 
-# Register your models here.
+
+@admin.register(AdminKpiSnapshot)
+class AdminKpiSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['day', 'farmers_joined', 'vets_joined', 'pending_total', 'approved_total', 'declined_total', 'updated_at']
+    date_hierarchy = 'day'
+    readonly_fields = ['updated_at']
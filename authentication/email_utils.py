@@ -1,10 +1,9 @@
 """
 Email utilities — branded templates for LHMMS.
-All outgoing emails use build_email_html() for consistent branding.
+All outgoing emails use build_email_html() for consistent branding and are
+queued in the outbox (notifications.outbox) rather than sent inline.
 """
 import html as _html
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
 
 
 # ─────────────────────────────────────────────
@@ -109,30 +108,21 @@ def build_email_html(heading, body_html, footer_note=None):
 #  SPECIFIC EMAIL SENDERS
 # ─────────────────────────────────────────────
 
-def _dispatch(email, subject, plain_text, html_body):
-    """Low-level send via Django's EmailMultiAlternatives."""
-    try:
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body=plain_text,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[email],
-        )
-        msg.attach_alternative(html_body, "text/html")
-        msg.send(fail_silently=False)
-        print(f"[OK] Email sent to {email} — {subject}")
-        return True
-    except Exception as exc:
-        print(f"[FAIL] Email failed for {email}: {exc}")
-        print(f"  Subject : {subject}")
-        print(f"  Body    : {plain_text}")
-        return False
+def _dispatch(email, subject, plain_text, html_body, urgent=False):
+    """
+    Queue the email in the outbox (notifications.outbox). It is written in the
+    caller's transaction and sent by the outbox worker, so the request never
+    waits on SMTP. ``urgent`` puts it ahead of routine mail (OTP codes).
+    """
+    from notifications.outbox import queue_email
+    queue_email(email, subject, plain_text, html_body, urgent=urgent)
+    return True
 
 
 def send_email_sync(email, subject, message):
     """
     Generic branded email. Converts plain-text message to HTML paragraphs.
-    All existing callers continue to work unchanged.
+    Queued like every other email here; the name is kept for existing callers.
     """
     paragraphs = "".join(
         f'<p style="margin:0 0 14px;color:#424242;font-size:15px;line-height:1.7;">'
@@ -177,7 +167,7 @@ def send_otp_email(email, user_name, code, heading="Verification Code", expires=
         body_html,
         footer_note="If you didn't request this code, please ignore this email and your account will remain safe."
     )
-    return _dispatch(email, heading, plain, html)
+    return _dispatch(email, heading, plain, html, urgent=True)
 
 
 def send_password_reset_email(user, token):
@@ -226,7 +216,7 @@ def send_password_reset_email(user, token):
         body_html,
         footer_note="If you didn't request a password reset, please ignore this email. Your account is safe."
     )
-    return _dispatch(user.email, "Password Reset Request — LHMMS", plain, html)
+    return _dispatch(user.email, "Password Reset Request — LHMMS", plain, html, urgent=True)
 
 
 def send_account_approved_email(user):
@@ -334,7 +324,10 @@ def send_account_declined_email(user):
 
 
 def send_sms_sync(phone, message):
-    """Send SMS synchronously without Celery."""
+    """
+    Send one SMS right away. Used by the outbox worker; request code should
+    queue SMS with notifications.outbox.queue_sms instead.
+    """
     import os
     if os.getenv('SMS_DEV_MODE', 'False') == 'True' or not os.getenv('TWILIO_ACCOUNT_SID'):
         print("=" * 60)
@@ -0,0 +1,145 @@
+"""
+Daily KPI rollups for the admin dashboard.
+
+Past days are written once (by the ``snapshot_admin_kpis`` command, or lazily
+the first time the dashboard asks for a day that has no row). Today's row is
+seeded from live counts and then patched by authentication.signals as users
+register or change status, so the dashboard never rescans the users table.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AdminKpiSnapshot, CustomUser
+
+JOINED_FIELDS = {
+    'farmer': 'farmers_joined',
+    'vet': 'vets_joined',
+}
+
+STATUS_FIELDS = {
+    'pending': 'pending_total',
+    'approved': 'approved_total',
+    'declined': 'declined_total',
+}
+
+
+def _non_admin_users():
+    return CustomUser.objects.exclude(role='admin')
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _joined_by_day(start, end):
+    """{day: {field: count}} of registrations between ``start`` and ``end`` inclusive."""
+    rows = (
+        _non_admin_users()
+        .filter(date_joined__gte=_start_of(start), date_joined__lt=_start_of(end + timedelta(days=1)))
+        .annotate(day=TruncDate('date_joined'))
+        .values('day', 'role')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    joined = {}
+    for row in rows:
+        field = JOINED_FIELDS.get(row['role'])
+        if field:
+            joined.setdefault(row['day'], {})[field] = row['n']
+    return joined
+
+
+def _live_status_totals():
+    totals = dict.fromkeys(STATUS_FIELDS.values(), 0)
+    for row in _non_admin_users().values('status').annotate(n=Count('id')).order_by():
+        field = STATUS_FIELDS.get(row['status'])
+        if field:
+            totals[field] = row['n']
+    return totals
+
+
+def capture_day(day):
+    """(Re)write the snapshot for ``day`` from live data and return it."""
+    values = _joined_by_day(day, day).get(day, {})
+    values = {field: values.get(field, 0) for field in JOINED_FIELDS.values()}
+    values.update(_live_status_totals())
+    snapshot, _ = AdminKpiSnapshot.objects.update_or_create(day=day, defaults=values)
+    return snapshot
+
+
+def ensure_today(today=None):
+    """Today's snapshot, seeded from live counts the first time it is asked for."""
+    today = today or timezone.localdate()
+    snapshot = AdminKpiSnapshot.objects.filter(day=today).first()
+    return snapshot or capture_day(today)
+
+
+def backfill(days):
+    """
+    Create registration-only rows for ``days`` that have no snapshot yet,
+    with one grouped query over the span they cover. Status totals for past
+    days cannot be reconstructed and are left empty.
+    """
+    if not days:
+        return 0
+    joined = _joined_by_day(min(days), max(days))
+    AdminKpiSnapshot.objects.bulk_create(
+        [AdminKpiSnapshot(day=day, **joined.get(day, {})) for day in days],
+        ignore_conflicts=True,
+    )
+    return len(days)
+
+
+def series(start, end):
+    """
+    {day: snapshot values} for every day from ``start`` to ``end``, filling
+    any gaps on the way. One query when no day is missing.
+    """
+    def load():
+        return {
+            row['day']: row
+            for row in AdminKpiSnapshot.objects.filter(day__gte=start, day__lte=end).values()
+        }
+
+    rows = load()
+    missing = [
+        start + timedelta(days=i)
+        for i in range((end - start).days + 1)
+        if start + timedelta(days=i) not in rows
+    ]
+    if missing:
+        backfill(missing)
+        rows = load()
+    return rows
+
+
+def _patch_today(deltas):
+    deltas = {field: delta for field, delta in deltas.items() if field and delta}
+    if deltas:
+        AdminKpiSnapshot.objects.filter(day=timezone.localdate()).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def record_registration(user):
+    """A non-admin user was created."""
+    joined_day = timezone.localtime(user.date_joined).date() if user.date_joined else timezone.localdate()
+    joined_field = JOINED_FIELDS.get(user.role)
+    if joined_field:
+        AdminKpiSnapshot.objects.filter(day=joined_day).update(**{joined_field: F(joined_field) + 1})
+    _patch_today({STATUS_FIELDS.get(user.status): 1})
+
+
+def record_status_change(old_status, new_status):
+    """A non-admin user moved between account statuses."""
+    if old_status == new_status:
+        return
+    _patch_today({STATUS_FIELDS.get(old_status): -1, STATUS_FIELDS.get(new_status): 1})
+
+
+def record_removal(status):
+    """A non-admin user with ``status`` was deleted."""
+    _patch_today({STATUS_FIELDS.get(status): -1})
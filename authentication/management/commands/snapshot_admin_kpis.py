@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from authentication import kpi_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Write daily admin KPI snapshots (run once a day, shortly after midnight)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill-days',
+            type=int,
+            default=0,
+            help='Also create registration rollups for this many past days that have none',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+
+        # Close out yesterday (status totals are as of now, i.e. end of day)
+        # and start today's row for the signals to patch.
+        kpi_snapshots.capture_day(yesterday)
+        kpi_snapshots.capture_day(today)
+        self.stdout.write(self.style.SUCCESS(f'Captured KPI snapshots for {yesterday} and {today}'))
+
+        backfill_days = options['backfill_days']
+        if backfill_days > 0:
+            rows = kpi_snapshots.series(yesterday - timedelta(days=backfill_days), today)
+            self.stdout.write(self.style.SUCCESS(f'{len(rows)} daily snapshots now cover the last {backfill_days} days'))
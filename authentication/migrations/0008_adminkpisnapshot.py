@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_change_password_reset_token_to_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminKpiSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('farmers_joined', models.IntegerField(default=0)),
+                ('vets_joined', models.IntegerField(default=0)),
+                ('pending_total', models.IntegerField(blank=True, null=True)),
+                ('approved_total', models.IntegerField(blank=True, null=True)),
+                ('declined_total', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+    ]
@@ -116,3 +116,30 @@ class LoginOTP(models.Model):
     def is_expired(self):
         return timezone.now() > self.created_at + timezone.timedelta(minutes=10)
 
+
+
+class AdminKpiSnapshot(models.Model):
+    """
+    Daily rollup behind the admin dashboard.
+    ``*_joined`` count the non-admin users who registered on ``day``; the
+    ``*_total`` columns hold the account-status totals as of the end of
+    ``day`` (for today: as of now, patched live by authentication.signals);
+    they are empty for days backfilled after the fact.
+    """
+    day = models.DateField(unique=True)
+    farmers_joined = models.IntegerField(default=0)
+    vets_joined = models.IntegerField(default=0)
+    pending_total = models.IntegerField(null=True, blank=True)
+    approved_total = models.IntegerField(null=True, blank=True)
+    declined_total = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"KPI snapshot {self.day}"
+
+    @property
+    def registrations(self):
+        return self.farmers_joined + self.vets_joined
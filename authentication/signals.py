@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .models import CustomUser
+from . import kpi_snapshots
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_account_status(sender, instance, **kwargs):
+    """Remember the status a user was loaded with so saves can patch today's KPI totals."""
+    instance._kpi_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=CustomUser)
+def patch_kpis_on_save(sender, instance, created, **kwargs):
+    if instance.role != 'admin':
+        if created:
+            kpi_snapshots.record_registration(instance)
+        elif 'status' in instance.__dict__ and instance._kpi_status is not None:
+            kpi_snapshots.record_status_change(instance._kpi_status, instance.status)
+    instance._kpi_status = instance.__dict__.get('status')
+
+
+@receiver(post_delete, sender=CustomUser)
+def patch_kpis_on_delete(sender, instance, **kwargs):
+    if instance.role != 'admin':
+        kpi_snapshots.record_removal(instance._kpi_status)
@@ -9,13 +9,15 @@ from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from .serializers import LoginSerializer
 from rest_framework.permissions import AllowAny
+from django.db import transaction
 from django.utils import timezone
 from .serializers import (
     ForgotPasswordEmailSerializer,
     ForgotPasswordTokenSerializer,
     ResetPasswordSerializer
 )
-from .email_utils import send_email_sync, send_sms_sync, send_otp_email, send_account_approved_email, send_account_declined_email, send_password_reset_email
+from notifications.outbox import queue_sms
+from .email_utils import send_email_sync, send_otp_email, send_account_approved_email, send_account_declined_email, send_password_reset_email
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.parsers import MultiPartParser, FormParser
 import random
@@ -70,14 +72,14 @@ class ResendVerificationView(APIView):
             user = CustomUser.objects.get(email=email)
         except CustomUser.DoesNotExist:
             return Response({'success': False, 'message': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
-        token = EmailVerificationToken.objects.create(user=user)
-        
-        send_otp_email(
-            user.email,
-            user.full_name or user.username,
-            token.code,
-            heading="Email Verification Code",
-        )
+        with transaction.atomic():
+            token = EmailVerificationToken.objects.create(user=user)
+            send_otp_email(
+                user.email,
+                user.full_name or user.username,
+                token.code,
+                heading="Email Verification Code",
+            )
         
         return Response({'success': True, 'message': 'Verification email resent.'})
 
@@ -205,9 +207,9 @@ class ForgotPasswordEmailView(APIView):
         except CustomUser.DoesNotExist:
             return Response({"error": "No user registered with this email"}, status=status.HTTP_400_BAD_REQUEST)
 
-        token_obj = PasswordResetToken.objects.create(user=user)
-        
-        send_password_reset_email(user, token_obj.token)
+        with transaction.atomic():
+            token_obj = PasswordResetToken.objects.create(user=user)
+            send_password_reset_email(user, token_obj.token)
 
         return Response({"message": "Reset token sent to your email"}, status=status.HTTP_200_OK)
 
@@ -275,82 +277,71 @@ class AdminUserListView(APIView):
 
 
 class AdminDashboardStatsView(APIView):
+    """
+    Admin KPIs served from daily AdminKpiSnapshot rollups (see kpi_snapshots).
+    ``?months=`` (1-24, default 6) sets the registrations-by-month window.
+    """
     permission_classes = [IsAuthenticated]
+
+    DEFAULT_MONTHS = 6
+    MAX_MONTHS = 24
     
     def get(self, request):
         # Check if user is admin
         if request.user.role != 'admin':
             return Response({'error': 'Only admins can access this endpoint'}, status=status.HTTP_403_FORBIDDEN)
-        
-        # Get statistics
-        total_registrations = CustomUser.objects.exclude(role='admin').count()
-        pending_reviews = CustomUser.objects.filter(status='pending').exclude(role='admin').count()
-        approved_accounts = CustomUser.objects.filter(status='approved').exclude(role='admin').count()
-        
-        # Active this week (users who joined in the last 7 days)
+
         from datetime import timedelta
-        from django.db.models import Count
-        from django.db.models.functions import TruncMonth, TruncDay
-        import calendar
-        
-        week_ago = timezone.now() - timedelta(days=7)
-        active_this_week = CustomUser.objects.filter(
-            date_joined__gte=week_ago
-        ).exclude(role='admin').count()
-        
-        # Monthly verifications data (last 6 months)
-        six_months_ago = timezone.now() - timedelta(days=180)
-        monthly_verifications = CustomUser.objects.filter(
-            date_joined__gte=six_months_ago
-        ).exclude(role='admin').annotate(
-            month=TruncMonth('date_joined')
-        ).values('month', 'role').annotate(
-            count=Count('id')
-        ).order_by('month')
-        
-        # Process monthly data
+        from . import kpi_snapshots
+
+        try:
+            months = int(request.query_params.get('months', self.DEFAULT_MONTHS))
+        except ValueError:
+            months = 0
+        if not 1 <= months <= self.MAX_MONTHS:
+            return Response(
+                {'error': f'months must be between 1 and {self.MAX_MONTHS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.localdate()
+        snapshot = kpi_snapshots.ensure_today(today)
+
+        # Window start: first day of the month ``months - 1`` months back
+        month_index = today.year * 12 + today.month - 1 - (months - 1)
+        window_start = today.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+        week_start = today - timedelta(days=6)
+        days = kpi_snapshots.series(min(window_start, week_start), today)
+
+        # Monthly verifications data
         monthly_data = {}
-        for item in monthly_verifications:
-            month_name = item['month'].strftime('%b')
-            if month_name not in monthly_data:
-                monthly_data[month_name] = {'name': month_name, 'farmers': 0, 'veterinarians': 0}
-            
-            if item['role'] == 'farmer':
-                monthly_data[month_name]['farmers'] = item['count']
-            elif item['role'] == 'vet':
-                monthly_data[month_name]['veterinarians'] = item['count']
-        
+        for day, row in sorted(days.items()):
+            if day < window_start:
+                continue
+            key = (day.year, day.month)
+            if key not in monthly_data:
+                monthly_data[key] = {'name': day.strftime('%b'), 'year': day.year, 'farmers': 0, 'veterinarians': 0}
+            monthly_data[key]['farmers'] += row['farmers_joined']
+            monthly_data[key]['veterinarians'] += row['vets_joined']
+
         # Weekly activity data (last 7 days)
-        weekly_activity = CustomUser.objects.filter(
-            date_joined__gte=week_ago
-        ).exclude(role='admin').annotate(
-            day=TruncDay('date_joined')
-        ).values('day').annotate(
-            count=Count('id')
-        ).order_by('day')
-        
-        # Process weekly data
-        weekly_data = []
         day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        weekly_data = []
         for i in range(7):
-            day = timezone.now() - timedelta(days=6-i)
-            day_name = day_names[day.weekday()]
-            count = 0
-            
-            for item in weekly_activity:
-                if item['day'].date() == day.date():
-                    count = item['count']
-                    break
-            
-            weekly_data.append({'name': day_name, 'value': count})
+            day = week_start + timedelta(days=i)
+            row = days[day]
+            weekly_data.append({'name': day_names[day.weekday()], 'value': row['farmers_joined'] + row['vets_joined']})
+
+        pending_reviews = snapshot.pending_total or 0
+        approved_accounts = snapshot.approved_total or 0
         
         return Response({
             'success': True,
             'stats': {
-                'total_registrations': total_registrations,
+                'total_registrations': pending_reviews + approved_accounts + (snapshot.declined_total or 0),
                 'pending_reviews': pending_reviews,
                 'approved_accounts': approved_accounts,
-                'active_this_week': active_this_week
+                'active_this_week': sum(item['value'] for item in weekly_data)
             },
             'monthly_verifications': list(monthly_data.values()),
             'weekly_activity': weekly_data
@@ -381,12 +372,13 @@ class ApproveUserView(APIView):
                             status=status.HTTP_403_FORBIDDEN)
 
         user = get_object_or_404(CustomUser, id=user_id)
-        user.status = 'approved'
-        user.is_active = True
-        user.save()
+        with transaction.atomic():
+            user.status = 'approved'
+            user.is_active = True
+            user.save()
 
-        # 1) email the user
-        _send_account_status_email(user, approved=True)
+            # 1) email the user (queued with the status change)
+            _send_account_status_email(user, approved=True)
 
         # 2) in-app notification (real-time bell) — best-effort
         try:
@@ -408,11 +400,12 @@ class DeclineUserView(APIView):
                             status=status.HTTP_403_FORBIDDEN)
 
         user = get_object_or_404(CustomUser, id=user_id)
-        user.status = 'declined'
-        user.is_active = False
-        user.save()
+        with transaction.atomic():
+            user.status = 'declined'
+            user.is_active = False
+            user.save()
 
-        _send_account_status_email(user, approved=False)
+            _send_account_status_email(user, approved=False)
 
         try:
             from notifications.utils import notify_account_declined
@@ -486,23 +479,18 @@ class SendLoginOTPView(APIView):
             elif user.status != 'approved':
                 return Response({'success': False, 'error': 'Your account is not approved'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create login OTP
-        login_otp = LoginOTP.objects.create(user=user)
-        
-        send_otp_email(
-            user.email,
-            user.full_name or user.username,
-            login_otp.email_code,
-            heading="Login Verification Code",
-        )
-        
-        # Send phone OTP via SMS only if enabled
-        if role in ['farmer', 'vet'] and os.getenv('ENABLE_SMS_OTP', 'False') == 'True':
-            otp_message = f'Your login verification code is: {login_otp.phone_code}'
-            try:
-                send_sms_sync(user.phone, otp_message)
-            except Exception as e:
-                print(f'[SMS] Failed to send SMS OTP: {e}')
+        # Create login OTP; the codes go out through the outbox once it commits
+        with transaction.atomic():
+            login_otp = LoginOTP.objects.create(user=user)
+            send_otp_email(
+                user.email,
+                user.full_name or user.username,
+                login_otp.email_code,
+                heading="Login Verification Code",
+            )
+            # Send phone OTP via SMS only if enabled
+            if role in ['farmer', 'vet'] and os.getenv('ENABLE_SMS_OTP', 'False') == 'True':
+                queue_sms(user.phone, f'Your login verification code is: {login_otp.phone_code}', urgent=True)
         
         return Response({'success': True, 'message': 'OTP sent successfully'}, status=status.HTTP_200_OK)
 
@@ -0,0 +1,52 @@
+"""
+Shared single-query status/date breakdowns for the stats endpoints.
+
+A breakdown spec maps each result key to one of:
+  - None                     -> count every row
+  - a Q object               -> count the rows matching it
+  - an aggregate expression  -> used as-is (e.g. ``sum_where(...)``)
+
+The whole spec is evaluated as one conditional-aggregate query
+(``COUNT(*) FILTER (WHERE ...)`` / ``SUM(...) FILTER (WHERE ...)``), so a
+stats endpoint costs a single database round trip however many buckets it
+reports.
+
+    breakdown(Appointment.objects.filter(farmer=user), {
+        'pending': status_in('Pending'),
+        'cancelled': status_in('Cancelled', 'Declined'),
+        'total': None,
+    })
+"""
+from django.db.models import Count, Q, Sum
+
+
+def status_in(*statuses, field='status'):
+    """Q matching rows whose ``field`` is any of ``statuses``."""
+    if len(statuses) == 1:
+        return Q(**{field: statuses[0]})
+    return Q(**{f'{field}__in': statuses})
+
+
+def sum_where(field, condition=None):
+    """SUM of ``field`` over the rows matching ``condition`` (all rows if None)."""
+    return Sum(field, filter=condition)
+
+
+def breakdown(queryset, spec):
+    """
+    Evaluate ``spec`` against ``queryset`` in one aggregate query.
+    Empty sums come back as 0 rather than None.
+    """
+    aggregates = {}
+    for key, rule in spec.items():
+        if rule is None:
+            aggregates[key] = Count('pk')
+        elif isinstance(rule, Q):
+            aggregates[key] = Count('pk', filter=rule)
+        else:
+            aggregates[key] = rule
+
+    # Ordering, select_related and prefetches are irrelevant to an aggregate
+    queryset = queryset.order_by().select_related(None).prefetch_related(None)
+    result = queryset.aggregate(**aggregates)
+    return {key: 0 if value is None else value for key, value in result.items()}
@@ -0,0 +1,32 @@
+"""
+Small database expressions shared across apps.
+"""
+from django.db.models import DateField, Func, IntegerField, Value
+from django.db.models.functions import Cast
+
+
+class DaysUntil(Func):
+    """
+    Whole days from ``since`` (a date) to the date expression, as an integer:
+    negative once the date has passed. ``DaysUntil('next_due_date', today)``.
+    """
+    output_field = IntegerField()
+
+    def __init__(self, expression, since, **extra):
+        super().__init__(expression, Cast(Value(since), DateField()), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL: date - date is already an integer number of days
+        return super().as_sql(
+            compiler, connection,
+            template='(%(expressions)s)', arg_joiner=' - ',
+            **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
@@ -323,3 +323,66 @@ else:
             'BACKEND': 'channels.layers.InMemoryChannelLayer',
         },
     }
+
+# Due-date reminders (notifications.reminders / `send_due_reminders`)
+# Items due within REMINDER_WINDOW_DAYS get a "due soon" reminder; items
+# overdue by at most REMINDER_OVERDUE_LOOKBACK_DAYS get an "overdue" one.
+REMINDER_WINDOW_DAYS = int(os.getenv('REMINDER_WINDOW_DAYS', '3'))
+REMINDER_OVERDUE_LOOKBACK_DAYS = int(os.getenv('REMINDER_OVERDUE_LOOKBACK_DAYS', '7'))
+
+# E-mail / SMS outbox (notifications.outbox). Messages are queued with the
+# change that triggers them and delivered by `run_outbox_worker`; with
+# OUTBOX_INLINE_WORKER on, a small thread pool inside the web process also
+# drains the outbox right after each commit (handy in development).
+OUTBOX_INLINE_WORKER = os.getenv('OUTBOX_INLINE_WORKER', 'True') == 'True'
+OUTBOX_WORKER_THREADS = int(os.getenv('OUTBOX_WORKER_THREADS', '2'))
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '6'))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '30'))
+
+# Notification e-mails (notifications.digest / `send_notification_digests`)
+FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
+NOTIFICATION_DIGEST_MAX_AGE_DAYS = int(os.getenv('NOTIFICATION_DIGEST_MAX_AGE_DAYS', '7'))
+
+# Admin broadcasts (notifications.broadcast). Fanned out in the background,
+# BROADCAST_CHUNK_SIZE recipients per INSERT. With BROADCAST_INLINE_WORKER
+# off, run `python manage.py run_broadcasts` from cron or a supervisor.
+BROADCAST_INLINE_WORKER = os.getenv('BROADCAST_INLINE_WORKER', 'True') == 'True'
+BROADCAST_CHUNK_SIZE = int(os.getenv('BROADCAST_CHUNK_SIZE', '1000'))
+
+# History retention (notifications.retention / `prune_history`, daily).
+# Read notifications are deleted after NOTIFICATION_RETENTION_DAYS for their
+# type, and nothing is kept past NOTIFICATION_MAX_AGE_DAYS, read or not.
+# Chat messages older than MESSAGE_HOT_MONTHS whole months move to the
+# monthly message archive; archived months past MESSAGE_ARCHIVE_MONTHS are
+# dropped whole.
+NOTIFICATION_RETENTION_DAYS = {
+    'message': 30,
+    'friend': 60,
+    'system': 90,
+    'vaccination': 180,
+    'medical': 180,
+    'appointment': 365,
+    'insurance': 365,
+    'transfer': 365,
+    'account': 365,
+}
+NOTIFICATION_MAX_AGE_DAYS = int(os.getenv('NOTIFICATION_MAX_AGE_DAYS', '365'))
+MESSAGE_HOT_MONTHS = int(os.getenv('MESSAGE_HOT_MONTHS', '6'))
+MESSAGE_ARCHIVE_MONTHS = int(os.getenv('MESSAGE_ARCHIVE_MONTHS', '24'))
+
+# Chat write-behind (messaging.buffer). Off: every chat message is inserted
+# before it is broadcast. On: messages are broadcast at once and written in
+# batches every CHAT_FLUSH_INTERVAL_MS, or as soon as CHAT_FLUSH_BATCH are
+# waiting. Ids are reserved CHAT_ID_BLOCK at a time. Until its batch commits a
+# message lives in a recovery log under CHAT_RECOVERY_LOG_DIR, replayed by
+# `python manage.py recover_chat_log` (also run when a process starts
+# buffering). PostgreSQL and SQLite only.
+CHAT_WRITE_BEHIND = os.getenv('CHAT_WRITE_BEHIND', 'False') == 'True'
+CHAT_FLUSH_INTERVAL_MS = int(os.getenv('CHAT_FLUSH_INTERVAL_MS', '50'))
+CHAT_FLUSH_BATCH = int(os.getenv('CHAT_FLUSH_BATCH', '200'))
+CHAT_ID_BLOCK = int(os.getenv('CHAT_ID_BLOCK', '100'))
+CHAT_RECOVERY_LOG_DIR = os.getenv('CHAT_RECOVERY_LOG_DIR', str(BASE_DIR / 'var' / 'chat-recovery'))
+# fsync every log write. Off, the log survives a process crash but a machine
+# crash (power loss, kernel panic) can lose messages already broadcast.
+CHAT_RECOVERY_FSYNC = os.getenv('CHAT_RECOVERY_FSYNC', 'False') == 'True'
@@ -0,0 +1,86 @@
+"""
+Race-free workflow status changes.
+
+Each step is a single conditional UPDATE:
+
+    UPDATE ... SET status = <target>, ... WHERE id = <pk> AND status IN (<sources>)
+
+so two people clicking at once cannot both succeed (the second one matches
+no row and gets a TransitionError), and no SELECT is needed to diff the old
+status. The allowed moves live on the model, keyed by target status:
+
+    TRANSITIONS = {'Approved': ('Pending',), ...}
+    TRANSITION_STAMPS = {'Approved': 'approved_at'}   # optional timestamp per target
+
+Work that must commit or roll back with the status (ownership moves, derived
+tables) hangs off the ``status_changed`` signal, which is sent inside the
+same transaction. Notifications and e-mail go in ``on_commit`` so they never
+fire for a change that was rolled back.
+"""
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+# sender=model class; kwargs: instance, previous, target
+status_changed = Signal()
+
+
+class TransitionError(Exception):
+    """The row was not in a status the target can be reached from."""
+
+    def __init__(self, target, current):
+        self.target = target
+        self.current = current
+        super().__init__(f"Cannot change status from {current} to {target}")
+
+
+def allowed_sources(model, target):
+    return tuple(model.TRANSITIONS.get(target, ()))
+
+
+def can_transition(model, current, target):
+    return current in allowed_sources(model, target)
+
+
+def transition(instance, target, *, sources=None, on_commit=None, **changes):
+    """
+    Move ``instance`` to ``target`` with one conditional UPDATE, also writing
+    ``changes`` and the target's timestamp. ``sources`` narrows the declared
+    sources (e.g. a receiver may only reject a Pending transfer).
+
+    The instance is updated in memory and returned; ``on_commit(instance,
+    previous)`` runs once the transaction commits. Raises TransitionError,
+    with the row's current status, when the row had already moved on.
+    """
+    model = type(instance)
+    allowed = allowed_sources(model, target)
+    if sources is not None:
+        allowed = tuple(s for s in allowed if s in sources)
+
+    now = timezone.now()
+    values = {'status': target, **changes}
+    stamp = getattr(model, 'TRANSITION_STAMPS', {}).get(target)
+    if stamp:
+        values.setdefault(stamp, now)
+    if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+        values['updated_at'] = now
+
+    with transaction.atomic():
+        updated = model._default_manager.filter(pk=instance.pk, status__in=allowed).update(**values)
+        if not updated:
+            current = (
+                model._default_manager.filter(pk=instance.pk).values_list('status', flat=True).first()
+            )
+            raise TransitionError(target, current)
+
+        # The UPDATE matched, so the row was in one of ``allowed``; the loaded
+        # status is the best record of which.
+        previous = instance.status if instance.status in allowed else allowed[0]
+        for name, value in values.items():
+            setattr(instance, name, value)
+
+        status_changed.send(sender=model, instance=instance, previous=previous, target=target)
+        if on_commit is not None:
+            transaction.on_commit(lambda: on_commit(instance, previous))
+
+    return instance
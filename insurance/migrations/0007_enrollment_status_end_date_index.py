@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance', '0006_enrollment_payment_screenshot'),
+        ('livestockcrud', '0003_tagsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['status', 'end_date'], name='insurance_e_status_7b4e02_idx'),
+        ),
+    ]
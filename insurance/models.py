@@ -93,6 +93,7 @@ class Enrollment(models.Model):
             models.Index(fields=['farmer', 'status']),
             models.Index(fields=['livestock']),
             models.Index(fields=['start_date', 'end_date']),
+            models.Index(fields=['status', 'end_date']),
         ]
         unique_together = ['livestock', 'plan', 'start_date']
     
@@ -114,6 +115,19 @@ class Claim(models.Model):
         ('Rejected', 'Rejected'),
         ('Paid', 'Paid'),
     ]
+
+    # target status: statuses it can be reached from (see backend.transitions);
+    # Under Review may be re-saved to update the admin notes
+    TRANSITIONS = {
+        'Under Review': ('Submitted', 'Under Review'),
+        'Approved': ('Submitted', 'Under Review'),
+        'Rejected': ('Submitted', 'Under Review'),
+        'Paid': ('Approved',),
+    }
+    TRANSITION_STAMPS = {
+        'Approved': 'decision_date',
+        'Rejected': 'decision_date',
+    }
     
     CLAIM_TYPE_CHOICES = [
         ('Death', 'Death'),
@@ -3,8 +3,9 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Sum
-from django.utils import timezone
+from django.db.models import Q, Count
+from backend.aggregates import breakdown, status_in, sum_where
+from backend.transitions import TransitionError, transition
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
@@ -149,18 +150,12 @@ class ClaimViewSet(viewsets.ModelViewSet):
         serializer = ClaimStatusUpdateSerializer(data=request.data)
         
         if serializer.is_valid():
-            claim.status = serializer.validated_data['status']
-            
-            if 'admin_notes' in serializer.validated_data:
-                claim.admin_notes = serializer.validated_data['admin_notes']
-            
-            if 'approved_amount' in serializer.validated_data:
-                claim.approved_amount = serializer.validated_data['approved_amount']
-            
-            if claim.status in ['Approved', 'Rejected']:
-                claim.decision_date = timezone.now()
-            
-            claim.save()
+            changes = dict(serializer.validated_data)
+            target = changes.pop('status')
+            try:
+                transition(claim, target, **changes)
+            except TransitionError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
             
             response_serializer = self.get_serializer(claim)
             return Response(response_serializer.data)
@@ -182,22 +177,14 @@ class ClaimViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        stats = {
-            'total_claims': claims.count(),
-            'pending_claims': claims.filter(
-                status__in=['Submitted', 'Under Review']
-            ).count(),
-            'approved_claims': claims.filter(status='Approved').count(),
-            'rejected_claims': claims.filter(status='Rejected').count(),
-            'total_claim_amount': claims.aggregate(
-                total=Sum('claim_amount')
-            )['total'] or 0,
-            'total_approved_amount': claims.filter(
-                status='Approved'
-            ).aggregate(
-                total=Sum('approved_amount')
-            )['total'] or 0,
-        }
+        stats = breakdown(claims, {
+            'total_claims': None,
+            'pending_claims': status_in('Submitted', 'Under Review'),
+            'approved_claims': status_in('Approved'),
+            'rejected_claims': status_in('Rejected'),
+            'total_claim_amount': sum_where('claim_amount'),
+            'total_approved_amount': sum_where('approved_amount', status_in('Approved')),
+        })
         
         serializer = ClaimStatsSerializer(stats)
         return Response(serializer.data)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Livestock, Species, Breed
+from .models import Livestock, Species, Breed, TagSequence
 
 @admin.register(Species)
 class SpeciesAdmin(admin.ModelAdmin):
@@ -29,3 +29,8 @@ class LivestockAdmin(admin.ModelAdmin):
     def age_display(self, obj):
         return f"{obj.age} years" if obj.age else "N/A"
 
+
+@admin.register(TagSequence)
+class TagSequenceAdmin(admin.ModelAdmin):
+    list_display = ['prefix', 'last_value']
+    search_fields = ['prefix']
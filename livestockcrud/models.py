@@ -1,4 +1,7 @@
-from django.db import models
+import re
+from django.db import connection, models
+from django.db.models import IntegerField, Max
+from django.db.models.functions import Cast, Substr
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -70,3 +73,95 @@ class Livestock(models.Model):
 
     def __str__(self):
         return f"{self.species} - {self.tag_id}"
+
+
+def tag_prefix_for(user):
+    """
+    Two-letter tag prefix derived from the farmer's name.
+    First letter of first and last name, or first and last letter of a single name.
+    """
+    full_name = user.full_name.strip()
+    name_parts = full_name.split()
+
+    if len(name_parts) >= 2:
+        first_letter = name_parts[0][0].upper()
+        last_letter = name_parts[-1][0].upper()
+    else:
+        first_letter = full_name[0].upper()
+        last_letter = full_name[-1].upper() if len(full_name) > 1 else full_name[0].upper()
+
+    return f"{first_letter}{last_letter}"
+
+
+class TagSequence(models.Model):
+    """
+    Per-prefix counter for livestock tag IDs.
+    Numbers are handed out by a single atomic UPDATE ... RETURNING, so concurrent
+    creates never race to the same tag and no existence probing is needed.
+    """
+    TAG_NUMBER_WIDTH = 5
+
+    prefix = models.CharField(max_length=10, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix} -> {self.last_value}"
+
+    @classmethod
+    def format_tag(cls, prefix, number):
+        return f"{prefix}{number:0{cls.TAG_NUMBER_WIDTH}d}"
+
+    @classmethod
+    def _highest_existing_number(cls, prefix):
+        """Highest numeric suffix already used by a tag with this prefix (used once to seed)."""
+        result = Livestock.objects.filter(
+            tag_id__regex=rf'^{re.escape(prefix)}[0-9]+$'
+        ).aggregate(
+            highest=Max(Cast(Substr('tag_id', len(prefix) + 1), IntegerField()))
+        )
+        return result['highest'] or 0
+
+    @classmethod
+    def peek(cls, prefix):
+        """Next number that would be allocated for ``prefix``, without reserving it."""
+        last_value = cls.objects.filter(prefix=prefix).values_list('last_value', flat=True).first()
+        if last_value is None:
+            last_value = cls._highest_existing_number(prefix)
+        return last_value + 1
+
+    @classmethod
+    def allocate(cls, prefix, count=1):
+        """
+        Reserve ``count`` consecutive numbers for ``prefix`` and return them as a range.
+        The first call for a prefix seeds the counter from the tags already in use.
+        """
+        if count < 1:
+            raise ValueError("count must be at least 1")
+
+        if not cls.objects.filter(prefix=prefix).exists():
+            cls.objects.get_or_create(
+                prefix=prefix,
+                defaults={'last_value': cls._highest_existing_number(prefix)},
+            )
+
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET last_value = last_value + %s "
+                f"WHERE prefix = %s RETURNING last_value",
+                [count, prefix],
+            )
+            last_value = cursor.fetchone()[0]
+
+        return range(last_value - count + 1, last_value + 1)
+
+    @classmethod
+    def next_tag_ids(cls, user, count=1):
+        """Allocate ``count`` tag IDs for a new batch of the user's livestock."""
+        prefix = tag_prefix_for(user)
+        return [cls.format_tag(prefix, number) for number in cls.allocate(prefix, count)]
+
+    @classmethod
+    def preview_tag_id(cls, user):
+        prefix = tag_prefix_for(user)
+        return cls.format_tag(prefix, cls.peek(prefix))
@@ -1,6 +1,6 @@
 # medical/admin.py
 from django.contrib import admin
-from .models import Treatment, Medicine
+from .models import Treatment, Medicine, MedicineDose
 
 @admin.register(Medicine)
 class MedicineAdmin(admin.ModelAdmin):
@@ -23,3 +23,9 @@ class TreatmentAdmin(admin.ModelAdmin):
         return obj.days_until_next
     days_until_next.admin_order_field = 'next_treatment_date'
 
+
+@admin.register(MedicineDose)
+class MedicineDoseAdmin(admin.ModelAdmin):
+    list_display = ['medicine', 'treatment', 'scheduled_at', 'given_at']
+    list_filter = ['scheduled_at']
+    raw_id_fields = ['medicine', 'treatment']
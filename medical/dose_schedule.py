@@ -0,0 +1,70 @@
+"""
+Expansion of Medicine schedules into MedicineDose rows.
+
+A medicine is given on each of its ``duration`` days starting at the
+treatment date. Interval schedules take ``frequency`` times starting at
+``start_time`` and ``interval_hours`` apart, wrapping past midnight onto the
+same day (as MedicalTrackingCard always has); exact schedules use the first
+``frequency`` entries of ``exact_times``.
+
+``regenerate`` rebuilds the pending part of a treatment's timeline in a
+fixed number of queries; doses already marked given are kept.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Medicine, MedicineDose
+
+
+def _parse_time(value):
+    if isinstance(value, time):
+        return value
+    return time.fromisoformat(str(value))
+
+
+def daily_times(medicine):
+    """Times of day at which ``medicine`` is given, sorted."""
+    if medicine.schedule_type == 'exact':
+        times = [_parse_time(value) for value in (medicine.exact_times or [])[:medicine.frequency]]
+    else:
+        step = (medicine.interval_hours or 8) * 60
+        start = medicine.start_time.hour * 60 + medicine.start_time.minute
+        minutes = [(start + i * step) % (24 * 60) for i in range(medicine.frequency)]
+        times = [time(m // 60, m % 60) for m in minutes]
+    return sorted(set(times))
+
+
+def expand(treatment, medicines):
+    """Every ``(medicine, scheduled_at)`` dose of ``medicines`` for ``treatment``."""
+    tz = timezone.get_current_timezone()
+    for medicine in medicines:
+        times = daily_times(medicine)
+        for day in range(medicine.duration):
+            date = treatment.treatment_date + timedelta(days=day)
+            for at in times:
+                yield medicine, timezone.make_aware(datetime.combine(date, at), tz)
+
+
+def regenerate(treatment):
+    """
+    Rebuild the doses of ``treatment`` that have not been given yet.
+    Treatments that are no longer in progress keep only their given doses.
+    Returns the number of pending doses created.
+    """
+    given = set(
+        MedicineDose.objects.filter(treatment=treatment, given_at__isnull=False)
+        .values_list('medicine_id', 'scheduled_at')
+    )
+    MedicineDose.objects.filter(treatment=treatment, given_at__isnull=True).delete()
+    if treatment.status != 'In Progress':
+        return 0
+
+    medicines = Medicine.objects.filter(treatment=treatment)
+    doses = [
+        MedicineDose(medicine=medicine, treatment=treatment, scheduled_at=at)
+        for medicine, at in expand(treatment, medicines)
+        if (medicine.pk, at) not in given
+    ]
+    MedicineDose.objects.bulk_create(doses, batch_size=500)
+    return len(doses)
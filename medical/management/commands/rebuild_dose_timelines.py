@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from medical import dose_schedule
+from medical.models import Treatment
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pending dose timeline of every in-progress treatment (given doses are kept)'
+
+    def handle(self, *args, **options):
+        created = 0
+        treatments = Treatment.objects.filter(status='In Progress').order_by('pk')
+        for treatment in treatments.iterator():
+            created += dose_schedule.regenerate(treatment)
+        self.stdout.write(self.style.SUCCESS(f'Scheduled {created} pending doses'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:48
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_tracking_end_date(apps, schema_editor):
+    Treatment = apps.get_model('medical', 'Treatment')
+    Medicine = apps.get_model('medical', 'Medicine')
+    longest = (
+        Medicine.objects.values('treatment', 'treatment__treatment_date')
+        .annotate(days=Max('duration'))
+        .order_by()
+    )
+    to_update = [
+        Treatment(pk=row['treatment'], tracking_end_date=row['treatment__treatment_date'] + timedelta(days=row['days']))
+        for row in longest
+    ]
+    Treatment.objects.bulk_update(to_update, ['tracking_end_date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestockcrud', '0003_tagsequence'),
+        ('medical', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='treatment',
+            name='tracking_end_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['user', 'status', 'tracking_end_date'], name='medical_tre_user_id_8494ef_idx'),
+        ),
+        migrations.RunPython(backfill_tracking_end_date, migrations.RunPython.noop),
+    ]
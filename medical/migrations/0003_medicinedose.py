@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical', '0002_treatment_tracking_end_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicineDose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scheduled_at', models.DateTimeField()),
+                ('given_at', models.DateTimeField(blank=True, null=True)),
+                ('medicine', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doses', to='medical.medicine')),
+                ('treatment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doses', to='medical.treatment')),
+            ],
+            options={
+                'ordering': ['scheduled_at'],
+                'indexes': [models.Index(fields=['treatment', 'scheduled_at'], name='medical_med_treatme_bb34f6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('medicine', 'scheduled_at'), name='unique_medicine_dose_time')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestockcrud', '0003_tagsequence'),
+        ('medical', '0004_treatment_status_due_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='treatment',
+            index=models.Index(fields=['status', 'tracking_end_date'], name='medical_tre_status_d68a14_idx'),
+        ),
+    ]
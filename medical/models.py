@@ -3,7 +3,7 @@ from django.db import models
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.conf import settings
-from django.db.models import Q, Count, ExpressionWrapper, F, DurationField
+from django.db.models import Q, Count, ExpressionWrapper, F, DurationField, Max
 from datetime import timedelta
 from livestockcrud.models import Livestock
 import json
@@ -52,6 +52,8 @@ class Treatment(models.Model):
     next_treatment_date = models.DateField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='In Progress')
     document = models.FileField(upload_to='treatment_docs/%Y/%m/%d/', blank=True, null=True)
+    # Last day of the longest medicine course; kept in step by save() and medical.signals
+    tracking_end_date = models.DateField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -60,6 +62,9 @@ class Treatment(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['user', 'next_treatment_date']),
             models.Index(fields=['livestock', 'status']),
+            models.Index(fields=['user', 'status', 'tracking_end_date']),
+            models.Index(fields=['status', 'next_treatment_date']),
+            models.Index(fields=['status', 'tracking_end_date']),
         ]
         ordering = ['-created_at']
     
@@ -91,11 +96,77 @@ class Treatment(models.Model):
     @property
     def is_active_tracking(self):
         """For MedicineTrackingCard - has valid dates + medicines + In Progress"""
-        if self.status != 'In Progress' or not self.medicines.exists():
+        if self.status != 'In Progress' or not self.tracking_end_date:
             return False
         today = timezone.now().date()
-        return self.treatment_date <= today <= (self.treatment_date + timedelta(days=self.medicines.first().duration))
-    
+        return self.treatment_date <= today <= self.tracking_end_date
+
+    @staticmethod
+    def tracking_window_q(today=None):
+        """Q for treatments whose medicine tracking window covers ``today``."""
+        today = today or timezone.now().date()
+        return Q(status='In Progress', treatment_date__lte=today, tracking_end_date__gte=today)
+
+    @staticmethod
+    def tracking_end_for(treatment_date, longest_days):
+        """Last tracked day for a treatment whose longest medicine course is ``longest_days``."""
+        if longest_days is None:
+            return None
+        return treatment_date + timedelta(days=longest_days)
+
+    @staticmethod
+    def longest_courses(treatment_ids):
+        """{treatment id: longest medicine duration in days}, in one grouped query."""
+        return dict(
+            Medicine.objects.filter(treatment_id__in=treatment_ids)
+            .values('treatment').annotate(days=Max('duration'))
+            .values_list('treatment', 'days')
+            .order_by()
+        )
+
+    @classmethod
+    def refresh_tracking_end_dates(cls, treatment_ids):
+        """Re-derive tracking_end_date for ``treatment_ids`` after their medicines changed."""
+        longest = cls.longest_courses(treatment_ids)
+        for pk, start, stored in cls.objects.filter(pk__in=treatment_ids).values_list(
+            'pk', 'treatment_date', 'tracking_end_date'
+        ):
+            end = cls.tracking_end_for(start, longest.get(pk))
+            if end != stored:
+                cls.objects.filter(pk=pk).update(tracking_end_date=end)
+
+    def save(self, *args, **kwargs):
+        # treatment_date moves the window; medicine changes arrive via medical.signals
+        if self.pk:
+            self.tracking_end_date = self.tracking_end_for(
+                self.treatment_date, self.longest_courses([self.pk]).get(self.pk)
+            )
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'tracking_end_date'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.livestock.tag_id} - {self.treatment_name}"
 
+
+class MedicineDose(models.Model):
+    """One scheduled dose of a medicine; the timeline is built by medical.dose_schedule"""
+    medicine = models.ForeignKey(Medicine, related_name='doses', on_delete=models.CASCADE)
+    treatment = models.ForeignKey(Treatment, related_name='doses', on_delete=models.CASCADE)
+    scheduled_at = models.DateTimeField()
+    given_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['scheduled_at']
+        indexes = [models.Index(fields=['treatment', 'scheduled_at'])]
+        constraints = [
+            models.UniqueConstraint(fields=['medicine', 'scheduled_at'], name='unique_medicine_dose_time'),
+        ]
+
+    @property
+    def is_given(self):
+        return self.given_at is not None
+
+    def __str__(self):
+        return f"{self.medicine.name} @ {self.scheduled_at:%Y-%m-%d %H:%M}"
@@ -1,9 +1,14 @@
 # medical/serializers.py
+from django.db import transaction
 from rest_framework import serializers
-from .models import Treatment, Medicine
+from . import dose_schedule
+from .models import Treatment, Medicine, MedicineDose
+from .signals import deferred_tracking_refresh
 from livestockcrud.models import Livestock
 
 class MedicineSerializer(serializers.ModelSerializer):
+    # Writable so treatment updates can match medicines to existing rows
+    id = serializers.IntegerField(required=False)
     # Override exact_times to handle string time values from frontend
     exact_times = serializers.ListField(
         child=serializers.CharField(),
@@ -15,7 +20,6 @@ class MedicineSerializer(serializers.ModelSerializer):
         model = Medicine
         fields = ['id', 'name', 'dosage', 'frequency', 'duration', 'schedule_type', 'start_time', 'interval_hours', 'exact_times']
         extra_kwargs = {
-            'id': {'read_only': True},
             'start_time': {'required': True},
             'interval_hours': {'required': False, 'allow_null': True}
         }
@@ -68,9 +72,9 @@ class TreatmentSerializer(serializers.ModelSerializer):
             'id', 'livestock', 'livestock_tag', 'treatment_name', 'diagnosis', 
             'vet_name', 'treatment_date', 'next_treatment_date', 'status', 
             'document', 'medicines', 'days_until_next', 'status_display',
-            'is_active_tracking', 'created_at', 'updated_at'
+            'is_active_tracking', 'tracking_end_date', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['user', 'days_until_next', 'status_display', 'is_active_tracking']
+        read_only_fields = ['user', 'days_until_next', 'status_display', 'is_active_tracking', 'tracking_end_date']
     
     def validate_livestock_tag(self, value):
         try:
@@ -89,53 +93,98 @@ class TreatmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Livestock not found")
     
     def create(self, validated_data):
-        print(f"\n[TreatmentSerializer.create] ========== START ==========")
-        print(f"[TreatmentSerializer.create] validated_data keys: {validated_data.keys()}")
-        print(f"[TreatmentSerializer.create] 'medicines' in validated_data: {'medicines' in validated_data}")
-        if 'medicines' in validated_data:
-            print(f"[TreatmentSerializer.create] medicines value: {validated_data['medicines']}")
-            print(f"[TreatmentSerializer.create] medicines length: {len(validated_data['medicines'])}")
-        else:
-            print(f"[TreatmentSerializer.create] ⚠️ NO 'medicines' KEY IN validated_data!")
-        
         livestock_tag = validated_data.pop('livestock_tag')
         livestock = Livestock.objects.get(tag_id=livestock_tag)
         validated_data['livestock'] = livestock
         # Store with the livestock owner's user ID (so farmer can see vet's records)
         validated_data['user'] = livestock.user
-        
-        medicines_data = validated_data.pop('medicines', [])
-        print(f"[TreatmentSerializer.create] After pop - medicines_data: {medicines_data}")
-        print(f"[TreatmentSerializer.create] After pop - medicines_data length: {len(medicines_data)}")
-        treatment = Treatment.objects.create(**validated_data)
-        
-        # Create medicines with proper validation
-        for i, med_data in enumerate(medicines_data):
-            try:
-                medicine_serializer = MedicineSerializer(data=med_data)
-                if medicine_serializer.is_valid(raise_exception=True):
-                    medicine_serializer.save(treatment=treatment)
-            except serializers.ValidationError as e:
-                # Clean up the treatment if medicine validation fails
-                treatment.delete()
-                raise serializers.ValidationError({
-                    'medicines': f'Medicine {i+1} validation failed: {e.detail}'
-                })
-        
+
+        # Medicines were validated with the treatment; build them up front so the
+        # tracking window is known before the insert and they go in as one batch.
+        medicines = [self._build_medicine(med_data) for med_data in validated_data.pop('medicines', [])]
+        validated_data['tracking_end_date'] = Treatment.tracking_end_for(
+            validated_data['treatment_date'],
+            max((medicine.duration for medicine in medicines), default=None),
+        )
+
+        with transaction.atomic():
+            treatment = Treatment.objects.create(**validated_data)
+            for medicine in medicines:
+                medicine.treatment = treatment
+            Medicine.objects.bulk_create(medicines)
+            dose_schedule.regenerate(treatment)
+
         return treatment
-    
+
     def update(self, instance, validated_data):
         medicines_data = validated_data.pop('medicines', None)
-        if medicines_data is not None:
-            instance.medicines.all().delete()
-            for i, med_data in enumerate(medicines_data):
-                try:
-                    medicine_serializer = MedicineSerializer(data=med_data)
-                    if medicine_serializer.is_valid(raise_exception=True):
-                        medicine_serializer.save(treatment=instance)
-                except serializers.ValidationError as e:
-                    raise serializers.ValidationError({
-                        'medicines': f'Medicine {i+1} validation failed: {e.detail}'
-                    })
-        
-        return super().update(instance, validated_data)
+        with transaction.atomic(), deferred_tracking_refresh():
+            if medicines_data is not None:
+                self._sync_medicines(instance, medicines_data)
+            instance = super().update(instance, validated_data)
+            if medicines_data is not None or {'treatment_date', 'status'} & validated_data.keys():
+                dose_schedule.regenerate(instance)
+        return instance
+
+    @staticmethod
+    def _build_medicine(med_data, **extra):
+        med_data = {key: value for key, value in med_data.items() if key != 'id'}
+        return Medicine(**med_data, **extra)
+
+    def _sync_medicines(self, instance, medicines_data):
+        """
+        Bring ``instance.medicines`` in line with ``medicines_data``: entries with
+        an ``id`` update that medicine (only if a field changed), entries without
+        one are created, and medicines left out are deleted. At most one query per
+        kind of write, however many medicines the treatment has.
+        """
+        existing = {medicine.pk: medicine for medicine in Medicine.objects.filter(treatment=instance)}
+        to_create, to_update, changed_fields, kept = [], [], set(), set()
+
+        for i, med_data in enumerate(medicines_data):
+            pk = med_data.get('id')
+            if pk is None:
+                to_create.append(self._build_medicine(med_data, treatment=instance))
+                continue
+            medicine = existing.get(pk)
+            if medicine is None or pk in kept:
+                raise serializers.ValidationError({
+                    'medicines': f'Medicine {i+1}: id {pk} is not a medicine of this treatment'
+                })
+            kept.add(pk)
+            changed = [
+                field for field, value in med_data.items()
+                if field != 'id' and getattr(medicine, field) != value
+            ]
+            for field in changed:
+                setattr(medicine, field, med_data[field])
+            if changed:
+                changed_fields.update(changed)
+                to_update.append(medicine)
+
+        removed = set(existing) - kept
+        if removed:
+            Medicine.objects.filter(pk__in=removed).delete()
+        if to_update:
+            Medicine.objects.bulk_update(to_update, sorted(changed_fields))
+        if to_create:
+            Medicine.objects.bulk_create(to_create)
+
+        # The response re-serializes this instance; drop the stale prefetch
+        getattr(instance, '_prefetched_objects_cache', {}).pop('medicines', None)
+
+
+class MedicineDoseSerializer(serializers.ModelSerializer):
+    medicine_name = serializers.CharField(source='medicine.name', read_only=True)
+    dosage = serializers.CharField(source='medicine.dosage', read_only=True)
+    treatment_name = serializers.CharField(source='treatment.treatment_name', read_only=True)
+    livestock_tag = serializers.CharField(source='treatment.livestock.tag_id', read_only=True)
+    is_given = serializers.ReadOnlyField()
+
+    class Meta:
+        model = MedicineDose
+        fields = [
+            'id', 'treatment', 'medicine', 'medicine_name', 'dosage', 'treatment_name',
+            'livestock_tag', 'scheduled_at', 'given_at', 'is_given'
+        ]
+        read_only_fields = fields
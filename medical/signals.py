@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Medicine, Treatment
+
+# Treatment ids waiting for a tracking window refresh inside deferred_tracking_refresh()
+_pending_refresh = ContextVar('pending_tracking_refresh', default=None)
+
+
+@contextmanager
+def deferred_tracking_refresh():
+    """
+    Collect the treatments touched by medicine saves/deletes in the block and
+    refresh their tracking windows once on exit, instead of once per medicine.
+    """
+    pending = set()
+    token = _pending_refresh.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_refresh.reset(token)
+    if pending:
+        Treatment.refresh_tracking_end_dates(pending)
+
+
+@receiver(post_save, sender=Medicine)
+@receiver(post_delete, sender=Medicine)
+def refresh_tracking_end_date(sender, instance, **kwargs):
+    """A medicine course was added, changed or removed: move the treatment's tracking window."""
+    pending = _pending_refresh.get()
+    if pending is not None:
+        pending.add(instance.treatment_id)
+    else:
+        Treatment.refresh_tracking_end_dates([instance.treatment_id])
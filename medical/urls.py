@@ -1,10 +1,11 @@
 # medical/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TreatmentViewSet
+from .views import MedicineDoseViewSet, TreatmentViewSet
 
 router = DefaultRouter()
 router.register(r'treatments', TreatmentViewSet, basename='treatment')
+router.register(r'doses', MedicineDoseViewSet, basename='medicine-dose')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -5,11 +5,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, BasePermission
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count
+from django.db.models import Case, CharField, Count, Q, Value, When
 from django.utils import timezone
 from datetime import timedelta
-from .models import Treatment
-from .serializers import TreatmentSerializer
+from backend.aggregates import breakdown
+from .models import MedicineDose, Treatment
+from .serializers import MedicineDoseSerializer, TreatmentSerializer
 
 class TreatmentPermission(BasePermission):
     """
@@ -53,63 +54,26 @@ class TreatmentViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         # Handle medicines JSON string from FormData
         import json
-        from rest_framework.request import Request
         from django.http import QueryDict
-        
-        print(f"\n{'='*60}")
-        print(f"[TreatmentViewSet.create] ========== START ==========")
-        print(f"[TreatmentViewSet.create] request.data type: {type(request.data)}")
-        print(f"[TreatmentViewSet.create] request.data keys: {request.data.keys() if hasattr(request.data, 'keys') else 'N/A'}")
-        
+
         # Create a mutable copy of request data
         if isinstance(request.data, QueryDict):
             data = request.data.dict()
         else:
             data = dict(request.data)
-        
-        print(f"[TreatmentViewSet.create] data type after conversion: {type(data)}")
-        print(f"[TreatmentViewSet.create] 'medicines' in data: {'medicines' in data}")
-        
-        if 'medicines' in data:
-            print(f"[TreatmentViewSet.create] medicines type: {type(data['medicines'])}")
-            print(f"[TreatmentViewSet.create] medicines value (first 200 chars): {str(data['medicines'])[:200]}")
-        
+
         # Parse medicines if it's a JSON string
         if 'medicines' in data and isinstance(data['medicines'], str):
             try:
-                parsed = json.loads(data['medicines'])
-                print(f"[TreatmentViewSet.create] Parsed medicines type: {type(parsed)}")
-                print(f"[TreatmentViewSet.create] Parsed medicines length: {len(parsed) if isinstance(parsed, list) else 'N/A'}")
-                print(f"[TreatmentViewSet.create] Parsed medicines: {parsed}")
-                data['medicines'] = parsed
-            except json.JSONDecodeError as e:
-                print(f"[TreatmentViewSet.create] JSON decode error: {e}")
+                data['medicines'] = json.loads(data['medicines'])
+            except json.JSONDecodeError:
                 return Response(
                     {'medicines': ['Invalid JSON format']},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        
-        print(f"[TreatmentViewSet.create] Final data['medicines'] type: {type(data.get('medicines'))}")
-        print(f"[TreatmentViewSet.create] Final data['medicines']: {data.get('medicines')}")
-        print(f"{'='*60}\n")
-        
+
         serializer = self.get_serializer(data=data)
-        
-        print(f"[TreatmentViewSet.create] Before is_valid()")
-        print(f"[TreatmentViewSet.create] serializer.initial_data type: {type(serializer.initial_data)}")
-        print(f"[TreatmentViewSet.create] 'medicines' in serializer.initial_data: {'medicines' in serializer.initial_data}")
-        if 'medicines' in serializer.initial_data:
-            print(f"[TreatmentViewSet.create] serializer.initial_data['medicines']: {serializer.initial_data['medicines']}")
-        
         serializer.is_valid(raise_exception=True)
-        
-        print(f"[TreatmentViewSet.create] After is_valid()")
-        print(f"[TreatmentViewSet.create] 'medicines' in validated_data: {'medicines' in serializer.validated_data}")
-        if 'medicines' in serializer.validated_data:
-            print(f"[TreatmentViewSet.create] validated_data['medicines']: {serializer.validated_data['medicines']}")
-        else:
-            print(f"[TreatmentViewSet.create] ⚠️⚠️⚠️ NO 'medicines' IN validated_data! ⚠️⚠️⚠️")
-        
         self.perform_create(serializer)
         
         # Re-serialize the instance to include the medicines that were just created
@@ -152,47 +116,104 @@ class TreatmentViewSet(viewsets.ModelViewSet):
     def counts(self, request):
         """AlertNotifications.jsx + MonitorDeadlines.jsx"""
         today = timezone.now().date()
-        queryset = self.get_queryset()
-        
-        overdue = queryset.filter(next_treatment_date__lt=today).count()
-        due_today = queryset.filter(next_treatment_date=today).count()
-        due_soon = queryset.filter(
-            next_treatment_date__gt=today,
-            next_treatment_date__lte=today + timedelta(days=7)
-        ).count()
-        on_track = queryset.filter(next_treatment_date__gt=today + timedelta(days=7)).count()
         
-        return Response({
-            'overdue': overdue,
-            'due_today': due_today,
-            'due_soon': due_soon,
-            'on_track': on_track,
-            'total': queryset.count()
-        })
+        return Response(breakdown(self.get_queryset(), {
+            'overdue': Q(next_treatment_date__lt=today),
+            'due_today': Q(next_treatment_date=today),
+            'due_soon': Q(next_treatment_date__gt=today, next_treatment_date__lte=today + timedelta(days=7)),
+            'on_track': Q(next_treatment_date__gt=today + timedelta(days=7)),
+            'total': None,
+        }))
     
+    ALERT_BUCKETS = ('overdue', 'today', 'day_1', 'day_3', 'day_7')
+
     @action(detail=False, methods=['get'])
     def alerts(self, request):
         """AlertNotifications.jsx - categorized by days"""
         today = timezone.now().date()
-        queryset = self.get_queryset().filter(next_treatment_date__isnull=False)
-        
-        alerts = {
-            'overdue': queryset.filter(next_treatment_date__lt=today),
-            'today': queryset.filter(next_treatment_date=today),
-            'day_1': queryset.filter(next_treatment_date=today + timedelta(days=1)),
-            'day_3': queryset.filter(next_treatment_date=today + timedelta(days=3)),
-            'day_7': queryset.filter(next_treatment_date=today + timedelta(days=7)),
-        }
-        
-        result = {}
-        for key, qs in alerts.items():
-            result[key] = self.get_serializer(qs, many=True).data
-        
+        bucket = Case(
+            When(next_treatment_date__lt=today, then=Value('overdue')),
+            When(next_treatment_date=today, then=Value('today')),
+            When(next_treatment_date=today + timedelta(days=1), then=Value('day_1')),
+            When(next_treatment_date=today + timedelta(days=3), then=Value('day_3')),
+            When(next_treatment_date=today + timedelta(days=7), then=Value('day_7')),
+            default=None,
+            output_field=CharField(),
+        )
+        # One query for every bucket; rows outside them are dropped in SQL
+        queryset = (
+            self.get_queryset()
+            .filter(next_treatment_date__isnull=False)
+            .annotate(alert_bucket=bucket)
+            .filter(alert_bucket__isnull=False)
+        )
+
+        result = {key: [] for key in self.ALERT_BUCKETS}
+        treatments = list(queryset)
+        for treatment, data in zip(treatments, self.get_serializer(treatments, many=True).data):
+            result[treatment.alert_bucket].append(data)
+
         return Response(result)
-    
+
     @action(detail=False, methods=['get'])
     def active_tracking(self, request):
         """ViewTreatmentHistory.jsx Medicine Tracking tab"""
         return Response(self.get_serializer(
-            self.get_queryset().filter(is_active_tracking=True), many=True
+            self.get_queryset().filter(Treatment.tracking_window_q()), many=True
         ).data)
+
+
+class MedicineDoseViewSet(viewsets.ReadOnlyModelViewSet):
+    """Dose timeline of the user's treatments (built by medical.dose_schedule)"""
+    serializer_class = MedicineDoseSerializer
+    permission_classes = [IsAuthenticated]
+    MAX_HOURS = 168
+
+    def get_queryset(self):
+        return MedicineDose.objects.filter(
+            treatment__user=self.request.user
+        ).select_related('medicine', 'treatment', 'treatment__livestock')
+
+    @action(detail=False, methods=['get'])
+    def due(self, request):
+        """
+        Doses due from the start of today to ``hours`` (default 24) from now
+        across the whole herd, so doses missed earlier today stay listed
+        """
+        try:
+            hours = int(request.query_params.get('hours', 24))
+        except (TypeError, ValueError):
+            hours = 0
+        if not 1 <= hours <= self.MAX_HOURS:
+            return Response(
+                {'error': f'hours must be between 1 and {self.MAX_HOURS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.now()
+        start_of_today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        queryset = self.get_queryset().filter(
+            treatment__status='In Progress',
+            scheduled_at__gte=start_of_today,
+            scheduled_at__lt=now + timedelta(hours=hours),
+        )
+        if request.query_params.get('include_given', '').lower() not in ('1', 'true', 'yes'):
+            queryset = queryset.filter(given_at__isnull=True)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def mark_given(self, request):
+        """Mark a batch of doses as given: {"ids": [..]}; one UPDATE"""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            return Response({'error': 'ids must be a non-empty list of dose ids'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        updated = MedicineDose.objects.filter(
+            pk__in=ids, treatment__user=request.user, given_at__isnull=True
+        ).update(given_at=timezone.now())
+        return Response({'updated': updated})
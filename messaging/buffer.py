@@ -0,0 +1,513 @@
+"""
+Write-behind for chat messages, used by ChatConsumer while CHAT_WRITE_BEHIND
+is on.
+
+Without it every message is inserted before it is broadcast. With it a
+message is
+
+  1. given its id up front, from a block of CHAT_ID_BLOCK ids reserved from
+     the Message table's own sequence (one query per block);
+  2. appended to this process's recovery log, a JSON line written from a
+     worker thread (never on the event loop) and flushed to the OS;
+  3. broadcast to the room straight away;
+  4. inserted with the rest of its batch by a flusher thread: one
+     bulk_create plus the unread counters, every CHAT_FLUSH_INTERVAL_MS or as
+     soon as CHAT_FLUSH_BATCH messages are waiting.
+
+Each batch is logged to its own segment file, deleted once the batch has
+committed. So a message that was broadcast is always either in Message or in
+a segment. Segments left by a process that died are replayed by
+``recover()``, which runs when a process starts buffering and from
+``python manage.py recover_chat_log``. Ids are fixed before the insert, so a
+replay skips whatever already made it in.
+
+Flushed to the OS is enough to survive the process crashing, not the
+machine: with CHAT_RECOVERY_FSYNC off (the default) a power loss or kernel
+crash can lose the last messages that were already broadcast. Turn it on to
+fsync every line, at the cost of a disk sync per message.
+
+A batch the database refuses is retried one message at a time. Messages that
+still fail for a reason other than a lost connection (bad data) are moved to
+the ``dead/`` directory of the log, so they no longer hold back the rest;
+they can be fixed by hand and moved back for ``recover()`` to replay.
+
+A consumer flushes on disconnect, and the buffer is flushed and stopped at
+interpreter exit.
+"""
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+from collections import Counter, deque
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: segment owners are then judged by pid only
+    fcntl = None
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import (
+    InterfaceError, NotSupportedError, OperationalError, close_old_connections, connection, connections,
+    transaction,
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_VENDORS = ('postgresql', 'sqlite')
+CHUNK = 1000
+DEAD_LETTER_DIR = 'dead'
+# Worth retrying as they are; anything else is a problem with the message
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+
+def reserve_ids(count):
+    """``count`` new Message ids that no other insert will be given."""
+    table = Message._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [table, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+        if connection.vendor == 'sqlite':
+            # AUTOINCREMENT never hands out an id at or below sqlite_sequence.seq
+            with transaction.atomic():
+                cursor.execute("UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s", [count, table])
+                if cursor.rowcount:
+                    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+                    last = cursor.fetchone()[0]
+                else:
+                    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {connection.ops.quote_name(table)}")
+                    last = cursor.fetchone()[0] + count
+                    cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, last])
+            return list(range(last - count + 1, last + 1))
+
+    raise NotSupportedError(f"Chat write-behind cannot reserve ids on {connection.vendor}")
+
+
+class IdAllocator:
+    """Message ids reserved a block at a time, handed out without a query."""
+
+    def __init__(self, block):
+        self.block = block
+        self._ids = deque()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """The next reserved id, or None when the block is used up."""
+        with self._lock:
+            return self._ids.popleft() if self._ids else None
+
+    def refill(self):
+        ids = reserve_ids(self.block)
+        with self._lock:
+            self._ids.extend(ids)
+
+    def next(self):
+        message_id = self.take()
+        while message_id is None:
+            self.refill()
+            message_id = self.take()
+        return message_id
+
+
+def persist(records):
+    """
+    Insert the logged messages that are not in Message yet and count them as
+    unread for their receivers. Messages whose conversation was deleted in
+    the meantime are dropped. Returns the number inserted.
+    """
+    from friends.models import Friendship
+    from notifications.unread import adjust_messages
+
+    with transaction.atomic():
+        existing = set(
+            Message.objects.filter(id__in=[r['id'] for r in records]).values_list('id', flat=True)
+        )
+        participants = {
+            friendship_id: (user1_id, user2_id)
+            for friendship_id, user1_id, user2_id in Friendship.objects.filter(
+                id__in={r['friendship'] for r in records},
+            ).values_list('id', 'user1_id', 'user2_id')
+        }
+        new = [r for r in records if r['id'] not in existing and r['friendship'] in participants]
+        orphaned = sum(1 for r in records if r['friendship'] not in participants)
+        if orphaned:
+            logger.warning("Chat write-behind dropped %s message(s) of deleted conversations", orphaned)
+
+        Message.objects.bulk_create([
+            Message(
+                id=r['id'], friendship_id=r['friendship'], sender_id=r['sender'], text=r['text'],
+                message_type=r['message_type'], created_at=parse_datetime(r['created_at']),
+            )
+            for r in new
+        ], batch_size=500)
+
+        unread = Counter()
+        for r in new:
+            user1_id, user2_id = participants[r['friendship']]
+            unread[(user2_id if r['sender'] == user1_id else user1_id, r['friendship'])] += 1
+        for (user_id, friendship_id), n in unread.items():
+            adjust_messages(user_id, friendship_id, n)
+    return len(new)
+
+
+def _persist_each(records):
+    """
+    ``persist()`` one message at a time, after their batch failed. Returns
+    ``(inserted, rejected)``, the rejected being the records the database
+    refused. Transient errors are raised, since they would fail every record.
+    """
+    inserted, rejected = 0, []
+    for record in records:
+        try:
+            inserted += persist([record])
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Chat write-behind could not insert a message: %s", exc)
+            rejected.append(record)
+    return inserted, rejected
+
+
+def _dead_letter(log_dir, name, records):
+    """Append ``records`` to the dead-letter file ``name``, out of recover()'s way."""
+    path = Path(log_dir) / DEAD_LETTER_DIR / name
+    path.parent.mkdir(exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.writelines(json.dumps(r) + '\n' for r in records)
+        f.flush()
+        os.fsync(f.fileno())
+    logger.error("Chat write-behind set aside %s message(s) it could not insert in %s", len(records), path)
+
+
+def persist_or_set_aside(records, log_dir, name):
+    """``persist()``, falling back to one message at a time and dead-lettering the rejects."""
+    try:
+        return persist(records)
+    except TRANSIENT_ERRORS:
+        raise
+    except Exception:  # noqa: BLE001
+        logger.exception("Chat write-behind could not insert %s message(s); trying one by one", len(records))
+    inserted, rejected = _persist_each(records)
+    if rejected:
+        _dead_letter(log_dir, name, rejected)
+    return inserted
+
+
+# Recovery log segments are named <host>-<pid>-<number>.jsonl. While a
+# process buffers it holds an exclusive flock on <host>-<pid>.lock in the same
+# directory, released by the kernel when the process dies, so any process that
+# can see the directory can tell whether the writer is gone, even one on a
+# new host after a container was replaced. A segment being replayed is renamed
+# to .recovering and kept locked by the replaying process.
+
+def _segment_owner(path):
+    host, pid, _ = path.stem.rsplit('-', 2)
+    return host, int(pid)
+
+
+def _lock_path(log_dir, host, pid):
+    return Path(log_dir) / f"{host}-{pid}.lock"
+
+
+def _try_lock(f):
+    """Take an exclusive flock on ``f`` without waiting. True if it was free."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _owner_alive(path):
+    host, pid = _segment_owner(path)
+    lock = _lock_path(path.parent, host, pid)
+    if fcntl is not None and lock.exists():
+        try:
+            with open(lock, 'a') as f:
+                return not _try_lock(f)
+        except FileNotFoundError:
+            pass
+    # No lock file (or no flock here): only this host's pids can be checked
+    if host != socket.gethostname():
+        return True  # not ours to judge
+    if pid == os.getpid():
+        return False  # left by an earlier process that had our pid
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _claim(path):
+    """
+    Take a segment for replay: rename it to .recovering (so one process wins
+    a race for it) and lock it. Returns the open, locked file, or None if
+    another process got there first.
+    """
+    if path.suffix == '.jsonl':
+        claimed = path.with_suffix('.recovering')
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        path = claimed
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    if not _try_lock(f):
+        f.close()  # being replayed by a live process
+        return None
+    return f
+
+
+def read_segment(path, f=None):
+    records = []
+    text = f.read() if f is not None else path.read_text()
+    for line in text.splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # Torn write: the process died before that message was broadcast
+            logger.warning("Skipping a partial line in %s", path)
+    return records
+
+
+def recover(log_dir=None):
+    """
+    Write the messages of segments whose process is gone, then delete the
+    segments. Messages the database refuses are dead-lettered. Safe to run
+    from several processes at once. Returns ``{'segments': n, 'messages': n}``.
+    """
+    log_dir = Path(log_dir or settings.CHAT_RECOVERY_LOG_DIR)
+    report = {'segments': 0, 'messages': 0}
+    if not log_dir.is_dir():
+        return report
+    # .recovering: claimed by a replay whose process died half way
+    paths = [p for p in log_dir.glob('*.jsonl') if not _owner_alive(p)] + list(log_dir.glob('*.recovering'))
+    for path in sorted(paths):
+        f = _claim(path)
+        if f is None:
+            continue
+        with f:
+            claimed = Path(f.name)
+            records = read_segment(claimed, f)
+            for start in range(0, len(records), CHUNK):
+                report['messages'] += persist_or_set_aside(
+                    records[start:start + CHUNK], log_dir, claimed.with_suffix('.jsonl').name,
+                )
+            claimed.unlink(missing_ok=True)
+        report['segments'] += 1
+    if report['segments']:
+        logger.warning("Recovered %s chat message(s) from %s segment(s)", report['messages'], report['segments'])
+    return report
+
+
+class MessageBuffer:
+    """
+    Messages broadcast but not inserted yet, with their recovery log. The
+    flusher thread is started by ``start()``; without it ``flush()`` writes
+    inline.
+    """
+
+    def __init__(self, log_dir=None, interval_ms=None, batch_size=None, id_block=None, fsync=None):
+        self.log_dir = Path(log_dir or settings.CHAT_RECOVERY_LOG_DIR)
+        self.interval = (interval_ms or settings.CHAT_FLUSH_INTERVAL_MS) / 1000
+        self.batch_size = batch_size or settings.CHAT_FLUSH_BATCH
+        self.fsync = settings.CHAT_RECOVERY_FSYNC if fsync is None else fsync
+        self.allocator = IdAllocator(id_block or settings.CHAT_ID_BLOCK)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        # Held while this buffer lives; tells recover() elsewhere we are alive
+        self._lock_file = open(_lock_path(self.log_dir, socket.gethostname(), os.getpid()), 'a')
+        _try_lock(self._lock_file)
+
+        self._cond = threading.Condition()
+        self._pending = []    # records in the open segment
+        self._retry = []      # records of batches whose insert failed
+        self._segment = None  # open segment file
+        self._closed_segments = []
+        self._segment_number = 0
+        self._added = 0
+        self._persisted = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = None
+
+    def _open_segment(self):
+        self._segment_number += 1
+        name = f"{socket.gethostname()}-{os.getpid()}-{self._segment_number:06d}.jsonl"
+        self._segment = open(self.log_dir / name, 'a', encoding='utf-8')
+
+    def add(self, friendship, sender, text, message_type, message_id=None):
+        """
+        Log and queue one message. Returns the unsaved Message, id and
+        created_at set, ready to broadcast.
+        """
+        message = Message(
+            id=message_id or self.allocator.next(), friendship_id=friendship.id, sender_id=sender.id,
+            text=text, message_type=message_type, created_at=timezone.now(),
+        )
+        record = {
+            'id': message.id, 'friendship': message.friendship_id, 'sender': message.sender_id,
+            'text': message.text, 'message_type': message.message_type,
+            'created_at': message.created_at.isoformat(),
+        }
+        line = json.dumps(record) + '\n'
+        with self._cond:
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(line)
+            self._segment.flush()
+            if self.fsync:
+                os.fsync(self._segment.fileno())
+            self._pending.append(record)
+            self._added += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return message
+
+    async def aadd(self, friendship, sender, text, message_type):
+        """
+        ``add()`` for consumers. A block refill goes to the database thread
+        and the log write to a worker thread, so the event loop never waits
+        on the disk.
+        """
+        message_id = self.allocator.take()
+        while message_id is None:
+            await database_sync_to_async(self.allocator.refill)()
+            message_id = self.allocator.take()
+        return await sync_to_async(self.add, thread_sensitive=False)(
+            friendship, sender, text, message_type, message_id=message_id,
+        )
+
+    def _flush_once(self):
+        """
+        Insert everything queued so far. Returns False if the database could
+        not be reached (the batch is kept for a retry); refused messages are
+        dead-lettered.
+        """
+        with self._cond:
+            self._flush_requested = False
+            batch, self._retry, self._pending = self._retry + self._pending, [], []
+            if self._segment is not None:
+                self._segment.close()
+                self._closed_segments.append(Path(self._segment.name))
+                self._segment = None
+            segments, self._closed_segments = self._closed_segments, []
+            upto = self._added
+
+        if batch:
+            try:
+                persist_or_set_aside(batch, self.log_dir, f"{socket.gethostname()}-{os.getpid()}.jsonl")
+            except Exception:  # noqa: BLE001
+                logger.exception("Chat write-behind could not insert %s message(s); retrying", len(batch))
+                with self._cond:
+                    self._retry = batch + self._retry
+                    self._closed_segments = segments + self._closed_segments
+                return False
+
+        for path in segments:
+            path.unlink(missing_ok=True)
+        with self._cond:
+            self._persisted = max(self._persisted, upto)
+            self._cond.notify_all()
+        return True
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: self._stopping or self._flush_requested or len(self._pending) >= self.batch_size,
+                        timeout=self.interval,
+                    )
+                    stopping = self._stopping
+                close_old_connections()
+                self._flush_once()
+                if stopping:
+                    return
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='chat-write-behind', daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout=None):
+        """
+        Block until every message added so far has been inserted. Returns
+        False if that did not happen within ``timeout`` seconds; the messages
+        stay queued and logged.
+        """
+        if self._thread is None:
+            return self._flush_once()
+        with self._cond:
+            target = self._added
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._persisted >= target, timeout)
+
+    def close(self, timeout=10):
+        """Flush, stop the flusher thread and release the log lock."""
+        if self._thread is None:
+            self._flush_once()
+        else:
+            with self._cond:
+                self._stopping = True
+                self._cond.notify_all()
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return  # still writing; the lock goes when the process exits
+        with self._cond:
+            leftover = self._pending or self._retry or self._closed_segments
+        if not leftover:
+            Path(self._lock_file.name).unlink(missing_ok=True)
+        # Left in place otherwise, unlocked, so recover() knows we are gone
+        self._lock_file.close()
+
+
+# One buffer per process, started on first use
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_unsupported = False
+
+
+def get_buffer():
+    """
+    This process's MessageBuffer, or None when write-behind is off or the
+    database cannot reserve ids. The first call replays segments left by dead
+    processes, so call it from synchronous code.
+    """
+    global _buffer, _unsupported
+    if not settings.CHAT_WRITE_BEHIND or _unsupported:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            if connection.vendor not in SUPPORTED_VENDORS:
+                logger.warning("CHAT_WRITE_BEHIND is not supported on %s; inserting messages directly", connection.vendor)
+                _unsupported = True
+                return None
+            recover()
+            _buffer = MessageBuffer()
+            _buffer.start()
+            atexit.register(_buffer.close)
+    return _buffer
@@ -1,11 +1,124 @@
 import json
+import logging
+
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
 from django.db.models import Q
 
+logger = logging.getLogger(__name__)
+
+# How long a closing socket waits for its buffered messages to be inserted
+DISCONNECT_FLUSH_TIMEOUT = 5
+
+
+def chat_group(friendship_id):
+    """Channel-layer group every socket open on a conversation belongs to."""
+    return f'chat_{friendship_id}'
+
+
+class ChatMessagesMixin:
+    """
+    Membership checks and message saving for consumers that carry chat:
+    ChatConsumer (one conversation per socket) and the multiplexed
+    notifications.consumers.ClientConsumer (any number of them).
+
+    Membership is checked once with the async ORM and the friendship's
+    participants are kept for the life of the subscription, so sending a
+    message costs a single trip to the database thread: the INSERT and the
+    receiver's unread counter, in one transaction.
+
+    With CHAT_WRITE_BEHIND on, messages go through messaging.buffer instead:
+    broadcast first, inserted in batches, and flushed when the socket closes.
+    """
+
+    buffer = None
+    buffered = False
+
+    async def find_friendship(self, user, friendship_id):
+        """The friendship if ``user`` is one of its participants, else None."""
+        from friends.models import Friendship
+
+        return await Friendship.objects.filter(
+            Q(id=friendship_id) & (Q(user1=user) | Q(user2=user))
+        ).only('id', 'user1_id', 'user2_id').afirst()
+
+    async def use_write_behind(self):
+        if settings.CHAT_WRITE_BEHIND and self.buffer is None:
+            from .buffer import get_buffer
+            self.buffer = await database_sync_to_async(get_buffer)()
+
+    async def flush_buffered(self):
+        if self.buffered:
+            # Waits on the flusher thread, so keep it off the database thread
+            if not await sync_to_async(self.buffer.flush, thread_sensitive=False)(DISCONNECT_FLUSH_TIMEOUT):
+                logger.warning("[ChatConsumer] Messages from %s still buffered at disconnect", self.channel_name)
+
+    async def save_chat_message(self, friendship, user, text, message_type):
+        """Store one message. Returns the payload to broadcast, or None if it was not stored."""
+        from .models import Message
+
+        # Taken from the client frame: anything else would be stored as is, or
+        # fail the insert (with write-behind, the whole batch)
+        if message_type not in dict(Message.MESSAGE_TYPES):
+            message_type = 'text'
+        if self.buffer is not None:
+            try:
+                message = await self.buffer.aadd(friendship, user, text, message_type)
+            except Exception as e:  # noqa: BLE001
+                # Not logged, so not broadcast either
+                logger.warning("[ChatConsumer] Could not buffer message in conversation %s: %s", friendship.id, e)
+                return None
+            self.buffered = True
+            return self.message_payload(message, user)
+        return await self.insert_message(friendship, user, text, message_type)
+
+    @staticmethod
+    def message_payload(message, user):
+        return {
+            'id': message.id,
+            'friendship': message.friendship_id,
+            'sender': message.sender_id,
+            'sender_username': user.username,
+            'sender_full_name': getattr(user, 'full_name', '') or user.username,
+            'text': message.text,
+            'message_type': message.message_type,
+            'created_at': message.created_at.isoformat(),
+            'is_read': message.is_read,
+        }
+
+    @database_sync_to_async
+    def insert_message(self, friendship, user, text, message_type):
+        # Still a sync hop: the ORM has no async transactions, and the message
+        # must commit together with the receiver's unread counter.
+        from notifications.unread import adjust_messages, message_recipient_id
+        from .models import Message
+        try:
+            with transaction.atomic():
+                message = Message.objects.create(
+                    friendship_id=friendship.id,
+                    sender=user,
+                    text=text,
+                    message_type=message_type,
+                )
+                adjust_messages(message_recipient_id(friendship, user.id), friendship.id, 1)
+            return self.message_payload(message, user)
+        except Exception as e:  # noqa: BLE001
+            # e.g. the friendship was removed while the socket was open
+            logger.warning("[ChatConsumer] Error saving message in conversation %s: %s", friendship.id, e)
+            return None
+
+
+class ChatConsumer(ChatMessagesMixin, AsyncWebsocketConsumer):
+    """
+    One chat socket per open conversation (``ws/chat/<friendship_id>/``).
+    The web client uses the multiplexed ``ws/client/`` socket instead; this
+    one stays for clients that have not moved over.
+    """
 
-class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         user = self.scope.get('user')
         if not user or isinstance(user, AnonymousUser) or not user.is_authenticated:
@@ -13,18 +126,21 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return
 
         self.friendship_id = self.scope['url_route']['kwargs']['friendship_id']
-        self.room_group_name = f'chat_{self.friendship_id}'
+        self.room_group_name = chat_group(self.friendship_id)
 
-        if not await self.user_in_friendship(user, self.friendship_id):
+        self.friendship = await self.find_friendship(user, self.friendship_id)
+        if self.friendship is None:
             await self.close()
             return
 
+        await self.use_write_behind()
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        await self.flush_buffered()
 
     async def receive(self, text_data):
         user = self.scope.get('user')
@@ -42,7 +158,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not message_text:
             return
 
-        message_data = await self.save_message(user, self.friendship_id, message_text, message_type)
+        message_data = await self.save_message(user, message_text, message_type)
         if not message_data:
             return
 
@@ -57,38 +173,5 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def chat_message(self, event):
         await self.send(text_data=json.dumps(event['message']))
 
-    @database_sync_to_async
-    def user_in_friendship(self, user, friendship_id):
-        from friends.models import Friendship
-        return Friendship.objects.filter(
-            Q(id=friendship_id) & (Q(user1=user) | Q(user2=user))
-        ).exists()
-
-    @database_sync_to_async
-    def save_message(self, user, friendship_id, text, message_type):
-        from friends.models import Friendship
-        from .models import Message
-        try:
-            friendship = Friendship.objects.get(
-                Q(id=friendship_id) & (Q(user1=user) | Q(user2=user))
-            )
-            message = Message.objects.create(
-                friendship=friendship,
-                sender=user,
-                text=text,
-                message_type=message_type,
-            )
-            return {
-                'id': message.id,
-                'friendship': message.friendship_id,
-                'sender': message.sender_id,
-                'sender_username': user.username,
-                'sender_full_name': getattr(user, 'full_name', '') or user.username,
-                'text': message.text,
-                'message_type': message.message_type,
-                'created_at': message.created_at.isoformat(),
-                'is_read': message.is_read,
-            }
-        except Exception as e:
-            print(f'[ChatConsumer] Error saving message: {e}')
-            return None
+    async def save_message(self, user, text, message_type):
+        return await self.save_chat_message(self.friendship, user, text, message_type)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import tempfile
+import time
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from authentication.models import CustomUser
+from friends.models import Friendship
+from messaging.buffer import MessageBuffer
+from messaging.consumers import ChatConsumer
+
+
+class LegacyChatConsumer(ChatConsumer):
+    """
+    The consumer as it was before the async ORM rewrite, kept here as the
+    baseline: membership checked through database_sync_to_async on connect
+    and the friendship fetched again for every message.
+    """
+
+    async def connect(self):
+        user = self.scope['user']
+        self.friendship_id = self.scope['url_route']['kwargs']['friendship_id']
+        self.room_group_name = f'chat_{self.friendship_id}'
+        if not await self.user_in_friendship(user, self.friendship_id):
+            await self.close()
+            return
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+    @database_sync_to_async
+    def user_in_friendship(self, user, friendship_id):
+        return Friendship.objects.filter(
+            Q(id=friendship_id) & (Q(user1=user) | Q(user2=user))
+        ).exists()
+
+    @database_sync_to_async
+    def _load_friendship(self, user):
+        return Friendship.objects.get(
+            Q(id=self.friendship_id) & (Q(user1=user) | Q(user2=user))
+        )
+
+    async def save_message(self, user, text, message_type):
+        self.friendship = await self._load_friendship(user)
+        return await super().save_message(user, text, message_type)
+
+
+class BufferedChatConsumer(ChatConsumer):
+    """The consumer with write-behind on, whatever CHAT_WRITE_BEHIND says."""
+    buffer = None  # set by the command
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure chat messages per second through one consumer process, before '
+        '(LegacyChatConsumer) and after the async ORM rewrite, and with write-behind '
+        '(timed up to the final flush). Creates throwaway users and deletes them '
+        'afterwards; run against a development database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Messages sent per connection and variant')
+        parser.add_argument('--connections', type=int, default=4, help='Sockets sending at the same time')
+
+    def handle(self, *args, **options):
+        # Not in a rolled-back transaction: database_sync_to_async closes
+        # connections that are not in autocommit mode
+        users = [
+            CustomUser.objects.create_user(
+                username=f'bench_chat_{n}', email=f'bench_chat_{n}@example.com',
+                phone=f'97999999{n:02d}', full_name='Bench User', address='-',
+                role='farmer', password='bench-only',
+            )
+            for n in range(options['connections'] + 1)
+        ]
+        try:
+            friendships = [Friendship.objects.create(user1=users[0], user2=user) for user in users[1:]]
+            results = {}
+            with tempfile.TemporaryDirectory() as log_dir:
+                BufferedChatConsumer.buffer = MessageBuffer(log_dir=log_dir)
+                BufferedChatConsumer.buffer.start()
+                variants = (
+                    ('before', LegacyChatConsumer), ('after', ChatConsumer),
+                    ('write-behind', BufferedChatConsumer),
+                )
+                for name, consumer in variants:
+                    results[name] = async_to_sync(self._run)(
+                        consumer, friendships, options['messages'],
+                    )
+                    self.stdout.write(f"{name:>12}: {results[name]:8.1f} messages/s")
+                BufferedChatConsumer.buffer.close()
+        finally:
+            # Friendships, messages and counters go with the users
+            CustomUser.objects.filter(id__in=[user.id for user in users]).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['connections']} connections x {options['messages']} messages: "
+            f"after {results['after'] / results['before']:.2f}x, "
+            f"write-behind {results['write-behind'] / results['before']:.2f}x"
+        ))
+
+    async def _run(self, consumer, friendships, count):
+        communicators = []
+        for friendship in friendships:
+            communicator = WebsocketCommunicator(consumer.as_asgi(), f'/ws/chat/{friendship.id}/')
+            communicator.scope['user'] = friendship.user2
+            communicator.scope['url_route'] = {'kwargs': {'friendship_id': str(friendship.id)}}
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError(f'Could not connect to conversation {friendship.id}')
+            communicators.append(communicator)
+
+        async def chat(communicator):
+            for n in range(count):
+                await communicator.send_to(text_data=json.dumps({'text': f'message {n}'}))
+                await communicator.receive_from(timeout=10)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(chat(c) for c in communicators))
+        if consumer.buffer is not None:
+            await sync_to_async(consumer.buffer.flush, thread_sensitive=False)()
+        elapsed = time.perf_counter() - started
+        for communicator in communicators:
+            await communicator.disconnect()
+        return count * len(communicators) / elapsed
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from messaging.buffer import recover
+
+
+class Command(BaseCommand):
+    help = (
+        'Insert chat messages left in the write-behind recovery log by processes '
+        'that stopped before flushing them, on this host or another sharing the log '
+        'directory (safe to run at any time, from several processes at once)'
+    )
+
+    def handle(self, *args, **options):
+        report = recover()
+        self.stdout.write(self.style.SUCCESS(
+            f"Recovered {report['messages']} message(s) from {report['segments']} segment(s)"
+        ))
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_archive_table(apps, schema_editor):
+    """
+    On PostgreSQL the archive is range-partitioned by month on created_at;
+    monthly partitions are added by notifications.retention as rows arrive.
+    Elsewhere it is an ordinary table.
+    """
+    model = apps.get_model('messaging', 'MessageArchive')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+    sql, params = schema_editor.table_sql(model)
+    schema_editor.execute(f"{sql} PARTITION BY RANGE (created_at)", params or None)
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def drop_archive_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions with it
+    schema_editor.delete_model(apps.get_model('messaging', 'MessageArchive'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friends', '0001_initial'),
+        ('messaging', '0003_unread_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='MessageArchive',
+                    fields=[
+                        ('pk', models.CompositePrimaryKey('id', 'created_at', blank=True, editable=False, primary_key=True, serialize=False)),
+                        ('id', models.BigIntegerField()),
+                        ('text', models.TextField()),
+                        ('message_type', models.CharField(choices=[('text', 'Text'), ('appointment_card', 'Appointment Card')], default='text', max_length=20)),
+                        ('created_at', models.DateTimeField()),
+                        ('is_read', models.BooleanField(default=False)),
+                        ('friendship', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='friends.friendship')),
+                        ('sender', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'ordering': ['created_at'],
+                        'indexes': [models.Index(fields=['friendship', 'created_at'], name='messaging_m_friends_fd73bb_idx')],
+                    },
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_archive_table, drop_archive_table),
+            ],
+        ),
+    ]
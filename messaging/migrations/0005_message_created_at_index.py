@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('friends', '0001_initial'),
+        ('messaging', '0004_messagearchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['created_at'], name='messaging_m_created_d51bc4_idx'),
+        ),
+    ]
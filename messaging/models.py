@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from friends.models import Friendship
 
 User = get_user_model()
@@ -23,7 +24,9 @@ class Message(models.Model):
     )
     text = models.TextField()
     message_type = models.CharField(max_length=20, choices=MESSAGE_TYPES, default='text')
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: write-behind (messaging.buffer) stamps messages when
+    # they are sent and inserts them later
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     is_read = models.BooleanField(default=False)
     
     class Meta:
@@ -31,7 +34,73 @@ class Message(models.Model):
         indexes = [
             models.Index(fields=['friendship', 'created_at']),
             models.Index(fields=['sender', 'created_at']),
+            # Month ranges moved to MessageArchive (notifications.retention)
+            models.Index(fields=['created_at']),
         ]
     
     def __str__(self):
         return f"Message from {self.sender.username} at {self.created_at}"
+
+
+class MessageArchive(models.Model):
+    """
+    Chat messages older than MESSAGE_HOT_MONTHS, moved out of Message a
+    month at a time by notifications.retention so the live table and its
+    indexes stay small. Rows keep their original id. On PostgreSQL the table
+    is range-partitioned by month on created_at (see the migration), so
+    reads with a date range only touch the months they need and expired
+    months are dropped whole.
+    """
+    pk = models.CompositePrimaryKey('id', 'created_at')
+    id = models.BigIntegerField()
+    # No single-column FK indexes: (friendship, created_at) covers lookups
+    friendship = models.ForeignKey(
+        Friendship,
+        on_delete=models.CASCADE,
+        related_name='archived_messages',
+        db_index=False
+    )
+    sender = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    text = models.TextField()
+    message_type = models.CharField(max_length=20, choices=Message.MESSAGE_TYPES, default='text')
+    created_at = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['friendship', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Archived message {self.id} from {self.sender_id} at {self.created_at}"
+
+
+class ConversationUnread(models.Model):
+    """
+    Unread messages in one conversation for one participant; the per-user
+    total lives on notifications.UnreadCounter. Maintained by
+    notifications.unread.
+    """
+    friendship = models.ForeignKey(
+        Friendship,
+        on_delete=models.CASCADE,
+        related_name='unread_counters'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('friendship', 'user')
+
+    def __str__(self):
+        return f"{self.user_id} has {self.count} unread in conversation {self.friendship_id}"
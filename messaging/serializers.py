@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Message
+from .models import Message, MessageArchive
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -17,3 +17,14 @@ class MessageCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = ['friendship', 'text', 'message_type']
+
+
+class ArchivedMessageSerializer(serializers.ModelSerializer):
+    sender_username = serializers.CharField(source='sender.username', read_only=True)
+    sender_full_name = serializers.CharField(source='sender.full_name', read_only=True)
+
+    class Meta:
+        model = MessageArchive
+        fields = ['id', 'friendship', 'sender', 'sender_username', 'sender_full_name',
+                  'text', 'message_type', 'created_at', 'is_read']
+        read_only_fields = fields
@@ -0,0 +1,20 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ConversationUnread
+
+
+@receiver(post_delete, sender=ConversationUnread)
+def drop_conversation_from_total(sender, instance, **kwargs):
+    """
+    A conversation's counter goes away with its friendship (unfriending) or
+    in a rebuild; take its unread messages off the user's total with it.
+    """
+    from notifications.models import UnreadCounter
+
+    if instance.count:
+        UnreadCounter.objects.filter(user_id=instance.user_id).update(
+            messages=Greatest(F('messages') - instance.count, 0),
+        )
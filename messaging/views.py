@@ -2,15 +2,21 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.db.models import Q
-from .models import Message
-from .serializers import MessageSerializer, MessageCreateSerializer
+from django.utils.dateparse import parse_datetime
+from .models import Message, MessageArchive
+from .serializers import ArchivedMessageSerializer, MessageSerializer, MessageCreateSerializer
 from friends.models import Friendship
+from notifications.unread import (
+    adjust_messages, conversation_counts, get_unread, message_recipient_id,
+)
 
 
 class MessageViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = None  # Disable pagination for messages
+    ARCHIVE_PAGE_SIZE = 100
     
     def get_queryset(self):
         user = self.request.user
@@ -29,6 +35,25 @@ class MessageViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('created_at')
     
+    def perform_update(self, serializer):
+        message = serializer.instance
+        was_read = message.is_read
+        with transaction.atomic():
+            message = serializer.save()
+            if message.is_read != was_read:
+                adjust_messages(
+                    message_recipient_id(message.friendship, message.sender_id), message.friendship_id,
+                    -1 if message.is_read else 1,
+                )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            if not instance.is_read:
+                adjust_messages(
+                    message_recipient_id(instance.friendship, instance.sender_id), instance.friendship_id, -1,
+                )
+
     def get_serializer_class(self):
         if self.action == 'create':
             return MessageCreateSerializer
@@ -54,12 +79,14 @@ class MessageViewSet(viewsets.ModelViewSet):
             )
         
         # Create message
-        message = Message.objects.create(
-            friendship=friendship,
-            sender=request.user,
-            text=serializer.validated_data['text'],
-            message_type=serializer.validated_data.get('message_type', 'text')
-        )
+        with transaction.atomic():
+            message = Message.objects.create(
+                friendship=friendship,
+                sender=request.user,
+                text=serializer.validated_data['text'],
+                message_type=serializer.validated_data.get('message_type', 'text')
+            )
+            adjust_messages(message_recipient_id(friendship, request.user.id), friendship.id, 1)
         
         response_serializer = MessageSerializer(message)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -75,8 +102,11 @@ class MessageViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Conditional, so a second tab marking the same message counts once
+        with transaction.atomic():
+            if Message.objects.filter(pk=message.pk, is_read=False).update(is_read=True):
+                adjust_messages(request.user.id, message.friendship_id, -1)
         message.is_read = True
-        message.save()
         
         serializer = MessageSerializer(message)
         return Response(serializer.data)
@@ -103,27 +133,62 @@ class MessageViewSet(viewsets.ModelViewSet):
             )
         
         # Mark all messages from the other user as read
-        updated = Message.objects.filter(
-            friendship=friendship,
-            is_read=False
-        ).exclude(sender=request.user).update(is_read=True)
+        with transaction.atomic():
+            updated = Message.objects.filter(
+                friendship=friendship,
+                is_read=False
+            ).exclude(sender=request.user).update(is_read=True)
+            adjust_messages(request.user.id, friendship.id, -updated)
         
         return Response({'marked_read': updated})
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread messages for the current user"""
-        user = request.user
-        
-        # Get all friendships where user is involved
-        user_friendships = Friendship.objects.filter(
-            Q(user1=user) | Q(user2=user)
-        )
-        
-        # Count unread messages sent to this user
-        unread_count = Message.objects.filter(
-            friendship__in=user_friendships,
-            is_read=False
-        ).exclude(sender=user).count()
-        
-        return Response({'unread_count': unread_count})
+        """
+        Get count of unread messages for the current user: one row from the
+        counter table (live changes arrive as ``unread_count`` socket events).
+        ``?by_conversation=1`` adds the per-friendship counts.
+        """
+        data = {'unread_count': get_unread(request.user.id).messages}
+        if request.query_params.get('by_conversation'):
+            data['conversations'] = {
+                str(friendship_id): count
+                for friendship_id, count in conversation_counts(request.user.id).items()
+            }
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def archive(self, request):
+        """
+        Older history of one conversation, from the monthly message archive
+        (messages move there after MESSAGE_HOT_MONTHS, see
+        notifications.retention). Returns up to ARCHIVE_PAGE_SIZE messages
+        before ``before`` (ISO datetime, default: now), oldest first; pass
+        the first one's created_at as ``before`` to page further back.
+        """
+        friendship_id = request.query_params.get('friendship_id')
+        if not friendship_id:
+            return Response(
+                {'error': 'friendship_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not Friendship.objects.filter(
+            Q(id=friendship_id) & (Q(user1=request.user) | Q(user2=request.user))
+        ).exists():
+            return Response(
+                {'error': 'You are not part of this friendship'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        messages = MessageArchive.objects.filter(friendship_id=friendship_id).select_related('sender')
+        before = request.query_params.get('before')
+        if before:
+            before = parse_datetime(before)
+            if before is None:
+                return Response(
+                    {'error': 'before must be an ISO datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            messages = messages.filter(created_at__lt=before)
+        page = list(messages.order_by('-created_at')[:self.ARCHIVE_PAGE_SIZE])[::-1]
+        return Response(ArchivedMessageSerializer(page, many=True).data)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Notification
+from django.utils import timezone
+from .models import Broadcast, Notification, OutboxMessage, Reminder
 
 
 @admin.register(Notification)
@@ -21,3 +22,46 @@ class NotificationAdmin(admin.ModelAdmin):
             'fields': ('is_read', 'created_at', 'read_at')
         }),
     )
+
+
+@admin.register(Reminder)
+class ReminderAdmin(admin.ModelAdmin):
+    list_display = ['id', 'source', 'object_id', 'due_date', 'stage', 'recipient', 'sent_at']
+    list_filter = ['source', 'stage', 'due_date']
+    search_fields = ['recipient__username', 'recipient__email']
+    raw_id_fields = ['recipient', 'notification']
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ['id', 'channel', 'recipient', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['channel', 'status', 'priority']
+    search_fields = ['recipient', 'subject']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['requeue']
+
+    @admin.action(description='Requeue selected messages')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f'{updated} messages requeued.')
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ['id', 'title', 'audience', 'urgency', 'status', 'delivered', 'total', 'created_at']
+    list_filter = ['status', 'audience', 'urgency']
+    search_fields = ['title', 'message']
+    readonly_fields = ['total', 'delivered', 'last_recipient_id', 'error', 'created_at', 'updated_at', 'finished_at']
+    actions = ['resume']
+
+    @admin.action(description='Resume selected failed broadcasts')
+    def resume(self, request, queryset):
+        from .broadcast import start
+
+        ids = list(queryset.filter(status='failed').values_list('id', flat=True))
+        queryset.filter(id__in=ids).update(status='queued', error='')
+        for broadcast_id in ids:
+            start(broadcast_id)
+        self.message_user(request, f'{len(ids)} broadcasts resumed.')
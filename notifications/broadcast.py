@@ -0,0 +1,211 @@
+"""
+Admin broadcasts to every approved farmer and/or vet.
+
+The broadcast endpoint only records a Broadcast row and returns; the fan-out
+runs in the background:
+
+  1. recipients are read in id order, BROADCAST_CHUNK_SIZE ids at a time;
+  2. each chunk becomes Notification rows through one bulk_create, committed
+     together with the progress counters and the ``last_recipient_id``
+     cursor, so a run that dies part-way resumes without duplicates;
+  3. once every row is written, the live update goes out as one group_send
+     per role (``notifications_role_farmer`` / ``notifications_role_vet``),
+     groups every NotificationConsumer of an approved user joins on connect.
+
+The work is started on commit in a single-thread pool inside the web process
+while BROADCAST_INLINE_WORKER is on. ``python manage.py run_broadcasts``
+picks up anything queued, and runs whose heartbeat went stale (the process
+running them died), for deployments that keep the web workers lean.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Broadcast, Notification
+from .serializers import NotificationSerializer
+from .unread import adjust_notifications_many
+
+logger = logging.getLogger(__name__)
+
+AUDIENCE_ROLES = {
+    'all': ('farmer', 'vet'),
+    'farmers': ('farmer',),
+    'vets': ('vet',),
+}
+TITLE_PREFIXES = {
+    'urgent': '🚨 URGENT: ',
+    'important': '⚠️ Important: ',
+    'normal': '',
+}
+# A running broadcast whose heartbeat is older than this is taken over
+STALE_AFTER = timedelta(minutes=10)
+
+
+def role_group(role):
+    """Channel-layer group every connected user with ``role`` belongs to."""
+    return f'notifications_role_{role}'
+
+
+def recipients(audience, exclude_id=None):
+    """Approved users a broadcast to ``audience`` goes to."""
+    from authentication.models import CustomUser
+
+    qs = CustomUser.objects.filter(role__in=AUDIENCE_ROLES[audience], status='approved')
+    if exclude_id:
+        qs = qs.exclude(id=exclude_id)
+    return qs
+
+
+def queue_broadcast(sender, title, message, audience='all', urgency='normal', link=None):
+    """Record a broadcast and start the fan-out once the transaction commits."""
+    broadcast = Broadcast.objects.create(
+        sender=sender, title=f"{TITLE_PREFIXES[urgency]}{title}", message=message, link=link,
+        audience=audience, urgency=urgency,
+        total=recipients(audience, sender.pk if sender else None).count(),
+    )
+    transaction.on_commit(lambda: start(broadcast.pk))
+    return broadcast
+
+
+def _data(broadcast):
+    return {
+        'urgency': broadcast.urgency,
+        'audience': broadcast.audience,
+        'broadcast': True,
+        'broadcast_id': broadcast.pk,
+    }
+
+
+def _claim(broadcast_id, now):
+    """Mark the broadcast running for this worker; False if another worker has it."""
+    return Broadcast.objects.filter(
+        Q(status='queued') | Q(status='running', updated_at__lt=now - STALE_AFTER),
+        pk=broadcast_id,
+    ).update(status='running', updated_at=now) == 1
+
+
+def fan_out(broadcast_id, chunk_size=None):
+    """
+    Write the broadcast's notifications and push the live update.
+    Returns the finished Broadcast, or None when it was not claimable
+    (already done, or being run by someone else).
+    """
+    chunk_size = chunk_size or settings.BROADCAST_CHUNK_SIZE
+    if not _claim(broadcast_id, timezone.now()):
+        return None
+    broadcast = Broadcast.objects.get(pk=broadcast_id)
+    data = _data(broadcast)
+    pending = (
+        recipients(broadcast.audience, broadcast.sender_id)
+        .order_by('id').values_list('id', flat=True)
+    )
+
+    try:
+        cursor = broadcast.last_recipient_id
+        while True:
+            ids = list(pending.filter(id__gt=cursor)[:chunk_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                Notification.objects.bulk_create([
+                    Notification(
+                        recipient_id=user_id, sender_id=broadcast.sender_id,
+                        notification_type='system', title=broadcast.title,
+                        message=broadcast.message, link=broadcast.link, data=data,
+                    )
+                    for user_id in ids
+                ])
+                # No per-user push: clients count the role-group frame themselves
+                adjust_notifications_many(dict.fromkeys(ids, 1), push=False)
+                Broadcast.objects.filter(pk=broadcast_id).update(
+                    delivered=F('delivered') + len(ids), last_recipient_id=ids[-1],
+                    updated_at=timezone.now(),
+                )
+            cursor = ids[-1]
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Broadcast %s stopped after user %s", broadcast_id, cursor)
+        Broadcast.objects.filter(pk=broadcast_id).update(
+            status='failed', error=str(exc)[:2000], updated_at=timezone.now(),
+        )
+        broadcast.refresh_from_db()
+        return broadcast
+
+    Broadcast.objects.filter(pk=broadcast_id).update(
+        status='done', finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+    broadcast.refresh_from_db()
+
+    try:
+        push(broadcast)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Broadcast %s saved but WebSocket push failed: %s", broadcast_id, exc)
+    return broadcast
+
+
+def push(broadcast):
+    """
+    One group_send per role in the audience. Every recipient has their own
+    row, so the frame carries no notification id; clients reload their list
+    when they see ``data.broadcast_id``.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    preview = Notification(
+        sender_id=broadcast.sender_id, notification_type='system', title=broadcast.title,
+        message=broadcast.message, link=broadcast.link, data=_data(broadcast),
+        created_at=broadcast.finished_at or timezone.now(),
+    )
+    payload = {**NotificationSerializer(preview).data, 'id': None, 'recipient': None}
+    for role in AUDIENCE_ROLES[broadcast.audience]:
+        async_to_sync(channel_layer.group_send)(
+            role_group(role),
+            {'type': 'notification_broadcast', 'notification': payload},
+        )
+
+
+def run_pending(now=None):
+    """Fan out every queued broadcast and take over stale running ones. Returns how many ran."""
+    now = now or timezone.now()
+    ids = list(
+        Broadcast.objects.filter(
+            Q(status='queued') | Q(status='running', updated_at__lt=now - STALE_AFTER),
+        ).order_by('created_at').values_list('id', flat=True)
+    )
+    return sum(1 for broadcast_id in ids if fan_out(broadcast_id) is not None)
+
+
+# In-process worker, used while BROADCAST_INLINE_WORKER is on. One thread, so
+# two large broadcasts never insert side by side.
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _background_fan_out(broadcast_id):
+    try:
+        fan_out(broadcast_id)
+    except Exception:  # noqa: BLE001
+        logger.exception("Broadcast %s could not start; run_broadcasts will retry it", broadcast_id)
+    finally:
+        connections.close_all()  # this thread's connections only
+
+
+def start(broadcast_id):
+    """Hand the broadcast to the in-process worker (no-op when it is disabled)."""
+    global _executor
+    if not settings.BROADCAST_INLINE_WORKER:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='broadcast')
+    _executor.submit(_background_fan_out, broadcast_id)
@@ -5,9 +5,15 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 
+from messaging.consumers import ChatMessagesMixin, chat_group
+from .broadcast import AUDIENCE_ROLES, role_group
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Conversations one ClientConsumer socket may follow at once
+MAX_CHAT_SUBSCRIPTIONS = 50
+
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     """
@@ -25,17 +31,19 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
 
-        # Create a unique group name for this user
+        # Create a unique group name for this user, plus the role group
+        # admin broadcasts go to (approved users only, like the broadcast itself)
         self.user_group_name = f'notifications_{self.user.id}'
+        self.group_names = [self.user_group_name]
+        if getattr(self.user, 'status', None) == 'approved' and self.user.role in AUDIENCE_ROLES['all']:
+            self.group_names.append(role_group(self.user.role))
 
         # Join user's notification group. If the channel layer is down
         # (e.g. Redis isn't running), close the socket cleanly instead of
         # propagating a giant traceback for every reconnect.
         try:
-            await self.channel_layer.group_add(
-                self.user_group_name,
-                self.channel_name,
-            )
+            for group_name in self.group_names:
+                await self.channel_layer.group_add(group_name, self.channel_name)
         except Exception as exc:  # noqa: BLE001
             logger.warning(
                 "WebSocket rejected — channel layer unavailable (is Redis running?): %s",
@@ -59,10 +67,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """Handle WebSocket disconnection."""
         if hasattr(self, 'user_group_name'):
             try:
-                await self.channel_layer.group_discard(
-                    self.user_group_name,
-                    self.channel_name,
-                )
+                for group_name in self.group_names:
+                    await self.channel_layer.group_discard(group_name, self.channel_name)
             except Exception:  # noqa: BLE001
                 # Channel layer might already be unreachable — nothing to do.
                 pass
@@ -71,20 +77,24 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         """Handle messages from WebSocket (client -> server)"""
         try:
             data = json.loads(text_data)
-            message_type = data.get('type')
-
-            if message_type == 'ping':
-                # Respond to ping with pong
-                await self.send(text_data=json.dumps({
-                    'type': 'pong'
-                }))
-            elif message_type == 'mark_read':
-                # Mark notification as read
-                notification_id = data.get('notification_id')
-                if notification_id:
-                    await self.mark_notification_read(notification_id)
         except json.JSONDecodeError:
-            pass
+            return
+        if isinstance(data, dict):
+            await self.handle_frame(data)
+
+    async def handle_frame(self, data):
+        message_type = data.get('type')
+
+        if message_type == 'ping':
+            # Respond to ping with pong
+            await self.send(text_data=json.dumps({
+                'type': 'pong'
+            }))
+        elif message_type == 'mark_read':
+            # Mark notification as read
+            notification_id = data.get('notification_id')
+            if notification_id:
+                await self.mark_notification_read(notification_id)
 
     async def notification_message(self, event):
         """
@@ -97,16 +107,156 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'notification': event['notification']
         }))
 
+    async def notification_batch(self, event):
+        """
+        Several notifications delivered in one channel-layer message
+        (see utils.send_notifications_to_user); relayed as ordinary frames.
+        """
+        for notification in event['notifications']:
+            await self.send(text_data=json.dumps({
+                'type': 'notification',
+                'notification': notification
+            }))
+
+    async def unread_count(self, event):
+        """New unread totals (see notifications.unread), relayed as-is."""
+        await self.send(text_data=json.dumps(event))
+
+    async def notification_broadcast(self, event):
+        """
+        An admin broadcast sent once to a whole role group (see
+        notifications.broadcast). The frame has no id, as every recipient
+        has their own row; clients refresh their list on receipt.
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'notification',
+            'notification': event['notification']
+        }))
+
     @database_sync_to_async
     def mark_notification_read(self, notification_id):
-        """Mark a notification as read (database operation)"""
+        """Mark notification as read: one conditional UPDATE, no lookup first"""
         from .models import Notification
+        return Notification.mark_read(notification_id, self.user.id)
+
+
+def _friendship_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ClientConsumer(ChatMessagesMixin, NotificationConsumer):
+    """
+    One socket per client (``ws/client/``) carrying the user's notifications
+    and any number of chat conversations, so a user with several chats open
+    is authenticated once and holds one connection and one set of groups.
+
+    Besides the notification frames, the client sends
+        {"type": "subscribe", "friendship_id": 12}
+        {"type": "unsubscribe", "friendship_id": 12}
+        {"type": "chat", "friendship_id": 12, "text": "...", "message_type": "text"}
+    and receives chat messages of subscribed conversations as
+        {"type": "chat_message", "friendship_id": 12, "message": {...}}
+    Subscribing is answered with "subscribed", or with an "error" frame when
+    the user is not in the conversation or already follows
+    MAX_CHAT_SUBSCRIPTIONS of them. A chat frame that is not delivered gets
+    an "error" frame too ("not_subscribed", or "not_saved" when the message
+    could not be stored), so the client can send it over REST instead.
+    """
+
+    async def connect(self):
+        self.conversations = {}
+        await super().connect()
+        if hasattr(self, 'user_group_name'):
+            await self.use_write_behind()
+
+    async def disconnect(self, close_code):
+        await super().disconnect(close_code)
         try:
-            notification = Notification.objects.get(
-                id=notification_id,
-                recipient=self.user
-            )
-            notification.mark_as_read()
-            return True
-        except Notification.DoesNotExist:
-            return False
+            for friendship_id in self.conversations:
+                await self.channel_layer.group_discard(chat_group(friendship_id), self.channel_name)
+        except Exception:  # noqa: BLE001
+            pass
+        self.conversations = {}
+        await self.flush_buffered()
+
+    async def handle_frame(self, data):
+        message_type = data.get('type')
+        if message_type == 'subscribe':
+            await self.subscribe(_friendship_id(data.get('friendship_id')))
+        elif message_type == 'unsubscribe':
+            await self.unsubscribe(_friendship_id(data.get('friendship_id')))
+        elif message_type == 'chat':
+            await self.send_chat(_friendship_id(data.get('friendship_id')), data)
+        else:
+            await super().handle_frame(data)
+
+    async def send_error(self, friendship_id, error):
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'friendship_id': friendship_id,
+            'error': error,
+        }))
+
+    async def subscribe(self, friendship_id):
+        if friendship_id not in self.conversations:
+            if len(self.conversations) >= MAX_CHAT_SUBSCRIPTIONS:
+                await self.send_error(friendship_id, 'too_many_subscriptions')
+                return
+            friendship = friendship_id and await self.find_friendship(self.user, friendship_id)
+            if not friendship:
+                await self.send_error(friendship_id, 'not_a_member')
+                return
+            self.conversations[friendship_id] = friendship
+            await self.channel_layer.group_add(chat_group(friendship_id), self.channel_name)
+
+        await self.send(text_data=json.dumps({
+            'type': 'subscribed',
+            'friendship_id': friendship_id,
+        }))
+
+    async def unsubscribe(self, friendship_id):
+        if self.conversations.pop(friendship_id, None) is not None:
+            await self.channel_layer.group_discard(chat_group(friendship_id), self.channel_name)
+        await self.send(text_data=json.dumps({
+            'type': 'unsubscribed',
+            'friendship_id': friendship_id,
+        }))
+
+    async def send_chat(self, friendship_id, data):
+        friendship = self.conversations.get(friendship_id)
+        if friendship is None:
+            await self.send_error(friendship_id, 'not_subscribed')
+            return
+
+        text = str(data.get('text', '')).strip()
+        if not text:
+            return
+        message_data = await self.save_chat_message(
+            friendship, self.user, text, data.get('message_type', 'text'),
+        )
+        if not message_data:
+            await self.send_error(friendship_id, 'not_saved')
+            return
+
+        await self.channel_layer.group_send(
+            chat_group(friendship_id),
+            {
+                'type': 'chat_message',
+                'message': message_data,
+            }
+        )
+
+    async def chat_message(self, event):
+        """A message in one of the conversations, from the group ChatConsumer sockets share."""
+        message = event['message']
+        # Skip frames that were already queued when the client unsubscribed
+        if message['friendship'] not in self.conversations:
+            return
+        await self.send(text_data=json.dumps({
+            'type': 'chat_message',
+            'friendship_id': message['friendship'],
+            'message': message,
+        }))
@@ -0,0 +1,151 @@
+"""
+Notification e-mails: a few critical types right away, everything else in
+per-user digests.
+
+Each user picks a cadence on their profile (UserProfile.email_cadence):
+
+  off        no notification e-mails (also when email_notifications is off)
+  immediate  every notification created through create_notification is
+             e-mailed as it happens
+  hourly     one digest an hour
+  daily      one digest a day (default)
+
+CRITICAL_TYPES are e-mailed immediately for everyone except ``off``.
+Anything not e-mailed on its own stays unread with ``emailed_at`` empty until
+``send_digests`` collects it: one query for the candidates, one branded
+e-mail per user queued in the outbox with a bulk INSERT (the outbox worker
+then sends them in batches over one pooled SMTP connection), and one UPDATE
+per 500 rows to stamp ``emailed_at`` so nothing is mailed twice.
+
+Run from cron through ``python manage.py send_notification_digests
+--cadence hourly`` (hourly) and ``--cadence daily`` (once a day).
+"""
+import html as _html
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+from .outbox import queue_email, queue_emails
+
+CRITICAL_TYPES = ('account', 'appointment', 'transfer')
+# An hourly run also picks up what bulk jobs (reminders, sweeps) created for
+# "immediate" users, which create_notification never saw
+DIGEST_CADENCES = {'hourly': ('hourly', 'immediate'), 'daily': ('daily',)}
+MAX_DIGEST_ITEMS = 20
+
+
+def email_preferences(user_id):
+    """(email_notifications, email_cadence) for the user; profile defaults if there is none."""
+    from userprofile.models import UserProfile
+
+    prefs = UserProfile.objects.filter(user_id=user_id).values_list(
+        'email_notifications', 'email_cadence',
+    ).first()
+    return prefs or (True, 'daily')
+
+
+def emails_immediately(user_id, notification_type):
+    """Whether a new notification of this type should be e-mailed to the user right away."""
+    enabled, cadence = email_preferences(user_id)
+    if not enabled or cadence == 'off':
+        return False
+    return cadence == 'immediate' or notification_type in CRITICAL_TYPES
+
+
+def _link(path):
+    return f"{settings.FRONTEND_URL}{path or '/notifications'}"
+
+
+def queue_notification_email(recipient, title, message, link=None):
+    """Queue a single notification as a branded e-mail."""
+    from authentication.email_utils import build_email_html
+
+    body_html = (
+        f'<p style="margin:0 0 14px;color:#424242;font-size:15px;line-height:1.7;">{_html.escape(message)}</p>'
+        f'<p style="margin:0;font-size:14px;"><a href="{_html.escape(_link(link))}" '
+        f'style="color:#2E7D32;font-weight:600;">Open in LHMMS &rarr;</a></p>'
+    )
+    plain = f"{message}\n\nOpen in LHMMS: {_link(link)}"
+    return queue_email(recipient.email, title, plain, build_email_html(title, body_html))
+
+
+def render_digest(user, notifications):
+    """(subject, plain text, html) for one user's digest."""
+    from authentication.email_utils import build_email_html
+
+    shown = notifications[:MAX_DIGEST_ITEMS]
+    more = len(notifications) - len(shown)
+    count = len(notifications)
+    subject = f"You have {count} new LHMMS update{'' if count == 1 else 's'}"
+    name = user.full_name or user.username
+
+    plain = [f"Hello {name},", "", "Here is what happened since your last update:", ""]
+    rows = []
+    for item in shown:
+        when = timezone.localtime(item.created_at).strftime('%b %d, %H:%M')
+        plain.append(f"- {item.title} ({when}): {item.message}")
+        rows.append(
+            '<tr><td style="padding:10px 0;border-bottom:1px solid #EEEEEE;">'
+            f'<p style="margin:0;color:#1B5E20;font-size:15px;font-weight:600;">'
+            f'<a href="{_html.escape(_link(item.link))}" style="color:#1B5E20;text-decoration:none;">'
+            f'{_html.escape(item.title)}</a></p>'
+            f'<p style="margin:4px 0 0;color:#424242;font-size:14px;line-height:1.6;">{_html.escape(item.message)}</p>'
+            f'<p style="margin:4px 0 0;color:#9E9E9E;font-size:12px;">{when}</p>'
+            '</td></tr>'
+        )
+    if more:
+        plain.append(f"... and {more} more.")
+        rows.append(
+            f'<tr><td style="padding:10px 0;color:#757575;font-size:13px;">and {more} more</td></tr>'
+        )
+    plain += ["", f"See them all: {_link('/notifications')}"]
+
+    body_html = (
+        f'<p style="margin:0 0 12px;color:#424242;font-size:15px;line-height:1.7;">'
+        f'Hello <strong>{_html.escape(name)}</strong>, here is what happened since your last update:</p>'
+        f'<table width="100%" cellpadding="0" cellspacing="0" style="margin:0 0 20px;">{"".join(rows)}</table>'
+        f'<p style="margin:0;font-size:14px;"><a href="{_html.escape(_link("/notifications"))}" '
+        f'style="color:#2E7D32;font-weight:600;">See all notifications &rarr;</a></p>'
+    )
+    footer = "You get this digest because of your e-mail settings. Change how often in Profile → Settings."
+    return subject, "\n".join(plain), build_email_html(subject, body_html, footer_note=footer)
+
+
+def send_digests(cadence, now=None, dry_run=False):
+    """
+    Queue one digest e-mail per user on ``cadence`` ('hourly' or 'daily') with
+    unread notifications that have not been e-mailed yet.
+    Returns ``{'users': n, 'notifications': n}``.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.NOTIFICATION_DIGEST_MAX_AGE_DAYS)
+    candidates = (
+        Notification.objects.filter(
+            is_read=False, emailed_at__isnull=True, created_at__gte=since, created_at__lte=now,
+            recipient__profile__email_notifications=True,
+            recipient__profile__email_cadence__in=DIGEST_CADENCES[cadence],
+        )
+        .select_related('recipient')
+        .order_by('recipient_id', '-created_at')
+    )
+
+    by_user = defaultdict(list)
+    for notification in candidates:
+        by_user[notification.recipient_id].append(notification)
+    report = {'users': len(by_user), 'notifications': sum(len(items) for items in by_user.values())}
+    if dry_run or not by_user:
+        return report
+
+    ids = [n.pk for items in by_user.values() for n in items]
+    with transaction.atomic():
+        queue_emails(
+            (items[0].recipient.email, *render_digest(items[0].recipient, items))
+            for items in by_user.values()
+        )
+        for start in range(0, len(ids), 500):
+            Notification.objects.filter(id__in=ids[start:start + 500]).update(emailed_at=now)
+    return report
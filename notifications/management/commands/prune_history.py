@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from notifications.retention import prune
+
+
+class Command(BaseCommand):
+    help = 'Apply notification retention and move old chat months to the message archive (run daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Count what would change without changing it')
+
+    def handle(self, *args, **options):
+        report = prune(dry_run=options['dry_run'])
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        notifications = report['notifications']
+        archived, dropped = report['messages_archived'], report['archive_dropped']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {notifications['read_expired']} expired read and {notifications['too_old']} over-age "
+            f"notifications; archived {archived['messages']} messages from {archived['months']} month(s); "
+            f"dropped {dropped['months']} archived month(s) ({dropped['messages']} messages)"
+        ))
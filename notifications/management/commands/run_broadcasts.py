@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from notifications.broadcast import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Fan out queued admin broadcasts and resume interrupted ones (run every minute from cron)'
+
+    def handle(self, *args, **options):
+        count = run_pending()
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} broadcast(s)"))
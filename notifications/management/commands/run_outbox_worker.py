@@ -0,0 +1,61 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from notifications.outbox import deliver_batch, drain
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued e-mails and SMS from the outbox (long-running; use --once from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.OUTBOX_WORKER_THREADS,
+                            help='Delivery threads (default: OUTBOX_WORKER_THREADS)')
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Messages claimed per batch (default: OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--idle-sleep', type=float, default=1.0,
+                            help='Seconds to wait when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            report = drain(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Sent {report['sent']}, retrying {report['retrying']}, dead-lettered {report['dead']}"
+            ))
+            return
+
+        stop = threading.Event()
+
+        def loop():
+            try:
+                while not stop.is_set():
+                    try:
+                        report = deliver_batch(options['batch_size'])
+                    except Exception:  # noqa: BLE001
+                        # e.g. the database went away; the rows stay queued
+                        logger.exception("Outbox batch failed")
+                        connections.close_all()
+                        stop.wait(options['idle_sleep'])
+                        continue
+                    if report['claimed'] < options['batch_size']:
+                        stop.wait(options['idle_sleep'])
+            finally:
+                connections.close_all()
+
+        self.stdout.write(f"Outbox worker running with {options['threads']} threads (Ctrl+C to stop)")
+        with ThreadPoolExecutor(max_workers=options['threads'], thread_name_prefix='outbox') as pool:
+            for _ in range(options['threads']):
+                pool.submit(loop)
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                stop.set()
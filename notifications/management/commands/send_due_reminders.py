@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from notifications.reminders import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Notify users about vaccinations, treatments and appointments coming due (run hourly or daily)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Reminder window in days (default: REMINDER_WINDOW_DAYS)')
+        parser.add_argument('--lookback', type=int,
+                            help='Days back to remind about overdue items (default: REMINDER_OVERDUE_LOOKBACK_DAYS)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be sent without sending')
+
+    def handle(self, *args, **options):
+        summary = send_due_reminders(
+            window_days=options['days'],
+            lookback_days=options['lookback'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Would send' if options['dry_run'] else 'Sent'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {summary['sent']} reminders to {summary['recipients']} users "
+            f"({summary['already_sent']} of {summary['candidates']} due items already reminded)"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from notifications.digest import DIGEST_CADENCES, send_digests
+
+
+class Command(BaseCommand):
+    help = 'E-mail each user one digest of unread notifications (run --cadence hourly every hour, daily once a day)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cadence', choices=sorted(DIGEST_CADENCES), required=True,
+                            help='Which users to send to, by their e-mail cadence')
+        parser.add_argument('--dry-run', action='store_true', help='Count digests without queueing them')
+
+    def handle(self, *args, **options):
+        report = send_digests(options['cadence'], dry_run=options['dry_run'])
+        verb = 'Would queue' if options['dry_run'] else 'Queued'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['users']} {options['cadence']} digests covering {report['notifications']} notifications"
+        ))
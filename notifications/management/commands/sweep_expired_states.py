@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from notifications.sweeper import sweep
+
+
+class Command(BaseCommand):
+    help = ('Expire ended insurance enrollments, cancel pending appointments whose date passed and '
+            'complete finished treatments (run daily, shortly after midnight)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would change')
+
+    def handle(self, *args, **options):
+        report = sweep(dry_run=options['dry_run'])
+        prefix = 'Would change' if options['dry_run'] else 'Changed'
+        for key, count in report.items():
+            if key != 'users_notified':
+                self.stdout.write(f"{prefix} {count}: {key.replace('_', ' ')}")
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Notified {report['users_notified']} users"))
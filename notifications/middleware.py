@@ -1,7 +1,6 @@
 """
 WebSocket authentication middleware for JWT tokens
 """
-from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.tokens import AccessToken
@@ -10,10 +9,10 @@ from django.contrib.auth import get_user_model
 User = get_user_model()
 
 
-@database_sync_to_async
-def get_user_from_token(token_string):
+async def get_user_from_token(token_string):
     """
-    Get user from JWT token
+    Get user from JWT token (async ORM: one query, without the connection
+    clean-up database_sync_to_async wraps around every call)
     """
     try:
         # Decode the token
@@ -21,8 +20,7 @@ def get_user_from_token(token_string):
         user_id = access_token['user_id']
         
         # Get the user
-        user = User.objects.get(id=user_id)
-        return user
+        return await User.objects.aget(id=user_id)
     except Exception as e:
         print(f"[WebSocket Auth] Token validation failed: {e}")
         return AnonymousUser()
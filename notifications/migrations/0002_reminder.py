@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('vaccination', 'Vaccination'), ('treatment', 'Treatment'), ('appointment', 'Appointment')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('due_date', models.DateField()),
+                ('stage', models.CharField(choices=[('due', 'Due soon'), ('overdue', 'Overdue')], max_length=10)),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='notifications.notification')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['due_date'], name='notificatio_due_dat_be7698_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'object_id', 'due_date', 'stage', 'recipient'), name='unique_reminder_per_due_date')],
+            },
+        ),
+    ]
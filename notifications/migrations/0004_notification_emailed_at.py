@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_emailed(apps, schema_editor):
+    # Everything created before digests existed counts as handled, so the
+    # first digest run doesn't mail out a week of backlog
+    Notification = apps.get_model('notifications', 'Notification')
+    Notification.objects.filter(emailed_at__isnull=True).update(emailed_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_outboxmessage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='emailed_at',
+            field=models.DateTimeField(blank=True, help_text='When it went out by e-mail, on its own or in a digest', null=True),
+        ),
+        migrations.RunPython(mark_existing_emailed, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('emailed_at__isnull', True), ('is_read', False)), fields=['created_at'], name='notification_digest_idx'),
+        ),
+    ]
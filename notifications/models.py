@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -68,21 +69,221 @@ class Notification(models.Model):
         blank=True,
         help_text="When the notification was read"
     )
+    emailed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When it went out by e-mail, on its own or in a digest"
+    )
 
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['recipient', '-created_at']),
+            # Retention pruning (notifications.retention), one type at a time
+            models.Index(fields=['notification_type', 'created_at']),
+            # Digest candidates: small, since rows leave it once e-mailed
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(emailed_at__isnull=True, is_read=False),
+                name='notification_digest_idx',
+            ),
         ]
 
     def __str__(self):
         return f"{self.notification_type} - {self.title} (to: {self.recipient.username})"
 
     def mark_as_read(self):
-        """Mark notification as read"""
-        if not self.is_read:
-            self.is_read = True
-            from django.utils import timezone
-            self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'read_at'])
+        """
+        Mark notification as read. A conditional UPDATE, so two tabs marking
+        the same row only lower the unread counter once. Returns True if this
+        call did the marking.
+        """
+        if self.is_read:
+            return False
+        self.is_read = True
+        self.read_at = timezone.now()
+        return Notification.mark_read(self.pk, self.recipient_id, self.read_at)
+
+    @classmethod
+    def mark_read(cls, pk, recipient_id, read_at=None):
+        """
+        Mark one of ``recipient_id``'s notifications read without loading it
+        first. Returns True if it was unread.
+        """
+        from django.db import transaction
+        from .unread import adjust_notifications
+
+        with transaction.atomic():
+            marked = cls.objects.filter(pk=pk, recipient_id=recipient_id, is_read=False).update(
+                is_read=True, read_at=read_at or timezone.now(),
+            )
+            if marked:
+                adjust_notifications(recipient_id, -1)
+        return bool(marked)
+
+
+class UnreadCounter(models.Model):
+    """
+    Denormalized unread totals for one user, so the badge counts are a
+    single-row read. Kept current by notifications.unread on every path that
+    creates, reads or deletes notifications and chat messages; a missing row
+    is rebuilt from live counts on the next read.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_counter',
+    )
+    notifications = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0, help_text="Across all conversations")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.notifications} notifications, {self.messages} messages unread"
+
+
+class Reminder(models.Model):
+    """
+    Ledger of due-date reminders already sent, so notifications.reminders
+    never notifies twice about the same item, due date and stage.
+    """
+    SOURCES = (
+        ('vaccination', 'Vaccination'),
+        ('treatment', 'Treatment'),
+        ('appointment', 'Appointment'),
+    )
+    STAGES = (
+        ('due', 'Due soon'),
+        ('overdue', 'Overdue'),
+    )
+
+    source = models.CharField(max_length=20, choices=SOURCES)
+    object_id = models.PositiveBigIntegerField()
+    due_date = models.DateField()
+    stage = models.CharField(max_length=10, choices=STAGES)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='reminders',
+    )
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['due_date'])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'object_id', 'due_date', 'stage', 'recipient'],
+                name='unique_reminder_per_due_date',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.object_id} {self.stage} ({self.due_date}) -> {self.recipient_id}"
+
+
+class OutboxMessage(models.Model):
+    """
+    An e-mail or SMS waiting to go out. Written in the same transaction as
+    the change that triggers it and delivered in the background by
+    notifications.outbox, so requests never wait on SMTP or Twilio.
+    """
+    CHANNELS = (
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+    )
+    STATUSES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead letter'),
+    )
+    PRIORITY_URGENT = 0   # OTPs and other codes someone is waiting for
+    PRIORITY_NORMAL = 10
+
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    recipient = models.CharField(max_length=255, help_text="E-mail address or phone number")
+    subject = models.CharField(max_length=255, blank=True, default='')
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default='')
+    priority = models.PositiveSmallIntegerField(default=PRIORITY_NORMAL)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="When the row may next be claimed: retry time, or lease expiry while sending"
+    )
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient}: {self.subject or self.body[:40]} ({self.status})"
+
+
+class Broadcast(models.Model):
+    """
+    An admin announcement to every approved farmer and/or vet. The view only
+    records it; notifications.broadcast fans it out in the background in
+    chunks, moving ``last_recipient_id`` forward with each chunk so an
+    interrupted run resumes where it stopped.
+    """
+    AUDIENCES = (
+        ('all', 'Farmers and vets'),
+        ('farmers', 'Farmers'),
+        ('vets', 'Vets'),
+    )
+    URGENCIES = (
+        ('normal', 'Normal'),
+        ('important', 'Important'),
+        ('urgent', 'Urgent'),
+    )
+    STATUSES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='broadcasts',
+    )
+    title = models.CharField(max_length=255, help_text="Title as shown, urgency prefix included")
+    message = models.TextField()
+    link = models.CharField(max_length=500, null=True, blank=True)
+    audience = models.CharField(max_length=10, choices=AUDIENCES, default='all')
+    urgency = models.CharField(max_length=10, choices=URGENCIES, default='normal')
+    status = models.CharField(max_length=10, choices=STATUSES, default='queued')
+    total = models.PositiveIntegerField(default=0, help_text="Recipients when the broadcast was queued")
+    delivered = models.PositiveIntegerField(default=0)
+    last_recipient_id = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Heartbeat: bumped after every chunk")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.title} -> {self.audience} ({self.status}, {self.delivered}/{self.total})"
@@ -0,0 +1,226 @@
+"""
+Transactional outbox for e-mail and SMS.
+
+Request code calls ``queue_email()`` / ``queue_sms()`` inside its own
+transaction, so a message exists exactly when the change that caused it
+committed, and the HTTP response never waits on SMTP or Twilio. Delivery
+happens in ``deliver_batch()``, driven by
+
+  - ``python manage.py run_outbox_worker``: a long-running process with a
+    small thread pool (production), and/or
+  - an in-process thread pool woken on commit while OUTBOX_INLINE_WORKER is
+    on (development, so OTPs still reach the console backend straight away).
+
+A batch claims due rows under a short lease (status 'sending' with
+next_attempt_at pushed forward), so several workers can run side by side and
+rows held by a crashed worker are picked up again once the lease runs out.
+Every e-mail in a batch goes over one SMTP connection. Failures are retried
+with exponential backoff; after OUTBOX_MAX_ATTEMPTS the row is dead-lettered
+(status 'dead') for an admin to inspect and requeue.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+MAX_BACKOFF = timedelta(hours=1)
+
+
+def _priority(urgent):
+    return OutboxMessage.PRIORITY_URGENT if urgent else OutboxMessage.PRIORITY_NORMAL
+
+
+def queue_email(to, subject, body, html_body='', urgent=False):
+    """Store an e-mail for delivery once the current transaction commits."""
+    message = OutboxMessage.objects.create(
+        channel='email', recipient=to, subject=subject, body=body,
+        html_body=html_body or '', priority=_priority(urgent),
+    )
+    transaction.on_commit(wake)
+    return message
+
+
+def queue_emails(emails, urgent=False):
+    """
+    Bulk form of queue_email for ``(to, subject, body, html_body)`` tuples:
+    one INSERT per 500 rows. Returns the number queued.
+    """
+    rows = OutboxMessage.objects.bulk_create([
+        OutboxMessage(
+            channel='email', recipient=to, subject=subject, body=body,
+            html_body=html_body or '', priority=_priority(urgent),
+        )
+        for to, subject, body, html_body in emails
+    ], batch_size=500)
+    if rows:
+        transaction.on_commit(wake)
+    return len(rows)
+
+
+def queue_sms(phone, body, urgent=False):
+    """Store an SMS for delivery once the current transaction commits."""
+    message = OutboxMessage.objects.create(
+        channel='sms', recipient=phone, body=body, priority=_priority(urgent),
+    )
+    transaction.on_commit(wake)
+    return message
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts`` + 1: base, 2x base, 4x base ... capped at an hour."""
+    delay = timedelta(seconds=settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return min(delay, MAX_BACKOFF)
+
+
+def claim(limit, now):
+    """
+    Lease up to ``limit`` due rows to this worker, most urgent first.
+    Returns the claimed OutboxMessage objects.
+    """
+    lease_until = now + LEASE
+    with transaction.atomic():
+        due = OutboxMessage.objects.filter(
+            status__in=['pending', 'sending'], next_attempt_at__lte=now,
+        ).order_by('priority', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        # Re-checking the due condition keeps a second worker from taking the
+        # same rows where SKIP LOCKED is unavailable
+        OutboxMessage.objects.filter(id__in=ids, next_attempt_at__lte=now).update(
+            status='sending', attempts=F('attempts') + 1, next_attempt_at=lease_until,
+        )
+    return list(
+        OutboxMessage.objects.filter(id__in=ids, status='sending', next_attempt_at=lease_until)
+        .order_by('priority', 'id')
+    )
+
+
+def _send_emails(messages, errors):
+    """Send every e-mail over one connection; record failures in ``errors``."""
+    mail = get_connection()
+    try:
+        mail.open()
+    except Exception as exc:  # noqa: BLE001
+        for message in messages:
+            errors[message.pk] = f"Could not connect: {exc}"
+        return
+    try:
+        for message in messages:
+            email = EmailMultiAlternatives(
+                subject=message.subject, body=message.body,
+                from_email=settings.DEFAULT_FROM_EMAIL, to=[message.recipient],
+                connection=mail,
+            )
+            if message.html_body:
+                email.attach_alternative(message.html_body, 'text/html')
+            try:
+                if not mail.send_messages([email]):
+                    errors[message.pk] = 'Not accepted by the mail server'
+            except Exception as exc:  # noqa: BLE001
+                errors[message.pk] = str(exc) or exc.__class__.__name__
+    finally:
+        mail.close()
+
+
+def _send_sms(messages, errors):
+    from authentication.email_utils import send_sms_sync
+
+    for message in messages:
+        try:
+            if not send_sms_sync(message.recipient, message.body):
+                errors[message.pk] = 'SMS provider did not accept the message'
+        except Exception as exc:  # noqa: BLE001
+            errors[message.pk] = str(exc) or exc.__class__.__name__
+
+
+def deliver_batch(limit=None, now=None):
+    """
+    Claim one batch of due messages and try to deliver them.
+    Returns ``{'claimed': n, 'sent': n, 'retrying': n, 'dead': n}``.
+    """
+    now = now or timezone.now()
+    limit = limit or settings.OUTBOX_BATCH_SIZE
+    messages = claim(limit, now)
+    report = {'claimed': len(messages), 'sent': 0, 'retrying': 0, 'dead': 0}
+    if not messages:
+        return report
+
+    errors = {}
+    _send_emails([m for m in messages if m.channel == 'email'], errors)
+    _send_sms([m for m in messages if m.channel == 'sms'], errors)
+
+    finished = timezone.now()
+    sent_ids = [m.pk for m in messages if m.pk not in errors]
+    if sent_ids:
+        OutboxMessage.objects.filter(id__in=sent_ids).update(
+            status='sent', sent_at=finished, last_error='',
+        )
+    failed = [m for m in messages if m.pk in errors]
+    for message in failed:
+        message.last_error = errors[message.pk][:2000]
+        if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            message.status = 'dead'
+            logger.error("Outbox %s to %s dead-lettered after %s attempts: %s",
+                         message.channel, message.recipient, message.attempts, message.last_error)
+        else:
+            message.status = 'pending'
+            message.next_attempt_at = now + backoff(message.attempts)
+    OutboxMessage.objects.bulk_update(failed, ['status', 'next_attempt_at', 'last_error'])
+
+    report['sent'] = len(sent_ids)
+    report['dead'] = sum(1 for m in failed if m.status == 'dead')
+    report['retrying'] = len(failed) - report['dead']
+    return report
+
+
+def drain(limit=None):
+    """Deliver batches until nothing is due. Returns the summed report."""
+    total = {'claimed': 0, 'sent': 0, 'retrying': 0, 'dead': 0}
+    while True:
+        report = deliver_batch(limit)
+        for key, value in report.items():
+            total[key] += value
+        if report['claimed'] < (limit or settings.OUTBOX_BATCH_SIZE):
+            return total
+
+
+# In-process worker pool, used while OUTBOX_INLINE_WORKER is on
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _background_drain():
+    try:
+        drain()
+    except Exception:  # noqa: BLE001
+        logger.exception("Outbox drain failed; rows stay queued for the next run")
+    finally:
+        connections.close_all()  # this thread's connections only
+
+
+def wake():
+    """Nudge the in-process pool to drain the outbox (no-op when it is disabled)."""
+    global _executor
+    if not settings.OUTBOX_INLINE_WORKER:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.OUTBOX_WORKER_THREADS, thread_name_prefix='outbox',
+            )
+    _executor.submit(_background_drain)
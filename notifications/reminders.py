@@ -0,0 +1,197 @@
+"""
+Due-date reminders for vaccinations, treatments and appointments.
+
+Run from cron through ``python manage.py send_due_reminders``. Each run:
+
+  1. reads the items due in the reminder window, one indexed query per source
+     (vaccinations by next_due_date, in-progress treatments by
+     next_treatment_date, approved appointments by preferred_date);
+  2. drops those already reminded about, using one query on the Reminder
+     ledger for the window's due dates;
+  3. in one transaction, inserts the ledger entries first (a concurrent run's
+     entries are ignored), then writes Notification rows only for the entries
+     this run inserted and links them back with one bulk_update;
+  4. pushes each recipient's new notifications over the channel layer in a
+     single batched message, and their unread count (notifications.unread).
+
+The query count is therefore fixed per run, whatever the number of users, and
+re-running is harmless: anything already in the ledger is skipped.
+"""
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from appointment.models import Appointment
+from medical.models import Treatment
+from vaccination.models import Vaccination
+
+from .models import Notification, Reminder
+from .unread import adjust_notifications_many
+from .utils import send_notifications_to_user
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DueItem:
+    source: str
+    object_id: int
+    due_date: object
+    stage: str
+    recipient_id: int
+    notification_type: str
+    title: str
+    message: str
+    link: str
+    data: dict = field(default_factory=dict)
+
+    @property
+    def key(self):
+        return (self.source, self.object_id, self.due_date, self.stage, self.recipient_id)
+
+
+def _when(due_date, today):
+    if due_date == today:
+        return 'today'
+    if due_date == today + timedelta(days=1):
+        return 'tomorrow'
+    return f'on {due_date:%b %d}'
+
+
+def _stage(due_date, today):
+    return 'overdue' if due_date < today else 'due'
+
+
+def _vaccination_items(today, start, end):
+    rows = Vaccination.objects.filter(
+        next_due_date__gte=start, next_due_date__lte=end,
+    ).values_list('id', 'user_id', 'next_due_date', 'vaccine_name', 'livestock__tag_id').order_by()
+    for pk, user_id, due, vaccine, tag in rows:
+        stage = _stage(due, today)
+        yield DueItem(
+            source='vaccination', object_id=pk, due_date=due, stage=stage, recipient_id=user_id,
+            notification_type='vaccination',
+            title='Vaccination overdue' if stage == 'overdue' else 'Vaccination due',
+            message=(f'{vaccine} for {tag} was due on {due:%b %d}.' if stage == 'overdue'
+                     else f'{vaccine} for {tag} is due {_when(due, today)}.'),
+            link='/vaccination',
+            data={'vaccination_id': pk, 'due_date': str(due)},
+        )
+
+
+def _treatment_items(today, start, end):
+    rows = Treatment.objects.filter(
+        status='In Progress', next_treatment_date__gte=start, next_treatment_date__lte=end,
+    ).values_list('id', 'user_id', 'next_treatment_date', 'treatment_name', 'livestock__tag_id').order_by()
+    for pk, user_id, due, name, tag in rows:
+        stage = _stage(due, today)
+        yield DueItem(
+            source='treatment', object_id=pk, due_date=due, stage=stage, recipient_id=user_id,
+            notification_type='medical',
+            title='Treatment follow-up overdue' if stage == 'overdue' else 'Treatment follow-up due',
+            message=(f'{name} for {tag} was due on {due:%b %d}.' if stage == 'overdue'
+                     else f'{name} for {tag} is due {_when(due, today)}.'),
+            link='/medical/deadlines',
+            data={'treatment_id': pk, 'due_date': str(due)},
+        )
+
+
+def _appointment_items(today, start, end):
+    # Appointments are only worth a reminder before they happen
+    rows = Appointment.objects.filter(
+        status='Approved', preferred_date__gte=today, preferred_date__lte=end,
+    ).values_list('id', 'farmer_id', 'veterinarian_id', 'preferred_date', 'preferred_time', 'animal_type').order_by()
+    for pk, farmer_id, vet_id, day, at, animal in rows:
+        message = f"Appointment{f' for {animal}' if animal else ''} {_when(day, today)} at {at:%H:%M}."
+        for recipient_id, link in ((farmer_id, '/appointments'), (vet_id, '/vet/appointments')):
+            yield DueItem(
+                source='appointment', object_id=pk, due_date=day, stage='due', recipient_id=recipient_id,
+                notification_type='appointment', title='Upcoming appointment', message=message,
+                link=link, data={'appointment_id': pk, 'due_date': str(day)},
+            )
+
+
+SOURCES = (_vaccination_items, _treatment_items, _appointment_items)
+
+
+def _sent_keys(start, end):
+    return set(
+        Reminder.objects.filter(due_date__gte=start, due_date__lte=end)
+        .values_list('source', 'object_id', 'due_date', 'stage', 'recipient_id')
+    )
+
+
+def send_due_reminders(today=None, window_days=None, lookback_days=None, dry_run=False):
+    """
+    Send every reminder that is due and not yet sent.
+    Returns ``{'candidates': n, 'already_sent': n, 'sent': n, 'recipients': n}``.
+    """
+    today = today or timezone.now().date()
+    window_days = settings.REMINDER_WINDOW_DAYS if window_days is None else window_days
+    lookback_days = settings.REMINDER_OVERDUE_LOOKBACK_DAYS if lookback_days is None else lookback_days
+    start, end = today - timedelta(days=lookback_days), today + timedelta(days=window_days)
+
+    items = [item for source in SOURCES for item in source(today, start, end)]
+    sent_keys = _sent_keys(start, end)
+    pending = list({item.key: item for item in items if item.key not in sent_keys}.values())
+
+    summary = {
+        'candidates': len(items),
+        'already_sent': len(items) - len(pending),
+        'sent': len(pending),
+        'recipients': len({item.recipient_id for item in pending}),
+    }
+    if dry_run or not pending:
+        return summary
+
+    with transaction.atomic():
+        # Claim the ledger rows first. A run racing this one either inserted
+        # the same keys already (ignored here, and linked to its notification)
+        # or waits on the unique index until this transaction ends, so only
+        # the rows still unlinked below are this run's to notify about.
+        Reminder.objects.bulk_create([
+            Reminder(
+                source=item.source, object_id=item.object_id, due_date=item.due_date,
+                stage=item.stage, recipient_id=item.recipient_id,
+            )
+            for item in pending
+        ], batch_size=500, ignore_conflicts=True)
+        claimed = {
+            (r.source, r.object_id, r.due_date, r.stage, r.recipient_id): r
+            for r in Reminder.objects.filter(due_date__gte=start, due_date__lte=end, notification__isnull=True)
+        }
+        pending = [item for item in pending if item.key in claimed]
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=item.recipient_id, notification_type=item.notification_type,
+                title=item.title, message=item.message, link=item.link, data=item.data,
+            )
+            for item in pending
+        ], batch_size=500)
+        reminders = [claimed[item.key] for item in pending]
+        for reminder, notification in zip(reminders, notifications):
+            reminder.notification = notification
+        Reminder.objects.bulk_update(reminders, ['notification'], batch_size=500)
+        adjust_notifications_many(Counter(n.recipient_id for n in notifications))
+
+    summary['already_sent'] = len(items) - len(pending)
+    summary['sent'] = len(pending)
+    summary['recipients'] = len({item.recipient_id for item in pending})
+
+    by_user = defaultdict(list)
+    for notification in notifications:
+        by_user[notification.recipient_id].append(notification)
+    for user_id, user_notifications in by_user.items():
+        # Best effort, as in create_notification: the rows are saved either way
+        try:
+            send_notifications_to_user(user_id, user_notifications)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Reminders for user %s saved but WebSocket push failed: %s", user_id, exc)
+
+    return summary
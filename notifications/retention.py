@@ -0,0 +1,230 @@
+"""
+Retention for the two append-only tables, notifications and chat messages.
+
+Notifications:
+  - read notifications go after NOTIFICATION_RETENTION_DAYS for their type;
+  - anything older than NOTIFICATION_MAX_AGE_DAYS goes, read or not, and
+    the unread counters are lowered to match.
+  Both passes walk the (notification_type, created_at) index one type at a
+  time and delete by id in chunks. Reminder rows are the only thing pointing
+  at a notification, so they have to stay real deletes.
+
+Chat messages:
+  - whole months older than MESSAGE_HOT_MONTHS are moved to MessageArchive
+    with one INSERT ... SELECT and one range DELETE each, so Message (and the
+    indexes behind the chat screens) only ever holds recent months;
+  - archived months past MESSAGE_ARCHIVE_MONTHS are dropped. On PostgreSQL
+    the archive is partitioned by month and a month is a DROP TABLE of its
+    partition; elsewhere it is one range DELETE on created_at.
+
+Run from cron through ``python manage.py prune_history`` (daily);
+``--dry-run`` only counts.
+"""
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Notification
+from .unread import adjust_messages, adjust_notifications_many
+
+CHUNK = 5000
+
+
+def month_start(moment):
+    """Midnight UTC on the first of ``moment``'s month."""
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(start, months):
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+# Notifications
+
+def _delete_notifications(qs):
+    """Delete the rows in ``qs`` CHUNK ids at a time. Returns the number deleted."""
+    total = 0
+    while True:
+        ids = list(qs.values_list('id', flat=True)[:CHUNK])
+        if not ids:
+            return total
+        _, per_model = Notification.objects.filter(id__in=ids).delete()
+        total += per_model.get(Notification._meta.label, 0)
+
+
+def prune_notifications(now=None, dry_run=False):
+    """Returns ``{'read_expired': n, 'too_old': n}``."""
+    now = now or timezone.now()
+    max_age_cutoff = now - timedelta(days=settings.NOTIFICATION_MAX_AGE_DAYS)
+    report = {'read_expired': 0, 'too_old': 0}
+
+    for notification_type, _ in Notification.NOTIFICATION_TYPES:
+        days = settings.NOTIFICATION_RETENTION_DAYS.get(notification_type, settings.NOTIFICATION_MAX_AGE_DAYS)
+        of_type = Notification.objects.filter(notification_type=notification_type)
+        read_expired = of_type.filter(
+            is_read=True, created_at__lt=now - timedelta(days=days), created_at__gte=max_age_cutoff,
+        )
+        too_old = of_type.filter(created_at__lt=max_age_cutoff)
+        if dry_run:
+            report['read_expired'] += read_expired.count()
+            report['too_old'] += too_old.count()
+            continue
+
+        report['read_expired'] += _delete_notifications(read_expired)
+        with transaction.atomic():
+            unread = dict(
+                too_old.filter(is_read=False).values_list('recipient').annotate(n=Count('id')).order_by()
+            )
+            report['too_old'] += _delete_notifications(too_old)
+            adjust_notifications_many({user_id: -n for user_id, n in unread.items()})
+    return report
+
+
+# Chat messages
+
+def _partition_name(start):
+    from messaging.models import MessageArchive
+
+    return f"{MessageArchive._meta.db_table}_{start:%Y%m}"
+
+
+def _partitioned():
+    return connection.vendor == 'postgresql'
+
+
+def ensure_partition(start):
+    """Create the archive partition for the month beginning at ``start`` (PostgreSQL only)."""
+    from messaging.models import MessageArchive
+
+    if not _partitioned():
+        return
+    qn = connection.ops.quote_name
+    end = add_months(start, 1)
+    with connection.cursor() as cursor:
+        # Bounds are literals: partition bounds cannot be bound parameters
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {qn(_partition_name(start))} "
+            f"PARTITION OF {qn(MessageArchive._meta.db_table)} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+
+
+def _archive_month(start, end):
+    """Move one month of messages into the archive. Returns the number moved."""
+    from messaging.models import Message, MessageArchive
+
+    qn = connection.ops.quote_name
+    in_month = Message.objects.filter(created_at__gte=start, created_at__lt=end)
+    columns = ', '.join(qn(f.column) for f in MessageArchive._meta.local_concrete_fields)
+    bounds = [
+        connection.ops.adapt_datetimefield_value(start),
+        connection.ops.adapt_datetimefield_value(end),
+    ]
+
+    with transaction.atomic():
+        # Unread messages leave the unread counters with the live table
+        unread = Counter()
+        for friendship_id, user1_id, user2_id, sender_id, n in (
+            in_month.filter(is_read=False)
+            .values_list('friendship_id', 'friendship__user1_id', 'friendship__user2_id', 'sender_id')
+            .annotate(n=Count('id')).order_by()
+        ):
+            unread[(user2_id if sender_id == user1_id else user1_id, friendship_id)] += n
+
+        ensure_partition(start)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {qn(MessageArchive._meta.db_table)} ({columns}) "
+                f"SELECT {columns} FROM {qn(Message._meta.db_table)} "
+                f"WHERE {qn('created_at')} >= %s AND {qn('created_at')} < %s",
+                bounds,
+            )
+        moved, _ = in_month.delete()
+        for (user_id, friendship_id), n in unread.items():
+            adjust_messages(user_id, friendship_id, -n, push=False)
+    return moved
+
+
+def archive_messages(now=None, dry_run=False):
+    """Move every whole month older than MESSAGE_HOT_MONTHS. Returns ``{'months': n, 'messages': n}``."""
+    from messaging.models import Message
+
+    now = now or timezone.now()
+    cutoff = add_months(month_start(now), -settings.MESSAGE_HOT_MONTHS)
+    old = Message.objects.filter(created_at__lt=cutoff)
+    if dry_run:
+        return {'months': len(old.dates('created_at', 'month')), 'messages': old.count()}
+
+    report = {'months': 0, 'messages': 0}
+    oldest = old.order_by('created_at').values_list('created_at', flat=True).first()
+    start = month_start(oldest) if oldest else cutoff
+    while start < cutoff:
+        end = add_months(start, 1)
+        moved = _archive_month(start, end)
+        if moved:
+            report['months'] += 1
+            report['messages'] += moved
+        start = end
+    return report
+
+
+def _archive_partitions():
+    """``{month start: partition name}`` for the archive's partitions (PostgreSQL)."""
+    from messaging.models import MessageArchive
+
+    table = MessageArchive._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = re.fullmatch(rf'{re.escape(table)}_(\d{{4}})(\d{{2}})', name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def drop_expired_archive(now=None, dry_run=False):
+    """Drop archived months past MESSAGE_ARCHIVE_MONTHS. Returns ``{'months': n, 'messages': n}``."""
+    from messaging.models import MessageArchive
+
+    now = now or timezone.now()
+    cutoff = add_months(month_start(now), -(settings.MESSAGE_HOT_MONTHS + settings.MESSAGE_ARCHIVE_MONTHS))
+    expired = MessageArchive.objects.filter(created_at__lt=cutoff)
+
+    if _partitioned():
+        partitions = {start: name for start, name in _archive_partitions().items() if start < cutoff}
+        report = {'months': len(partitions), 'messages': expired.count()}
+        if not dry_run:
+            qn = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                for name in partitions.values():
+                    cursor.execute(f"DROP TABLE {qn(name)}")
+        return report
+
+    report = {'months': len(expired.dates('created_at', 'month')), 'messages': expired.count()}
+    if not dry_run and report['messages']:
+        expired.delete()
+    return report
+
+
+def prune(now=None, dry_run=False):
+    """Run every retention step. Returns one report keyed by step."""
+    now = now or timezone.now()
+    return {
+        'notifications': prune_notifications(now, dry_run),
+        'messages_archived': archive_messages(now, dry_run),
+        'archive_dropped': drop_expired_archive(now, dry_run),
+    }
@@ -3,4 +3,6 @@ from . import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
+    # Notifications and chat over one socket (see ClientConsumer)
+    re_path(r'ws/client/$', consumers.ClientConsumer.as_asgi()),
 ]
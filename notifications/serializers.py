@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Notification
+from .models import Broadcast, Notification
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -28,7 +28,9 @@ class NotificationSerializer(serializers.ModelSerializer):
             'read_at',
             'time_ago',
         ]
-        read_only_fields = ['id', 'created_at', 'read_at', 'sender_name', 'sender_image', 'time_ago']
+        # is_read changes only through the mark_read actions, which keep
+        # UnreadCounter in step
+        read_only_fields = ['id', 'is_read', 'created_at', 'read_at', 'sender_name', 'sender_image', 'time_ago']
 
     def get_sender_name(self, obj):
         """Get sender's full name or username"""
@@ -68,3 +70,22 @@ class NotificationSerializer(serializers.ModelSerializer):
             return f"{days}d ago"
         else:
             return obj.created_at.strftime("%b %d, %Y")
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    """Progress of an admin broadcast"""
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Broadcast
+        fields = [
+            'id', 'title', 'message', 'link', 'audience', 'urgency', 'status',
+            'total', 'delivered', 'progress', 'error', 'created_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Percent of recipients written so far"""
+        if obj.status == 'done' or not obj.total:
+            return 100 if obj.status == 'done' else 0
+        return min(100, obj.delivered * 100 // obj.total)
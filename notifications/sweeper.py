@@ -0,0 +1,122 @@
+"""
+Time-based status transitions nobody triggers by hand.
+
+  - insurance enrollments still Active/Pending after their end_date -> Expired
+  - appointments still Pending after their preferred_date           -> Cancelled
+  - treatments In Progress after their tracking window ended        -> Completed
+
+Each transition is one set-based UPDATE on an indexed (status, date) pair,
+preceded by a locking read of the affected rows so the report, the
+dashboard counters and the per-user summary notification all match exactly
+what was changed. Every affected user gets a single summary notification
+for the whole run, not one per row.
+
+Run from cron through ``python manage.py sweep_expired_states`` (daily,
+after midnight); ``--dry-run`` only counts.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from appointment.models import Appointment
+from insurance.models import Enrollment
+from medical.models import Treatment
+from userprofile.dashboard_counters import apply_delta
+
+from .models import Notification
+from .unread import adjust_notifications_many
+from .utils import send_notifications_to_user
+
+logger = logging.getLogger(__name__)
+
+
+def _expired_enrollments(today):
+    return Enrollment.objects.filter(status__in=['Active', 'Pending'], end_date__lt=today)
+
+
+def _stale_appointments(today):
+    return Appointment.objects.filter(status='Pending', preferred_date__lt=today)
+
+
+def _finished_treatments(today):
+    return Treatment.objects.filter(status='In Progress', tracking_end_date__lt=today)
+
+
+def _plural(n, word):
+    return f"{n} {word}{'' if n == 1 else 's'}"
+
+
+# key: (queryset factory, new status, owner fields to notify, summary line)
+TRANSITIONS = {
+    'enrollments_expired': (
+        _expired_enrollments, 'Expired', ('farmer_id',),
+        lambda n: f"{_plural(n, 'insurance enrollment')} reached the end date and expired",
+    ),
+    'appointments_cancelled': (
+        _stale_appointments, 'Cancelled', ('farmer_id', 'veterinarian_id'),
+        lambda n: f"{_plural(n, 'pending appointment request')} passed the requested date and "
+                  f"{'was' if n == 1 else 'were'} cancelled",
+    ),
+    'treatments_completed': (
+        _finished_treatments, 'Completed', ('user_id',),
+        lambda n: f"{_plural(n, 'treatment')} finished the medicine course and "
+                  f"{'was' if n == 1 else 'were'} marked completed",
+    ),
+}
+
+
+def sweep(today=None, dry_run=False):
+    """
+    Apply every transition. Returns a report with the number of rows changed
+    per transition plus ``users_notified``; with ``dry_run`` nothing is
+    written and the counts are what would change.
+    """
+    today = today or timezone.now().date()
+    report = {}
+
+    if dry_run:
+        for key, (queryset, _, _, _) in TRANSITIONS.items():
+            report[key] = queryset(today).count()
+        report['users_notified'] = 0
+        return report
+
+    lines = defaultdict(list)  # user id -> summary lines
+    now = timezone.now()
+    with transaction.atomic():
+        for key, (queryset, new_status, owner_fields, describe) in TRANSITIONS.items():
+            rows = list(queryset(today).select_for_update().values_list('pk', *owner_fields))
+            if not rows:
+                report[key] = 0
+                continue
+            report[key] = queryset(today).update(status=new_status, updated_at=now)
+
+            for position in range(1, len(owner_fields) + 1):
+                for user_id, n in Counter(row[position] for row in rows).items():
+                    lines[user_id].append(describe(n))
+
+            if key == 'treatments_completed':
+                # .update() bypasses the signals that keep under_treatment current
+                for user_id, n in Counter(row[1] for row in rows).items():
+                    apply_delta(user_id, today, under_treatment=-n)
+
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user_id, notification_type='system', title='Records updated',
+                message='; '.join(user_lines) + '.',
+                data={'sweep_date': str(today)},
+            )
+            for user_id, user_lines in lines.items()
+        ], batch_size=500)
+        adjust_notifications_many(dict.fromkeys(lines, 1))
+
+    for notification in notifications:
+        try:
+            send_notifications_to_user(notification.recipient_id, [notification])
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Sweep summary for user %s saved but WebSocket push failed: %s",
+                           notification.recipient_id, exc)
+
+    report['users_notified'] = len(notifications)
+    return report
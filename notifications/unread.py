@@ -0,0 +1,169 @@
+"""
+Denormalized unread counters: notifications and chat messages per user
+(UnreadCounter) and messages per conversation (messaging.ConversationUnread).
+
+Every path that changes what is unread moves the counters with an F()
+UPDATE in the same transaction (no COUNT queries) and, once it commits,
+pushes the new totals to the user's ``notifications_<id>`` group as a small
+``unread_count`` event:
+
+    {"type": "unread_count", "notifications": 3, "messages": 5,
+     "conversation": {"friendship": 12, "unread": 2}}   # only when a chat changed
+
+Counters are only patched for users who have a row. A user without one gets
+it built from live counts on the first read, so a patch never needs to know
+the starting value and a counter that drifted can be fixed by deleting it.
+"""
+import logging
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from .models import Notification, UnreadCounter
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 1000
+
+
+def _moved(field, delta):
+    return Greatest(F(field) + delta, 0)
+
+
+def rebuild(user_id):
+    """
+    Recount one user's unread notifications and messages from the source
+    tables. The counter row is created and locked before counting, so a
+    concurrent rebuild waits on it (and then recounts), and an adjust_*
+    that reaches the row meanwhile waits too instead of being overwritten.
+    """
+    from messaging.models import ConversationUnread, Message
+
+    with transaction.atomic():
+        UnreadCounter.objects.get_or_create(user_id=user_id)
+        counter = UnreadCounter.objects.select_for_update().get(user_id=user_id)
+        notifications = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        per_conversation = dict(
+            Message.objects.filter(
+                Q(friendship__user1_id=user_id) | Q(friendship__user2_id=user_id), is_read=False,
+            ).exclude(sender_id=user_id)
+            .values_list('friendship').annotate(n=Count('id')).order_by()
+        )
+        ConversationUnread.objects.filter(user_id=user_id).exclude(friendship_id__in=per_conversation).delete()
+        ConversationUnread.objects.bulk_create(
+            [
+                ConversationUnread(friendship_id=friendship_id, user_id=user_id, count=n)
+                for friendship_id, n in per_conversation.items()
+            ],
+            update_conflicts=True, unique_fields=['friendship', 'user'], update_fields=['count'],
+        )
+        counter.notifications = notifications
+        counter.messages = sum(per_conversation.values())
+        counter.save(update_fields=['notifications', 'messages', 'updated_at'])
+    return counter
+
+
+def get_unread(user_id):
+    """The user's UnreadCounter, built on first use."""
+    return UnreadCounter.objects.filter(user_id=user_id).first() or rebuild(user_id)
+
+
+def conversation_counts(user_id):
+    """``{friendship_id: unread}`` for the user's conversations with anything unread."""
+    from messaging.models import ConversationUnread
+
+    get_unread(user_id)
+    return dict(
+        ConversationUnread.objects.filter(user_id=user_id, count__gt=0).values_list('friendship_id', 'count')
+    )
+
+
+def adjust_notifications(user_id, delta, push=True):
+    """Move one user's unread notification count by ``delta``."""
+    if not delta:
+        return
+    UnreadCounter.objects.filter(user_id=user_id).update(notifications=_moved('notifications', delta))
+    if push:
+        push_unread([user_id])
+
+
+def adjust_notifications_many(deltas, push=True):
+    """
+    Bulk form for ``{user_id: delta}``: one UPDATE per distinct delta and
+    chunk, so a fan-out where everyone gets +1 costs one statement per chunk.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        for start in range(0, len(user_ids), CHUNK):
+            UnreadCounter.objects.filter(user_id__in=user_ids[start:start + CHUNK]).update(
+                notifications=_moved('notifications', delta),
+            )
+    if push:
+        push_unread([user_id for user_ids in by_delta.values() for user_id in user_ids])
+
+
+def adjust_messages(user_id, friendship_id, delta, push=True):
+    """Move the user's unread count for one conversation, and their total, by ``delta``."""
+    from messaging.models import ConversationUnread
+
+    if not delta:
+        return
+    if UnreadCounter.objects.filter(user_id=user_id).update(messages=_moved('messages', delta)):
+        conversation = ConversationUnread.objects.filter(friendship_id=friendship_id, user_id=user_id)
+        if not conversation.update(count=_moved('count', delta)) and delta > 0:
+            # First unread message in this conversation since the last rebuild
+            try:
+                with transaction.atomic():
+                    ConversationUnread.objects.create(friendship_id=friendship_id, user_id=user_id, count=delta)
+            except IntegrityError:
+                conversation.update(count=F('count') + delta)
+    if push:
+        push_unread([user_id], friendship_id)
+
+
+def message_recipient_id(friendship, sender_id):
+    """The participant of ``friendship`` who did not send the message."""
+    return friendship.user2_id if friendship.user1_id == sender_id else friendship.user1_id
+
+
+def push_unread(user_ids, friendship_id=None):
+    """Send the current counters to each user once the transaction commits."""
+    if user_ids:
+        transaction.on_commit(lambda: _send(list(user_ids), friendship_id))
+
+
+def _send(user_ids, friendship_id=None):
+    from messaging.models import ConversationUnread
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        # Users without a counter row have not loaded a badge yet; nothing to update
+        counters = UnreadCounter.objects.filter(user_id__in=user_ids)
+        if friendship_id is not None:
+            conversations = dict(
+                ConversationUnread.objects.filter(friendship_id=friendship_id, user_id__in=user_ids)
+                .values_list('user_id', 'count')
+            )
+        for counter in counters:
+            event = {
+                'type': 'unread_count',
+                'notifications': counter.notifications,
+                'messages': counter.messages,
+            }
+            if friendship_id is not None:
+                event['conversation'] = {
+                    'friendship': int(friendship_id),
+                    'unread': conversations.get(counter.user_id, 0),
+                }
+            async_to_sync(channel_layer.group_send)(f'notifications_{counter.user_id}', event)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Unread counters for %s saved but WebSocket push failed: %s", user_ids, exc)
@@ -2,13 +2,15 @@ import logging
 
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.utils import timezone
 from .models import Notification
 from .serializers import NotificationSerializer
 
 logger = logging.getLogger(__name__)
 
 
-def create_notification(recipient, notification_type, title, message, link=None, sender=None, data=None):
+def create_notification(recipient, notification_type, title, message, link=None, sender=None, data=None,
+                        emailed=False):
     """
     Create a notification (DB write) and best-effort push via WebSocket.
 
@@ -16,7 +18,18 @@ def create_notification(recipient, notification_type, title, message, link=None,
     notification the next time their client polls /api/v1/notifications/.
     The WebSocket push is a "live update" optimization that fails silently
     if Redis / the channel layer is unavailable.
+
+    Critical types, or everything for users on the "immediate" cadence, are
+    also queued as an e-mail; the rest wait for the digest (notifications.digest).
+    Pass ``emailed=True`` when the caller has already sent its own e-mail.
     """
+    from .digest import emails_immediately, queue_notification_email
+    from .unread import adjust_notifications
+
+    if not emailed and emails_immediately(recipient.pk, notification_type):
+        queue_notification_email(recipient, title, message, link)
+        emailed = True
+
     notification = Notification.objects.create(
         recipient=recipient,
         sender=sender,
@@ -24,8 +37,10 @@ def create_notification(recipient, notification_type, title, message, link=None,
         title=title,
         message=message,
         link=link,
-        data=data
+        data=data,
+        emailed_at=timezone.now() if emailed else None,
     )
+    adjust_notifications(recipient.pk, 1)
 
     # Best-effort real-time push. Never let a transport problem (Redis down,
     # channel layer not configured, etc.) break the caller — the row is saved.
@@ -67,6 +82,26 @@ def send_notification_to_user(user_id, notification):
     )
 
 
+def send_notifications_to_user(user_id, notifications):
+    """
+    Push several notifications to one user in a single channel-layer message.
+    The consumer relays them to the socket one by one (see
+    NotificationConsumer.notification_batch), so clients see ordinary
+    'notification' frames. Raises like send_notification_to_user.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not notifications:
+        return
+
+    async_to_sync(channel_layer.group_send)(
+        f'notifications_{user_id}',
+        {
+            'type': 'notification_batch',
+            'notifications': NotificationSerializer(notifications, many=True).data
+        }
+    )
+
+
 # Specific notification helper functions
 
 def notify_account_approved(user):
@@ -76,7 +111,8 @@ def notify_account_approved(user):
         notification_type='account',
         title='Account Approved',
         message='Your account has been approved! You can now access all features.',
-        link='/dashboard'
+        link='/dashboard',
+        emailed=True,  # ApproveUserView sends the approval e-mail
     )
 
 
@@ -87,7 +123,8 @@ def notify_account_declined(user):
         notification_type='account',
         title='Account Declined',
         message='Your account verification was declined. Please contact support for more information.',
-        link='/profile'
+        link='/profile',
+        emailed=True,  # DeclineUserView sends the decline e-mail
     )
 
 
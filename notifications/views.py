@@ -2,10 +2,12 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.utils import timezone
-from .models import Notification
-from .serializers import NotificationSerializer
-from .utils import create_notification
+from .broadcast import queue_broadcast
+from .models import Broadcast, Notification
+from .serializers import BroadcastSerializer, NotificationSerializer
+from .unread import adjust_notifications, get_unread
 
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -19,11 +21,19 @@ class NotificationViewSet(viewsets.ModelViewSet):
         """Return notifications for the current user"""
         return Notification.objects.filter(recipient=self.request.user)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            if not instance.is_read:
+                adjust_notifications(instance.recipient_id, -1)
+
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread notifications"""
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'unread_count': count})
+        """
+        Get count of unread notifications (one row from the counter table;
+        connected clients get changes pushed as ``unread_count`` events)
+        """
+        return Response({'unread_count': get_unread(request.user.id).notifications})
 
     @action(detail=False, methods=['get'])
     def unread(self, request):
@@ -43,10 +53,12 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        updated = self.get_queryset().filter(is_read=False).update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        with transaction.atomic():
+            updated = self.get_queryset().filter(is_read=False).update(
+                is_read=True,
+                read_at=timezone.now()
+            )
+            adjust_notifications(request.user.id, -updated)
         return Response({
             'message': f'{updated} notifications marked as read',
             'count': updated
@@ -64,7 +76,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def broadcast(self, request):
         """
-        Admin-only: send a notification to many users at once.
+        Admin-only: send a notification to many users at once. Returns 202
+        with a ``broadcast_id``; poll broadcasts/<id>/ for progress.
 
         Body:
           - title (str, required)
@@ -98,45 +111,35 @@ class NotificationViewSet(viewsets.ModelViewSet):
         if urgency not in ('normal', 'important', 'urgent'):
             urgency = 'normal'
 
-        # Resolve recipients (only approved farmers/vets, never the admin themselves)
-        from authentication.models import CustomUser
-        if audience == 'farmers':
-            qs = CustomUser.objects.filter(role='farmer')
-        elif audience == 'vets':
-            qs = CustomUser.objects.filter(role='vet')
-        else:
-            qs = CustomUser.objects.filter(role__in=['farmer', 'vet'])
-        qs = qs.filter(status='approved').exclude(id=request.user.id)
-
-        # Optional: prefix urgent/important titles for instant visual distinction
-        prefix_map = {
-            'urgent': '🚨 URGENT: ',
-            'important': '⚠️ Important: ',
-            'normal': '',
-        }
-        decorated_title = f"{prefix_map[urgency]}{title}"
-
-        sent = 0
-        for user in qs.iterator():
-            create_notification(
-                recipient=user,
-                sender=request.user,
-                notification_type='system',
-                title=decorated_title,
-                message=message,
-                link=link,
-                data={
-                    'urgency': urgency,
-                    'audience': audience,
-                    'broadcast': True,
-                },
-            )
-            sent += 1
+        # Only the Broadcast row is written here; the Notification rows are
+        # bulk-inserted in the background (see notifications.broadcast)
+        broadcast = queue_broadcast(
+            sender=request.user, title=title, message=message,
+            audience=audience, urgency=urgency, link=link,
+        )
 
         return Response({
             'success': True,
-            'message': f'Broadcast delivered to {sent} user(s).',
-            'count': sent,
+            'message': f'Broadcast queued for {broadcast.total} user(s).',
+            'count': broadcast.total,
+            'broadcast_id': broadcast.id,
+            'status': broadcast.status,
             'audience': audience,
             'urgency': urgency,
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'broadcasts/(?P<broadcast_id>\d+)')
+    def broadcast_status(self, request, broadcast_id=None):
+        """Admin-only: progress of a broadcast"""
+        if getattr(request.user, 'role', None) != 'admin':
+            return Response(
+                {'success': False, 'error': 'Only admins can view broadcasts'},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        broadcast = Broadcast.objects.filter(pk=broadcast_id).first()
+        if broadcast is None:
+            return Response(
+                {'success': False, 'error': 'Broadcast not found'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(BroadcastSerializer(broadcast).data)
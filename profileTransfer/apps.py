@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProfiletransferConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'profileTransfer'
+
+    def ready(self):
+        import profileTransfer.signals  # Ownership moves on completed transfers
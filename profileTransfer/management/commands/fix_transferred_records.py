@@ -3,6 +3,7 @@ from django.core.management.base import BaseCommand
 from profileTransfer.models import Transfer
 from vaccination.models import Vaccination
 from medical.models import Treatment
+from userprofile.dashboard_counters import reassign_treatments, reassign_vaccinations
 
 
 class Command(BaseCommand):
@@ -21,12 +22,12 @@ class Command(BaseCommand):
             
             # Update vaccination records
             vaccinations = Vaccination.objects.filter(livestock=livestock).exclude(user=receiver)
-            count = vaccinations.update(user=receiver)
+            count = reassign_vaccinations(vaccinations, receiver)
             fixed_vaccinations += count
             
             # Update treatment records
             treatments = Treatment.objects.filter(livestock=livestock).exclude(user=receiver)
-            count = treatments.update(user=receiver)
+            count = reassign_treatments(treatments, receiver)
             fixed_treatments += count
             
             self.stdout.write(
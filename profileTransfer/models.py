@@ -19,6 +19,19 @@ class Transfer(models.Model):
         ('Rejected', 'Rejected'),
         ('Completed', 'Completed'),
     ]
+
+    # target status: statuses it can be reached from (see backend.transitions)
+    TRANSITIONS = {
+        'Receiver Approved': ('Pending',),
+        'Admin Approved': ('Receiver Approved',),
+        'Completed': ('Admin Approved',),
+        'Rejected': ('Pending', 'Receiver Approved'),
+    }
+    TRANSITION_STAMPS = {
+        'Receiver Approved': 'receiver_approved_at',
+        'Admin Approved': 'admin_approved_at',
+        'Completed': 'completed_at',
+    }
     
     # Relationships
     livestock = models.ForeignKey(
@@ -101,39 +114,39 @@ class Transfer(models.Model):
             if existing_pending:
                 raise ValidationError("This livestock already has a pending transfer")
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can spot changes without re-reading the row
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override save to update timestamps and handle ownership transfer"""
-        # Update timestamps based on status changes
-        if self.pk:  # Existing transfer
-            old_transfer = Transfer.objects.get(pk=self.pk)
-            
-            # Receiver approved
-            if old_transfer.status != 'Receiver Approved' and self.status == 'Receiver Approved':
-                self.receiver_approved_at = timezone.now()
-            
-            # Admin approved
-            if old_transfer.status != 'Admin Approved' and self.status == 'Admin Approved':
-                self.admin_approved_at = timezone.now()
-            
-            # Completed - transfer ownership and related records
-            if old_transfer.status != 'Completed' and self.status == 'Completed':
-                self.completed_at = timezone.now()
-                
-                # Transfer livestock ownership
-                self.livestock.user = self.receiver
-                self.livestock.save()
-                
-                # Transfer all vaccination records
-                from vaccination.models import Vaccination
-                vaccinations = Vaccination.objects.filter(livestock=self.livestock)
-                vaccinations.update(user=self.receiver)
-                
-                # Transfer all treatment records
-                from medical.models import Treatment
-                treatments = Treatment.objects.filter(livestock=self.livestock)
-                treatments.update(user=self.receiver)
-        
+        """Stamp status changes made through save() and move ownership on completion"""
+        previous = getattr(self, '_loaded_status', None) if self.pk else None
+        if self.pk and previous != self.status:
+            stamp = self.TRANSITION_STAMPS.get(self.status)
+            if stamp:
+                setattr(self, stamp, timezone.now())
+            if self.status == 'Completed':
+                self.move_ownership()
+
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
+
+    def move_ownership(self):
+        """
+        Hand the animal and all its vaccination and treatment records to the
+        receiver, carrying the dashboard counters of both farmers along.
+        """
+        from vaccination.models import Vaccination
+        from medical.models import Treatment
+        from userprofile.dashboard_counters import reassign_treatments, reassign_vaccinations
+
+        self.livestock.user = self.receiver
+        self.livestock.save()
+        reassign_vaccinations(Vaccination.objects.filter(livestock=self.livestock), self.receiver)
+        reassign_treatments(Treatment.objects.filter(livestock=self.livestock), self.receiver)
     
     def __str__(self):
         return f"Transfer #{self.id}: {self.livestock.tag_id} from {self.sender.full_name} to {self.receiver.full_name} ({self.status})"
@@ -1,6 +1,7 @@
 # profileTransfer/serializers.py
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from backend.transitions import can_transition
 from .models import Transfer
 from livestockcrud.models import Livestock
 
@@ -113,19 +114,12 @@ class TransferStatusUpdateSerializer(serializers.Serializer):
         transfer = self.context.get('transfer')
         current_status = transfer.status
         
-        # Define valid status transitions
-        valid_transitions = {
-            'Pending': ['Receiver Approved', 'Rejected'],
-            'Receiver Approved': ['Admin Approved', 'Rejected'],
-            'Admin Approved': ['Completed'],
-        }
-        
-        if current_status not in valid_transitions:
+        if not any(current_status in sources for sources in Transfer.TRANSITIONS.values()):
             raise serializers.ValidationError(
                 f"Cannot update transfer with status '{current_status}'"
             )
         
-        if value not in valid_transitions[current_status]:
+        if not can_transition(Transfer, current_status, value):
             raise serializers.ValidationError(
                 f"Invalid status transition from '{current_status}' to '{value}'"
             )
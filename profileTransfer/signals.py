@@ -0,0 +1,11 @@
+from django.dispatch import receiver
+from backend.transitions import status_changed
+from .models import Transfer
+
+
+@receiver(status_changed, sender=Transfer)
+def move_ownership_on_completion(sender, instance, previous, target, **kwargs):
+    # Runs inside the transition's transaction, so a failed move rolls the status back too
+    if target == 'Completed':
+        instance.move_ownership()
+    instance._loaded_status = target
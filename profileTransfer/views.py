@@ -6,7 +6,8 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q, Count
-from django.utils import timezone
+from backend.aggregates import breakdown, status_in
+from backend.transitions import TransitionError, transition
 from django.contrib.auth import get_user_model
 
 from .models import Transfer
@@ -141,33 +142,31 @@ class TransferViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(transfers, many=True)
         return Response(serializer.data)
     
+    def _transition(self, transfer, target, error, sources=None, **changes):
+        """One workflow step as a conditional UPDATE (see backend.transitions)"""
+        try:
+            transition(transfer, target, sources=sources, **changes)
+        except TransitionError:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(transfer).data)
+
     @action(detail=True, methods=['post'])
     def receiver_approve(self, request, pk=None):
         """Receiver approves the transfer"""
         transfer = self.get_object()
         
         # Check if user is the receiver
-        if transfer.receiver != request.user:
+        if transfer.receiver_id != request.user.id:
             return Response(
                 {'error': 'Only the receiver can approve this transfer'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Check if transfer is pending
-        if transfer.status != 'Pending':
-            return Response(
-                {'error': 'Only pending transfers can be approved'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Update status
-        transfer.status = 'Receiver Approved'
-        transfer.receiver_notes = request.data.get('notes', '')
-        transfer.receiver_approved_at = timezone.now()
-        transfer.save()
-        
-        serializer = self.get_serializer(transfer)
-        return Response(serializer.data)
+        return self._transition(
+            transfer, 'Receiver Approved',
+            'Only pending transfers can be approved',
+            receiver_notes=request.data.get('notes', ''),
+        )
     
     @action(detail=True, methods=['post'])
     def receiver_reject(self, request, pk=None):
@@ -175,26 +174,18 @@ class TransferViewSet(viewsets.ModelViewSet):
         transfer = self.get_object()
         
         # Check if user is the receiver
-        if transfer.receiver != request.user:
+        if transfer.receiver_id != request.user.id:
             return Response(
                 {'error': 'Only the receiver can reject this transfer'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Check if transfer is pending
-        if transfer.status != 'Pending':
-            return Response(
-                {'error': 'Only pending transfers can be rejected'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Update status
-        transfer.status = 'Rejected'
-        transfer.receiver_notes = request.data.get('notes', '')
-        transfer.save()
-        
-        serializer = self.get_serializer(transfer)
-        return Response(serializer.data)
+        return self._transition(
+            transfer, 'Rejected',
+            'Only pending transfers can be rejected',
+            sources=['Pending'],
+            receiver_notes=request.data.get('notes', ''),
+        )
     
     @action(detail=True, methods=['post'])
     def admin_approve(self, request, pk=None):
@@ -205,24 +196,12 @@ class TransferViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        transfer = self.get_object()
-        
-        # Check if transfer is receiver approved
-        if transfer.status != 'Receiver Approved':
-            return Response(
-                {'error': 'Only receiver-approved transfers can be admin approved'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Update status
-        transfer.status = 'Admin Approved'
-        transfer.admin_reviewer = request.user
-        transfer.admin_notes = request.data.get('notes', '')
-        transfer.admin_approved_at = timezone.now()
-        transfer.save()
-        
-        serializer = self.get_serializer(transfer)
-        return Response(serializer.data)
+        return self._transition(
+            self.get_object(), 'Admin Approved',
+            'Only receiver-approved transfers can be admin approved',
+            admin_reviewer=request.user,
+            admin_notes=request.data.get('notes', ''),
+        )
     
     @action(detail=True, methods=['post'])
     def admin_reject(self, request, pk=None):
@@ -233,23 +212,13 @@ class TransferViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        transfer = self.get_object()
-        
-        # Check if transfer is receiver approved
-        if transfer.status != 'Receiver Approved':
-            return Response(
-                {'error': 'Only receiver-approved transfers can be admin rejected'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Update status
-        transfer.status = 'Rejected'
-        transfer.admin_reviewer = request.user
-        transfer.admin_notes = request.data.get('notes', '')
-        transfer.save()
-        
-        serializer = self.get_serializer(transfer)
-        return Response(serializer.data)
+        return self._transition(
+            self.get_object(), 'Rejected',
+            'Only receiver-approved transfers can be admin rejected',
+            sources=['Receiver Approved'],
+            admin_reviewer=request.user,
+            admin_notes=request.data.get('notes', ''),
+        )
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
@@ -260,22 +229,11 @@ class TransferViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        transfer = self.get_object()
-        
-        # Check if transfer is admin approved
-        if transfer.status != 'Admin Approved':
-            return Response(
-                {'error': 'Only admin-approved transfers can be completed'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Update status (this will trigger ownership transfer in model save)
-        transfer.status = 'Completed'
-        transfer.completed_at = timezone.now()
-        transfer.save()
-        
-        serializer = self.get_serializer(transfer)
-        return Response(serializer.data)
+        # Ownership moves in the same transaction (profileTransfer.signals)
+        return self._transition(
+            self.get_object(), 'Completed',
+            'Only admin-approved transfers can be completed',
+        )
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -283,22 +241,20 @@ class TransferViewSet(viewsets.ModelViewSet):
         transfer = self.get_object()
         
         # Check if user is the sender
-        if transfer.sender != request.user:
+        if transfer.sender_id != request.user.id:
             return Response(
                 {'error': 'Only the sender can cancel this transfer'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Check if transfer is pending
-        if transfer.status != 'Pending':
+        # Delete only while still pending, so a concurrent approval wins cleanly
+        deleted, _ = Transfer.objects.filter(pk=transfer.pk, status='Pending').delete()
+        if not deleted:
             return Response(
                 {'error': 'Only pending transfers can be cancelled'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Delete the transfer
-        transfer.delete()
-        
         return Response(
             {'message': 'Transfer cancelled successfully'},
             status=status.HTTP_200_OK
@@ -311,32 +267,25 @@ class TransferViewSet(viewsets.ModelViewSet):
         
         if user.role == 'farmer':
             # Stats for sent transfers
-            sent_transfers = Transfer.objects.filter(sender=user)
-            stats = {
-                'total_transfers': sent_transfers.count(),
-                'pending_transfers': sent_transfers.filter(status='Pending').count(),
-                'receiver_approved_transfers': sent_transfers.filter(status='Receiver Approved').count(),
-                'admin_approved_transfers': sent_transfers.filter(status='Admin Approved').count(),
-                'completed_transfers': sent_transfers.filter(status='Completed').count(),
-                'rejected_transfers': sent_transfers.filter(status='Rejected').count(),
-            }
+            transfers = Transfer.objects.filter(sender=user)
         elif user.role == 'admin' or user.is_staff:
             # Stats for all transfers
-            all_transfers = Transfer.objects.all()
-            stats = {
-                'total_transfers': all_transfers.count(),
-                'pending_transfers': all_transfers.filter(status='Pending').count(),
-                'receiver_approved_transfers': all_transfers.filter(status='Receiver Approved').count(),
-                'admin_approved_transfers': all_transfers.filter(status='Admin Approved').count(),
-                'completed_transfers': all_transfers.filter(status='Completed').count(),
-                'rejected_transfers': all_transfers.filter(status='Rejected').count(),
-            }
+            transfers = Transfer.objects.all()
         else:
             return Response(
                 {'error': 'Invalid user role'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        stats = breakdown(transfers, {
+            'total_transfers': None,
+            'pending_transfers': status_in('Pending'),
+            'receiver_approved_transfers': status_in('Receiver Approved'),
+            'admin_approved_transfers': status_in('Admin Approved'),
+            'completed_transfers': status_in('Completed'),
+            'rejected_transfers': status_in('Rejected'),
+        })
+        
         serializer = TransferStatsSerializer(stats)
         return Response(serializer.data)
     
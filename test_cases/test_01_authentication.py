@@ -1,10 +1,12 @@
 """
 Test Plan: Authentication System
-Test IDs : TP-1.1 to TP-1.10
+Test IDs : TP-1.1 to TP-1.11
 API Prefix: /api/v1/auth/
 """
 
 import io
+import shutil
+import tempfile
 from django.test import TestCase, override_settings
 from django.utils import timezone
 from unittest.mock import patch
@@ -12,10 +14,18 @@ from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from PIL import Image
 from authentication.models import (
-    CustomUser, EmailVerificationToken, PhoneOTP, PasswordResetToken
+    CustomUser, EmailVerificationToken, PhoneOTP, PasswordResetToken, AdminKpiSnapshot
 )
 
 
+# Uploaded files go to a throwaway MEDIA_ROOT, removed after this module
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix='test_media_')
+
+
+def tearDownModule():
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+
 def make_nid_image(name='nid.jpg'):
     buf = io.BytesIO()
     Image.new('RGB', (100, 100), color='red').save(buf, format='JPEG')
@@ -51,6 +61,7 @@ def get_token(client, phone, role, password='Test@1234'):
     return resp.data.get('access')
 
 
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class TP1_RegisterTests(TestCase):
     """TP-1.1 & TP-1.2 — Registration"""
 
@@ -160,6 +171,25 @@ class TP1_AdminApprovalTests(TestCase):
         self.assertEqual(self.pending_user.status, 'approved')
 
 
+    # TP-1.11 Admin KPIs come from today's snapshot, patched live by signals
+    @patch('authentication.views._send_account_status_email')
+    def test_tp1_11_admin_kpis_from_snapshots(self, mock_email):
+        url = '/api/v1/auth/admin/dashboard/stats/'
+        stats = self.client.get(url).data['stats']
+        self.assertEqual((stats['pending_reviews'], stats['approved_accounts'], stats['total_registrations']), (1, 0, 1))
+
+        self.client.post(f'/api/v1/auth/admin/users/{self.pending_user.id}/approve/')
+        make_user(username='vet11', email='vet11@gmail.com', phone='9800000012', role='vet', status='pending')
+        snapshot = AdminKpiSnapshot.objects.get(day=timezone.localdate())
+        self.assertEqual((snapshot.pending_total, snapshot.approved_total, snapshot.vets_joined), (1, 1, 1))
+
+        response = self.client.get(url, {'months': 12})
+        self.assertEqual(response.data['stats']['total_registrations'], 2)
+        self.assertEqual(response.data['stats']['active_this_week'], 2)
+        self.assertEqual(response.data['weekly_activity'][-1]['value'], 2)
+        self.assertEqual(len(response.data['monthly_verifications']), 12)
+        self.assertEqual(response.data['monthly_verifications'][-1]['veterinarians'], 1)
+
 class TP1_LoginTests(TestCase):
     """TP-1.7 & TP-1.8 — Login"""
 
@@ -5,14 +5,24 @@ API Prefix: /api/v1/profile/
 """
 
 import io
+import shutil
+import tempfile
 from PIL import Image
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from authentication.models import CustomUser
 from userprofile.models import UserProfile
 
 
+# Uploaded files go to a throwaway MEDIA_ROOT, removed after this module
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix='test_media_')
+
+
+def tearDownModule():
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+
 def make_user(username='farmer2', email='farmer2@gmail.com',
               phone='9800000002', role='farmer', password='Test@1234'):
     user = CustomUser.objects.create_user(
@@ -58,6 +68,7 @@ class TP2_ProfileViewTests(TestCase):
         self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
 
 
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
 class TP2_ProfileEditTests(TestCase):
     """TP-2.2 to TP-2.5 — Edit profile, photo upload/delete"""
 
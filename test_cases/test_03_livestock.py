@@ -1,6 +1,6 @@
 """
 Test Plan: Livestock CRUD Module
-Test IDs : TP-3.1 to TP-3.10
+Test IDs : TP-3.1 to TP-3.12
 API Prefix: /api/v1/livestock/
 """
 
@@ -11,7 +11,7 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from authentication.models import CustomUser
-from livestockcrud.models import Species, Breed, Livestock
+from livestockcrud.models import Species, Breed, Livestock, TagSequence
 
 
 def make_farmer(username='farmer3', email='farmer3@gmail.com', phone='9800000003', password='Test@1234'):
@@ -176,3 +176,23 @@ class TP3_LivestockCRUDTests(TestCase):
         )
         with self.assertRaises(ValidationError):
             livestock.full_clean()
+
+    # TP-3.11 Preview matches the tag assigned on create, and the sequence advances
+    def test_tp3_11_preview_matches_created_tag(self):
+        preview = self.client.get('/api/v1/livestock/livestock/preview-tag-id/').data['tag_id']
+        response = self.client.post(self.list_url, self._valid_payload(), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['tag_id'], preview)
+        next_preview = self.client.get('/api/v1/livestock/livestock/preview-tag-id/').data['tag_id']
+        self.assertEqual(next_preview, TagSequence.format_tag('LF', int(preview[2:]) + 1))
+
+    # TP-3.12 Block reservation is contiguous and seeded past tags already in use
+    def test_tp3_12_reserve_block_of_tag_ids(self):
+        Livestock.objects.create(
+            user=self.farmer, tag_id='LF00041', species=self.species,
+            breed=self.breed, date_of_birth=date.today() - timedelta(days=100),
+            gender='Male',
+        )
+        tag_ids = TagSequence.next_tag_ids(self.farmer, count=3)
+        self.assertEqual(tag_ids, ['LF00042', 'LF00043', 'LF00044'])
+        self.assertEqual(TagSequence.next_tag_ids(self.farmer), ['LF00045'])
@@ -1,15 +1,18 @@
 """
 Test Plan: Medical History and Treatment
-Test IDs : TP-4.1 to TP-4.10
+Test IDs : TP-4.1 to TP-4.16
 API Prefix: /api/v1/medical/treatments/
 """
 
 from datetime import date, timedelta
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from authentication.models import CustomUser
 from livestockcrud.models import Species, Breed, Livestock
-from medical.models import Treatment, Medicine
+from django.utils import timezone
+from medical.models import Treatment, Medicine, MedicineDose
 
 
 def make_farmer(username='medfarmer', email='medfarmer@gmail.com', phone='9800000004', password='Test@1234'):
@@ -39,7 +42,7 @@ def make_livestock(farmer):
 
 
 class TP4_TreatmentTests(TestCase):
-    """TP-4.1 to TP-4.10 — Medical / Treatment CRUD"""
+    """TP-4.1 to TP-4.16 — Medical / Treatment CRUD"""
 
     def setUp(self):
         self.client = APIClient()
@@ -217,3 +220,157 @@ class TP4_TreatmentTests(TestCase):
         # Treatment model with next_treatment_date in past should be caught by application logic
         # The date is stored without API-level validation; serializer doesn't enforce this
         self.assertLess(treatment.next_treatment_date, treatment.treatment_date)
+
+    # TP-4.11 tracking_end_date follows the longest medicine course; active_tracking is a range query
+    def test_tp4_11_tracking_end_date_and_active_tracking(self):
+        payload = self._valid_payload()
+        payload['treatment_date'] = str(date.today() - timedelta(days=4))
+        payload['next_treatment_date'] = str(date.today() + timedelta(days=3))
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['tracking_end_date'], str(date.today() + timedelta(days=1)))
+        self.assertTrue(response.data['is_active_tracking'])
+
+        treatment = Treatment.objects.get(pk=response.data['id'])
+        treatment.medicines.filter(duration=5).delete()
+        treatment.refresh_from_db()
+        self.assertEqual(treatment.tracking_end_date, date.today() - timedelta(days=1))
+
+        response = self.client.get(f'{self.url}active_tracking/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+        treatment.treatment_date = date.today() - timedelta(days=1)
+        treatment.save()
+        response = self.client.get(f'{self.url}active_tracking/')
+        self.assertEqual([row['id'] for row in response.data], [treatment.id])
+
+    # TP-4.12 alerts endpoint buckets treatments by next_treatment_date in one query
+    def test_tp4_12_alert_buckets(self):
+        def make(name, days):
+            return Treatment.objects.create(
+                livestock=self.livestock, user=self.farmer,
+                treatment_name=name, diagnosis='d', vet_name='Dr. A',
+                treatment_date=date.today() - timedelta(days=30),
+                next_treatment_date=date.today() + timedelta(days=days),
+            )
+        make('Late', -2)
+        make('Now', 0)
+        make('Tomorrow', 1)
+        make('Week', 7)
+        make('Unbucketed', 5)
+
+        # JWT user lookup, treatments, medicines prefetch
+        with self.assertNumQueries(3):
+            response = self.client.get(f'{self.url}alerts/')
+        self.assertEqual(response.status_code, 200)
+        names = {key: [row['treatment_name'] for row in rows] for key, rows in response.data.items()}
+        self.assertEqual(names, {
+            'overdue': ['Late'], 'today': ['Now'], 'day_1': ['Tomorrow'], 'day_3': [], 'day_7': ['Week'],
+        })
+
+    def _medicine(self, name, duration=3):
+        return {
+            'name': name, 'dosage': '1 tab', 'frequency': 1, 'duration': duration,
+            'schedule_type': 'interval', 'start_time': '08:00:00', 'interval_hours': 24,
+        }
+
+    # TP-4.13 Update diffs medicines by id with a constant number of queries
+    def test_tp4_13_update_diffs_medicines(self):
+        def count_update_queries(n):
+            payload = self._valid_payload()
+            payload['medicines'] = [self._medicine(f'Med {i}') for i in range(n)]
+            created = self.client.post(self.url, payload, format='json').data
+            meds = created['medicines']
+            meds[0]['dosage'] = '2 tabs'                  # changed
+            body = {'medicines': meds[:-1] + [self._medicine('New', duration=9)]}  # last removed, one added
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(f"{self.url}{created['id']}/", body, format='json')
+            self.assertEqual(response.status_code, 200)
+            kept_ids = {m['id'] for m in meds[:-1]}
+            self.assertTrue(kept_ids <= {m['id'] for m in response.data['medicines']})
+            self.assertEqual(len(response.data['medicines']), n)
+            self.assertEqual(Medicine.objects.get(pk=meds[0]['id']).dosage, '2 tabs')
+            self.assertFalse(Medicine.objects.filter(pk=meds[-1]['id']).exists())
+            self.assertEqual(response.data['tracking_end_date'], str(date.today() + timedelta(days=9)))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(count_update_queries(2), count_update_queries(6))
+
+    # TP-4.14 An invalid medicine rejects the whole treatment; nothing is written
+    def test_tp4_14_create_is_atomic(self):
+        payload = self._valid_payload()
+        bad = self._medicine('Bad')
+        bad['interval_hours'] = None
+        payload['medicines'] = [self._medicine('Good'), bad]
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Treatment.objects.exists())
+        self.assertFalse(Medicine.objects.exists())
+
+    # TP-4.15 Treatment create/update materializes the dose timeline, keeping given doses
+    def test_tp4_15_dose_timeline_generated(self):
+        payload = self._valid_payload()
+        payload['medicines'] = [
+            {**self._medicine('Interval', duration=3), 'frequency': 2, 'interval_hours': 12},
+            {**self._medicine('Exact', duration=2), 'frequency': 3, 'schedule_type': 'exact',
+             'exact_times': ['06:00', '14:00', '22:00']},
+        ]
+        created = self.client.post(self.url, payload, format='json').data
+        doses = MedicineDose.objects.filter(treatment_id=created['id'])
+        self.assertEqual(doses.count(), 3 * 2 + 2 * 3)
+        first = doses.filter(medicine__name='Interval').first()
+        self.assertEqual(timezone.localtime(first.scheduled_at).time().hour, 8)
+
+        first.given_at = timezone.now()
+        first.save()
+        meds = created['medicines']
+        meds[0]['duration'] = 1
+        response = self.client.patch(f"{self.url}{created['id']}/", {'medicines': meds}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(doses.count(), 1 * 2 + 2 * 3)
+        self.assertTrue(doses.filter(pk=first.pk, given_at__isnull=False).exists())
+
+        self.client.patch(f"{self.url}{created['id']}/", {'status': 'Completed'}, format='json')
+        self.assertEqual(list(doses.values_list('pk', flat=True)), [first.pk])
+
+    # TP-4.16 Herd-wide due doses (including ones missed earlier today) come from one query;
+    # mark_given updates in bulk
+    def test_tp4_16_due_doses_and_mark_given(self):
+        now = timezone.now()
+        start_of_today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        dose_ids = []
+        for i in range(3):
+            treatment = Treatment.objects.create(
+                livestock=self.livestock, user=self.farmer, treatment_name=f'T{i}',
+                diagnosis='d', vet_name='Dr. A', treatment_date=date.today(),
+            )
+            medicine = Medicine.objects.create(
+                treatment=treatment, name=f'M{i}', dosage='1', frequency=1, start_time='08:00',
+            )
+            scheduled = (
+                (start_of_today - timedelta(hours=1), False),  # yesterday
+                (start_of_today, True),                        # earlier today, not given
+                (now + timedelta(hours=2), True),
+                (now + timedelta(hours=30), False),
+            )
+            for scheduled_at, due in scheduled:
+                dose = MedicineDose.objects.create(
+                    medicine=medicine, treatment=treatment, scheduled_at=scheduled_at,
+                )
+                if due:
+                    dose_ids.append(dose.id)
+
+        # JWT user lookup, page count, dose page
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/medical/doses/due/', {'hours': 6})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(r['id'] for r in response.data['results']), sorted(dose_ids))
+        self.assertEqual(response.data['results'][0]['livestock_tag'], self.livestock.tag_id)
+
+        response = self.client.post('/api/v1/medical/doses/mark_given/', {'ids': dose_ids[:2]}, format='json')
+        self.assertEqual(response.data, {'updated': 2})
+        response = self.client.get('/api/v1/medical/doses/due/', {'hours': 6})
+        self.assertEqual(sorted(r['id'] for r in response.data['results']), sorted(dose_ids[2:]))
+
+        self.assertEqual(self.client.get('/api/v1/medical/doses/due/', {'hours': 0}).status_code, 400)
@@ -1,6 +1,6 @@
 """
 Test Plan: Vaccination Scheduler and Reminder
-Test IDs : TP-5.1 to TP-5.10
+Test IDs : TP-5.1 to TP-5.17
 API Prefix: /api/v1/vaccination/
 """
 
@@ -9,7 +9,8 @@ from django.test import TestCase
 from rest_framework.test import APIClient
 from authentication.models import CustomUser
 from livestockcrud.models import Species, Breed, Livestock
-from vaccination.models import Vaccination
+from vaccination.models import ScheduledVaccination, Vaccination, VaccinationProtocol, Vaccine
+from vaccination.protocols import generate_schedules
 
 
 def make_farmer(username='vacfarmer', email='vacfarmer@gmail.com', phone='9800000005', password='Test@1234'):
@@ -39,7 +40,7 @@ def make_livestock(farmer):
 
 
 class TP5_VaccinationTests(TestCase):
-    """TP-5.1 to TP-5.10 — Vaccination CRUD and status logic"""
+    """TP-5.1 to TP-5.17 — Vaccination CRUD and status logic"""
 
     def setUp(self):
         self.client = APIClient()
@@ -171,3 +172,221 @@ class TP5_VaccinationTests(TestCase):
         self.assertEqual(response.status_code, 201)
         vac = Vaccination.objects.get(vaccine_name='FMD Vaccine B')
         self.assertEqual(vac.vaccine_type, 'Clostridial Vaccine')
+
+    def _make_due_in(self, name, days):
+        return Vaccination.objects.create(
+            livestock=self.livestock, user=self.farmer,
+            vaccine_name=name, vaccine_type='Viral Vaccine',
+            date_given=date.today() - timedelta(days=200),
+            next_due_date=date.today() + timedelta(days=days),
+        )
+
+    # TP-5.11 ?status= filters and ?ordering=days_until_due sorts on the SQL annotations
+    def test_tp5_11_status_filter_and_days_ordering(self):
+        self._make_due_in('Late 3', -3)
+        self._make_due_in('Late 10', -10)
+        self._make_due_in('Today', 0)
+        self._make_due_in('Soon', 4)
+
+        response = self.client.get(self.url, {'status': 'overdue', 'ordering': 'days_until_due'})
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results']
+        self.assertEqual([r['vaccine_name'] for r in rows], ['Late 10', 'Late 3'])
+        self.assertEqual([r['days_until_due'] for r in rows], [-10, -3])
+        self.assertEqual(rows[0]['status_display'], 'Overdue by 10 days')
+
+        response = self.client.get(self.url, {'ordering': '-days_until_due'})
+        self.assertEqual(response.data['results'][0]['vaccine_name'], 'Soon')
+
+        response = self.client.get(self.url, {'status': 'completed'})
+        self.assertEqual([r['status'] for r in response.data['results']], ['completed'])
+
+    # TP-5.12 upcoming/overdue/completed tabs are paginated
+    def test_tp5_12_tab_actions_paginated(self):
+        self._make_due_in('Soon', 4)
+        self._make_due_in('Later', 9)
+        self._make_due_in('Late', -2)
+
+        response = self.client.get(f'{self.url}upcoming/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([r['days_until_due'] for r in response.data['results']], [4, 9])
+
+        response = self.client.get(f'{self.url}overdue/')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['status'], 'overdue')
+
+        response = self.client.get(f'{self.url}completed/')
+        self.assertEqual(response.data['count'], 0)
+
+    def _herd(self, prefix, n, owner=None):
+        return [
+            Livestock.objects.create(
+                user=owner or self.farmer, tag_id=f'{prefix}-{i:03d}', species=self.livestock.species,
+                breed=self.livestock.breed, date_of_birth=date.today() - timedelta(days=300), gender='Female',
+            )
+            for i in range(n)
+        ]
+
+    def _campaign(self, **targets):
+        return {
+            'vaccine_name': 'PPR Vaccine', 'vaccine_type': 'Viral Vaccine',
+            'date_given': str(date.today()), 'next_due_date': str(date.today() + timedelta(days=365)),
+            **targets,
+        }
+
+    # TP-5.13 Campaign over a tag list: per-animal failures, constant query count
+    def test_tp5_13_campaign_by_tags(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        # The first campaign for a new vaccine name also adds it to the catalog
+        Vaccine.resolve('PPR Vaccine', 'Viral Vaccine')
+        neighbour = make_farmer('neigh', 'neigh@gmail.com', '9800000099')
+        foreign = self._herd('NB', 1, owner=neighbour)[0]
+
+        def run(prefix, n):
+            tags = [a.tag_id for a in self._herd(prefix, n)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(f'{self.url}campaign/', self._campaign(
+                    livestock_tags=tags + [foreign.tag_id, 'NOPE-1'],
+                ), format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.data['created'], n)
+            self.assertEqual(
+                {f['tag_id'] for f in response.data['failed']}, {foreign.tag_id, 'NOPE-1'}
+            )
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run('SM', 3), run('LG', 12))
+        self.assertEqual(Vaccination.objects.filter(vaccine_name='PPR Vaccine').count(), 15)
+        self.assertFalse(Vaccination.objects.filter(livestock=foreign).exists())
+
+    # TP-5.14 Campaign over herd filters skips repeats and keeps dashboard counters right
+    def test_tp5_14_campaign_by_filters(self):
+        from userprofile.dashboard_counters import get_counters, live_counts
+
+        get_counters(self.farmer)
+        self._herd('GT', 4)
+        Livestock.objects.filter(tag_id='GT-003').update(is_active=False)
+
+        response = self.client.post(f'{self.url}campaign/', self._campaign(tag_prefix='GT'), format='json')
+        self.assertEqual(response.data['created'], 3)
+        response = self.client.post(f'{self.url}campaign/', self._campaign(all_active=True), format='json')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(len(response.data['failed']), 3)
+
+        counter = get_counters(self.farmer)
+        self.assertEqual(counter.upcoming_vaccinations, live_counts([self.farmer.pk])[self.farmer.pk]['upcoming_vaccinations'])
+        self.assertEqual(counter.upcoming_vaccinations, 4)
+
+        response = self.client.post(f'{self.url}campaign/', self._campaign(), format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def _give(self, animal, name, days_ago):
+        return Vaccination.objects.create(
+            livestock=animal, user=animal.user, vaccine_name=name, vaccine_type='Viral Vaccine',
+            date_given=date.today() - timedelta(days=days_ago),
+            next_due_date=date.today() + timedelta(days=30),
+        )
+
+    # TP-5.15 Protocol schedules: first dose by age, primary course gaps, boosters, upsert
+    def test_tp5_15_protocol_schedule_generation(self):
+        species = self.livestock.species
+        ppr = VaccinationProtocol.objects.create(
+            species=species, vaccine_name='PPR', vaccine_type='Viral Vaccine',
+            first_dose_age_days=90, dose_intervals=[21], booster_interval_days=365,
+        )
+        VaccinationProtocol.objects.create(
+            species=species, vaccine_name='Anthrax', vaccine_type='Bacterial Vaccine',
+            first_dose_age_days=120,
+        )
+        fresh, primed, boosted = self._herd('PR', 3)
+        self._give(primed, 'ppr', 10)
+        self._give(boosted, 'PPR', 40)
+        self._give(boosted, 'PPR', 19)
+        for name in ('Anthrax',):
+            for animal in (fresh, primed, boosted, self.livestock):
+                self._give(animal, name, 5)
+
+        summary = generate_schedules()
+        self.assertEqual(summary['animals'], 4)
+
+        def due(animal):
+            return ScheduledVaccination.objects.get(livestock=animal, protocol=ppr)
+        self.assertEqual(due(fresh).due_date, fresh.date_of_birth + timedelta(days=90))
+        self.assertEqual((due(primed).dose_number, due(primed).due_date), (2, date.today() + timedelta(days=11)))
+        self.assertEqual((due(boosted).dose_number, due(boosted).due_date), (3, date.today() + timedelta(days=346)))
+        self.assertTrue(due(boosted).is_booster)
+        # Single-dose Anthrax course is complete everywhere: nothing scheduled
+        self.assertEqual(ScheduledVaccination.objects.exclude(protocol=ppr).count(), 0)
+
+        self._give(primed, 'PPR', 0)
+        generate_schedules()
+        self.assertEqual(ScheduledVaccination.objects.filter(livestock=primed).count(), 1)
+        self.assertEqual(due(primed).dose_number, 3)
+
+        ppr.is_active = False
+        ppr.save()
+        self.assertEqual(generate_schedules()['cleared'], 4)
+
+    # TP-5.16 Regeneration cost does not grow with the herd; schedule endpoint lists the herd
+    def test_tp5_16_schedule_query_budget_and_endpoint(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        VaccinationProtocol.objects.create(
+            species=self.livestock.species, vaccine_name='PPR', vaccine_type='Viral Vaccine',
+            first_dose_age_days=90, booster_interval_days=365,
+        )
+
+        def regenerate_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(f'{self.url}regenerate_schedule/')
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self._herd('SM', 2)
+        small = regenerate_queries()
+        self._herd('LG', 25)
+        self.assertEqual(regenerate_queries(), small)
+
+        response = self.client.get(f'{self.url}schedule/')
+        self.assertEqual(response.data['count'], 28)
+        self.assertEqual(response.data['results'][0]['vaccine_name'], 'PPR')
+
+    # TP-5.17 Free-text names share one catalog vaccine; search and counts go by vaccine_id
+    def test_tp5_17_vaccine_catalog(self):
+        fmd = Vaccine.objects.create(name='Foot and Mouth Disease (FMD)', vaccine_type='Viral Vaccine')
+        for alias in ('FMD', 'Foot & Mouth'):
+            fmd.aliases.create(alias=alias)
+
+        other = self._herd('CT', 1)[0]
+        self._give(self.livestock, 'fmd vaccine', 40)
+        self._give(other, 'Foot & Mouth', 20)
+        self._give(other, 'FMD', 200)
+        self._give(other, 'Anthrax spore', 10)
+        self.assertEqual(Vaccination.objects.filter(vaccine=fmd).count(), 3)
+        self.assertEqual(Vaccine.objects.count(), 2)
+
+        response = self.client.get(self.url, {'vaccine_name': 'foot and mouth'})
+        self.assertEqual(response.data['count'], 3)
+
+        rows = self.client.get(f'{self.url}by_vaccine/').data
+        self.assertEqual(rows[0]['vaccine'], fmd.id)
+        self.assertEqual((rows[0]['records'], rows[0]['animals']), (3, 2))
+
+        vac = Vaccination.objects.get(vaccine_name='Anthrax spore')
+        response = self.client.patch(f'{self.url}{vac.id}/', {'vaccine_name': 'FMD booster'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['vaccine'], Vaccine.objects.get(name='FMD booster').id)
+
+        # Names made only of filler words stay apart, and a blank filter matches everything
+        self._give(self.livestock, 'Vaccine', 5)
+        self._give(other, 'Shot', 5)
+        self.assertNotEqual(
+            Vaccination.objects.get(vaccine_name='Vaccine').vaccine_id,
+            Vaccination.objects.get(vaccine_name='Shot').vaccine_id,
+        )
+        self.assertEqual(self.client.get(self.url, {'vaccine_name': 'vaccine'}).data['count'], 1)
+        self.assertEqual(self.client.get(self.url, {'vaccine_name': ' '}).data['count'], 6)
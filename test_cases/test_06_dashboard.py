@@ -1,18 +1,23 @@
 """
 Test Plan: Dashboard and Analytics
-Test IDs : TP-6.1 to TP-6.10
+Test IDs : TP-6.1 to TP-6.15
 API Prefix:
   Farmer: /api/v1/profile/farmer/dashboard/
   Vet:    /api/v1/profile/vet/dashboard/
 """
 
 from datetime import date, timedelta
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from authentication.models import CustomUser
 from livestockcrud.models import Species, Breed, Livestock
 from vaccination.models import Vaccination
 from medical.models import Treatment
+from appointment.models import Appointment
+from userprofile import dashboard_counters
+from userprofile.models import FarmerDashboardCounter
 
 
 def make_user(username, email, phone, role='farmer', password='Test@1234'):
@@ -116,6 +121,106 @@ class TP6_FarmerDashboardTests(TestCase):
         self.assertEqual(response.status_code, 200)
 
 
+    def _stats(self):
+        return self.client.get('/api/v1/profile/farmer/dashboard/stats/').data['data']
+
+    # TP-6.11 Stored counters follow creates, edits and deletes
+    def test_tp6_11_counters_follow_writes(self):
+        self.assertEqual(self._stats()['total_livestock'], 1)
+        vac = Vaccination.objects.create(
+            livestock=self.livestock, user=self.farmer,
+            vaccine_name='FMD', vaccine_type='Viral Vaccine',
+            date_given=date.today() - timedelta(days=10),
+            next_due_date=date.today() + timedelta(days=20),
+        )
+        Treatment.objects.create(
+            livestock=self.livestock, user=self.farmer, treatment_name='Fever',
+            diagnosis='Fever', vet_name='Dr. Vet', treatment_date=date.today(),
+        )
+        make_livestock(self.farmer, 'DASH-003', 'Goat')
+        # Patched in place rather than dropped and rebuilt
+        self.assertEqual(FarmerDashboardCounter.objects.get(user=self.farmer).total_livestock, 2)
+        self.assertEqual(self._stats(), {
+            'total_livestock': 2, 'upcoming_vaccinations': 1,
+            'under_treatment': 1, 'overdue_tasks': 0,
+        })
+
+        vac.next_due_date = date.today() - timedelta(days=1)
+        vac.date_given = date.today() - timedelta(days=40)
+        vac.save()
+        Treatment.objects.filter(user=self.farmer).first().delete()
+        stats = self._stats()
+        self.assertEqual((stats['upcoming_vaccinations'], stats['overdue_tasks'], stats['under_treatment']), (0, 1, 0))
+        self.assertEqual(dashboard_counters.rebuild_all(dry_run=True)['mismatched'], [])
+
+    # TP-6.12 Daily rollover moves vaccinations that fell due into overdue
+    def test_tp6_12_counters_daily_rollover(self):
+        Vaccination.objects.create(
+            livestock=self.livestock, user=self.farmer,
+            vaccine_name='FMD', vaccine_type='Viral Vaccine',
+            date_given=date.today() - timedelta(days=30),
+            next_due_date=date.today() - timedelta(days=1),
+        )
+        dashboard_counters.refresh_counter(self.farmer.pk, today=date.today() - timedelta(days=2))
+        counter = FarmerDashboardCounter.objects.get(user=self.farmer)
+        self.assertEqual((counter.upcoming_vaccinations, counter.overdue_vaccinations), (1, 0))
+
+        self.assertEqual(dashboard_counters.rollover(), 1)
+        counter.refresh_from_db()
+        self.assertEqual(counter.as_of, date.today())
+        self.assertEqual((counter.upcoming_vaccinations, counter.overdue_vaccinations), (0, 1))
+
+    # TP-6.13 Completing a transfer moves counters to the receiver
+    def test_tp6_13_counters_follow_transfer(self):
+        from profileTransfer.models import Transfer
+        receiver = make_user('dashreceiver', 'dashreceiver@gmail.com', '9800000068')
+        Vaccination.objects.create(
+            livestock=self.livestock, user=self.farmer,
+            vaccine_name='FMD', vaccine_type='Viral Vaccine',
+            date_given=date.today() - timedelta(days=10),
+            next_due_date=date.today() + timedelta(days=20),
+        )
+        self._stats()
+        dashboard_counters.get_counters(receiver)
+
+        transfer = Transfer.objects.create(
+            livestock=self.livestock, sender=self.farmer, receiver=receiver, reason='Sold',
+        )
+        transfer.status = 'Completed'
+        transfer.save()
+
+        self.assertEqual(self._stats()['total_livestock'], 0)
+        receiver_counters = dashboard_counters.get_counters(receiver)
+        self.assertEqual((receiver_counters.total_livestock, receiver_counters.upcoming_vaccinations), (1, 1))
+        self.assertEqual(dashboard_counters.rebuild_all(dry_run=True)['mismatched'], [])
+
+    # TP-6.14 Chart window is configurable without adding queries
+    def test_tp6_14_chart_months_constant_queries(self):
+        make_livestock(self.farmer, 'DASH-004', 'Goat')
+        Vaccination.objects.create(
+            livestock=self.livestock, user=self.farmer,
+            vaccine_name='FMD', vaccine_type='Viral Vaccine',
+            date_given=date.today(),
+            next_due_date=date.today() + timedelta(days=30),
+        )
+        url = '/api/v1/profile/farmer/dashboard/charts/'
+        with CaptureQueriesContext(connection) as six_months:
+            response = self.client.get(url)
+        monthly = response.data['data']['monthly_vaccinations']
+        self.assertEqual(len(monthly), 6)
+        self.assertEqual(monthly[-1]['completed'], 1)
+        self.assertEqual(
+            sorted((d['name'], d['value']) for d in response.data['data']['livestock_distribution']),
+            [('Cow', 1), ('Goat', 1)]
+        )
+
+        with CaptureQueriesContext(connection) as two_years:
+            response = self.client.get(url, {'months': 24})
+        self.assertEqual(len(response.data['data']['monthly_vaccinations']), 24)
+        self.assertEqual(len(two_years), len(six_months))
+
+        self.assertEqual(self.client.get(url, {'months': 25}).status_code, 400)
+
 class TP6_VetDashboardTests(TestCase):
     """TP-6.5, 6.6, 6.7 — Vet dashboard"""
 
@@ -139,3 +244,35 @@ class TP6_VetDashboardTests(TestCase):
     def test_tp6_7_vet_priority_alerts(self):
         response = self.client.get('/api/v1/profile/vet/dashboard/alerts/')
         self.assertEqual(response.status_code, 200)
+
+    # TP-6.15 Alerts are ranked in the database and paged with a cursor
+    def test_tp6_15_vet_alerts_ranked_and_paged(self):
+        farmer = make_user('alertfarmer', 'alertfarmer@gmail.com', '9800000069')
+        livestock = make_livestock(farmer, 'ALERT-001')
+        Appointment.objects.create(
+            farmer=farmer, veterinarian=self.vet, reason='Checkup', status='Approved',
+            preferred_date=date.today() - timedelta(days=3), preferred_time='10:00',
+        )
+        Appointment.objects.create(
+            farmer=farmer, veterinarian=self.vet, reason='Visit', status='Pending',
+            preferred_date=date.today() + timedelta(days=5), preferred_time='10:00',
+        )
+        for days in (2, 9, 5):
+            Vaccination.objects.create(
+                livestock=livestock, user=farmer,
+                vaccine_name=f'Vac {days}', vaccine_type='Viral Vaccine',
+                date_given=date.today() - timedelta(days=60),
+                next_due_date=date.today() - timedelta(days=days),
+            )
+
+        response = self.client.get('/api/v1/profile/vet/dashboard/alerts/', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([a['days_overdue'] for a in response.data['data']], [9, 5])
+        self.assertIsNotNone(response.data['next_cursor'])
+
+        response = self.client.get('/api/v1/profile/vet/dashboard/alerts/', {
+            'limit': 2, 'cursor': response.data['next_cursor'],
+        })
+        self.assertEqual([a['type'] for a in response.data['data']], ['overdue_vaccination', 'pending_appointment'])
+        self.assertEqual(response.data['data'][1]['priority'], 'medium')
+        self.assertIsNone(response.data['next_cursor'])
@@ -1,15 +1,17 @@
 """
 Test Plan: Vet Appointment Booking
-Test IDs : TP-7.1 to TP-7.10
+Test IDs : TP-7.1 to TP-7.12
 API Prefix: /api/v1/appointments/
 """
 
 from datetime import date, timedelta
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from authentication.models import CustomUser
 from livestockcrud.models import Species, Breed, Livestock
-from appointment.models import Appointment
+from appointment.models import Appointment, VetFarmerRelation
+from backend.transitions import TransitionError, transition
+from notifications.models import Notification, OutboxMessage
 
 
 def make_user(username, email, phone, role='farmer', password='Test@1234'):
@@ -39,7 +41,7 @@ def make_livestock(farmer):
 
 
 class TP7_AppointmentTests(TestCase):
-    """TP-7.1 to TP-7.10 — Appointment booking and management"""
+    """TP-7.1 to TP-7.12 — Appointment booking and management"""
 
     def setUp(self):
         self.client = APIClient()
@@ -172,3 +174,92 @@ class TP7_AppointmentTests(TestCase):
         self.assertEqual(response.status_code, 200)
         results = response.data.get('results', response.data)
         self.assertGreaterEqual(len(results), 1)
+
+    # TP-7.11 Approve/complete/cancel keep the vet-farmer relation table in sync
+    def test_tp7_11_vet_farmer_relation_sync(self):
+        first = Appointment.objects.create(
+            farmer=self.farmer, veterinarian=self.vet,
+            livestock=self.livestock, animal_type='Sheep',
+            reason='Relation 1', preferred_date=date.today() + timedelta(days=2),
+            preferred_time='10:00', status='Pending',
+        )
+        self.assertFalse(VetFarmerRelation.objects.exists())
+
+        self._auth_vet()
+        self.client.post(f'{self.url}{first.id}/approve/')
+        relation = VetFarmerRelation.objects.get(veterinarian=self.vet, farmer=self.farmer)
+        self.assertEqual(relation.appointment_count, 1)
+
+        self.client.post(f'{self.url}{first.id}/complete/')
+        relation.refresh_from_db()
+        self.assertEqual(relation.appointment_count, 1)
+
+        second = Appointment.objects.create(
+            farmer=self.farmer, veterinarian=self.vet,
+            livestock=self.livestock, animal_type='Sheep',
+            reason='Relation 2', preferred_date=date.today() + timedelta(days=3),
+            preferred_time='10:00', status='Approved',
+        )
+        relation.refresh_from_db()
+        self.assertEqual(relation.appointment_count, 2)
+
+        self._auth_farmer()
+        self.client.post(f'{self.url}{second.id}/cancel/')
+        relation.refresh_from_db()
+        self.assertEqual(relation.appointment_count, 1)
+
+        first.delete()
+        self.assertFalse(VetFarmerRelation.objects.exists())
+
+        self._auth_vet()
+        response = self.client.get('/api/v1/profile/vet/dashboard/stats/')
+        self.assertEqual(response.data['data']['total_farmers'], 0)
+
+    # TP-7.12 Workflow steps are conditional UPDATEs: a stale second click loses,
+    # and the vet status endpoint keeps its own narrower set of moves
+    @override_settings(OUTBOX_INLINE_WORKER=False)
+    def test_tp7_12_concurrent_transitions(self):
+        appt = Appointment.objects.create(
+            farmer=self.farmer, veterinarian=self.vet,
+            livestock=self.livestock, animal_type='Sheep',
+            reason='Race', preferred_date=date.today() + timedelta(days=2),
+            preferred_time='10:00', status='Pending',
+        )
+        first, second = Appointment.objects.get(pk=appt.pk), Appointment.objects.get(pk=appt.pk)
+        transition(first, 'Approved')
+        with self.assertRaises(TransitionError) as ctx:
+            transition(second, 'Declined', vet_notes='Too late')
+        self.assertEqual(ctx.exception.current, 'Approved')
+        appt.refresh_from_db()
+        self.assertEqual((appt.status, appt.vet_notes), ('Approved', None))
+        self.assertEqual(VetFarmerRelation.objects.get(farmer=self.farmer).appointment_count, 1)
+
+        self._auth_vet()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.url}{appt.id}/complete/', {'vet_notes': 'Healthy'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'Completed')
+        self.assertTrue(OutboxMessage.objects.filter(recipient=self.farmer.email, status='pending').exists())
+        self.assertTrue(Notification.objects.filter(recipient=self.farmer, title='Appointment completed').exists())
+
+        response = self.client.post(f'{self.url}{appt.id}/complete/')
+        self.assertEqual(response.status_code, 400)
+
+        # The error reports the status the row had when the UPDATE missed
+        self._auth_farmer()
+        response = self.client.post(f'{self.url}{appt.id}/cancel/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Completed appointments cannot be cancelled')
+
+        # Vets decline pending requests; only the farmer can cancel them
+        pending = Appointment.objects.create(
+            farmer=self.farmer, veterinarian=self.vet,
+            livestock=self.livestock, animal_type='Sheep',
+            reason='Pending', preferred_date=date.today() + timedelta(days=3),
+            preferred_time='11:00', status='Pending',
+        )
+        self._auth_vet()
+        response = self.client.patch(f'{self.url}{pending.id}/update_status/', {'status': 'Cancelled'})
+        self.assertEqual(response.status_code, 400)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'Pending')
@@ -1,6 +1,6 @@
 """
 Test Plan: Insurance Module
-Test IDs : TP-8.1 to TP-8.10
+Test IDs : TP-8.1 to TP-8.11
 API Prefix: /api/v1/insurance/
 """
 
@@ -50,7 +50,7 @@ def make_plan(plan_type='basic'):
 
 
 class TP8_InsuranceTests(TestCase):
-    """TP-8.1 to TP-8.10 — Insurance plans and enrollments"""
+    """TP-8.1 to TP-8.11 — Insurance plans and enrollments"""
 
     def setUp(self):
         self.client = APIClient()
@@ -173,3 +173,33 @@ class TP8_InsuranceTests(TestCase):
             'premium_paid': '1500.00',
         }, format='json')
         self.assertEqual(response.status_code, 400)
+
+    # TP-8.11 Claim status only moves along the declared workflow
+    def test_tp8_11_claim_status_workflow(self):
+        from insurance.models import Claim
+        enrollment = Enrollment.objects.create(
+            farmer=self.farmer, livestock=self.livestock, plan=self.plan,
+            start_date=date.today() - timedelta(days=10),
+            end_date=date.today() + timedelta(days=355),
+            premium_paid=1500, status='Active',
+        )
+        claim = Claim.objects.create(
+            enrollment=enrollment, farmer=self.farmer, claim_type='Disease',
+            claim_amount=20000, incident_date=date.today() - timedelta(days=2),
+            incident_location='Barn', description='Fever',
+        )
+        url = f'/api/v1/insurance/claims/{claim.id}/update_status/'
+        self._auth_admin()
+
+        response = self.client.post(url, {'status': 'Paid'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(url, {'status': 'Approved', 'approved_amount': '15000'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        claim.refresh_from_db()
+        self.assertEqual((claim.status, claim.approved_amount), ('Approved', 15000))
+        self.assertIsNotNone(claim.decision_date)
+
+        response = self.client.post(url, {'status': 'Rejected'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Approved', response.data['error'])
@@ -1,6 +1,6 @@
 """
 Test Plan: Ownership Transfer (profileTransfer)
-Test IDs : TP-9.1 to TP-9.10
+Test IDs : TP-9.1 to TP-9.11
 API Prefix: /api/v1/profile-transfer/transfers/
 """
 
@@ -10,6 +10,7 @@ from rest_framework.test import APIClient
 from authentication.models import CustomUser
 from livestockcrud.models import Species, Breed, Livestock
 from profileTransfer.models import Transfer
+from vaccination.models import Vaccination
 
 
 def make_user(username, email, phone, role='farmer', password='Test@1234'):
@@ -39,7 +40,7 @@ def make_livestock(farmer, tag_id='TR-001'):
 
 
 class TP9_TransferTests(TestCase):
-    """TP-9.1 to TP-9.10 — Livestock ownership transfer"""
+    """TP-9.1 to TP-9.11 — Livestock ownership transfer"""
 
     def setUp(self):
         self.client = APIClient()
@@ -171,3 +172,30 @@ class TP9_TransferTests(TestCase):
         self.client.credentials()
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 401)
+
+    # TP-9.11 Completing moves ownership in the same step; saves no longer re-read the row
+    def test_tp9_11_complete_moves_ownership(self):
+        Vaccination.objects.create(
+            livestock=self.livestock, user=self.sender, vaccine_name='Tetanus',
+            vaccine_type='Bacterial Vaccine', date_given=date.today() - timedelta(days=5),
+            next_due_date=date.today() + timedelta(days=360),
+        )
+        transfer = Transfer.objects.create(
+            livestock=self.livestock, sender=self.sender,
+            receiver=self.receiver, reason='Sold', status='Admin Approved',
+        )
+        self._auth_admin()
+        response = self.client.post(f'{self.url}{transfer.id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['completed_at'])
+        self.livestock.refresh_from_db()
+        self.assertEqual(self.livestock.user, self.receiver)
+        self.assertEqual(Vaccination.objects.get(livestock=self.livestock).user, self.receiver)
+
+        response = self.client.post(f'{self.url}{transfer.id}/complete/')
+        self.assertEqual(response.status_code, 400)
+
+        transfer = Transfer.objects.get(pk=transfer.pk)
+        transfer.admin_notes = 'Paperwork filed'
+        with self.assertNumQueries(1):
+            transfer.save()
@@ -1,14 +1,29 @@
 """
 Test Plan: Messaging System
-Test IDs : TP-11.1 to TP-11.10
+Test IDs : TP-11.1 to TP-11.16
 API Prefix: /api/v1/messages/
 """
 
-from django.test import TestCase
+import fcntl
+import json
+import os
+import socket
+import tempfile
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
 from authentication.models import CustomUser
 from friends.models import Friendship
-from messaging.models import Message
+from messaging.buffer import MessageBuffer, recover
+from messaging.models import ConversationUnread, Message, MessageArchive
+from notifications.models import UnreadCounter
+from notifications.retention import archive_messages, drop_expired_archive
+from notifications.unread import rebuild
 
 
 def make_user(username, email, phone, role='farmer', password='Test@1234'):
@@ -29,7 +44,7 @@ def get_token(client, user, password='Test@1234'):
 
 
 class TP11_MessagingTests(TestCase):
-    """TP-11.1 to TP-11.10 — Messaging system"""
+    """TP-11.1 to TP-11.16 — Messaging system"""
 
     def setUp(self):
         self.client = APIClient()
@@ -150,3 +165,204 @@ class TP11_MessagingTests(TestCase):
             'message_type': 'text',
         }, format='json')
         self.assertEqual(response.status_code, 400)
+
+    # TP-11.11 Unread counts are kept per conversation and pushed to the receiver
+    def test_tp11_11_unread_counters(self):
+        other = make_user('msgother', 'msgother@gmail.com', '9800000023')
+        other_friendship = Friendship.objects.create(user1=other, user2=self.vet)
+        Message.objects.create(friendship=other_friendship, sender=other, text='Old message')
+
+        self._auth_vet()
+        # First read builds the counter from existing messages
+        response = self.client.get(f'{self.url}unread_count/', {'by_conversation': 1})
+        self.assertEqual(response.data, {'unread_count': 1, 'conversations': {str(other_friendship.id): 1}})
+        # A second rebuild (parallel first loads) upserts the per-conversation rows
+        self.assertEqual(rebuild(self.vet.id).messages, 1)
+        self.assertEqual(ConversationUnread.objects.get(user=self.vet, friendship=other_friendship).count, 1)
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f'notifications_{self.vet.id}', channel)
+        self._auth_farmer()
+        with self.captureOnCommitCallbacks(execute=True):
+            for text in ('One', 'Two', 'Three'):
+                self.client.post(self.url, {'friendship': self.friendship.id, 'text': text}, format='json')
+        event = async_to_sync(layer.receive)(channel)
+        self.assertEqual(event['type'], 'unread_count')
+        self.assertEqual(event['messages'], 4)
+        self.assertEqual(event['conversation'], {'friendship': self.friendship.id, 'unread': 3})
+
+        self._auth_vet()
+        first = Message.objects.filter(friendship=self.friendship).first()
+        self.client.post(f'{self.url}{first.id}/mark_read/')
+        self.client.post(f'{self.url}{first.id}/mark_read/')
+        self.assertEqual(UnreadCounter.objects.get(user=self.vet).messages, 3)
+        self.client.post(f'{self.url}mark_all_read/', {'friendship_id': self.friendship.id}, format='json')
+        response = self.client.get(f'{self.url}unread_count/', {'by_conversation': 1})
+        self.assertEqual(response.data, {'unread_count': 1, 'conversations': {str(other_friendship.id): 1}})
+
+        # Unfriending takes the conversation's unread messages off the total
+        other_friendship.delete()
+        self.assertEqual(UnreadCounter.objects.get(user=self.vet).messages, 0)
+        self.assertFalse(ConversationUnread.objects.filter(user=self.vet, count__gt=0).exists())
+
+    # TP-11.12 Old months move to the archive, stay readable, and expire whole
+    @override_settings(MESSAGE_HOT_MONTHS=6, MESSAGE_ARCHIVE_MONTHS=6)
+    def test_tp11_12_message_archive(self):
+        now = timezone.now()
+        for days_ago, text in ((430, 'Very old'), (250, 'Old one'), (245, 'Old two'), (3, 'Recent')):
+            msg = Message.objects.create(friendship=self.friendship, sender=self.farmer, text=text)
+            Message.objects.filter(pk=msg.pk).update(created_at=now - timedelta(days=days_ago))
+        self._auth_vet()
+        self.assertEqual(self.client.get(f'{self.url}unread_count/').data['unread_count'], 4)
+
+        self.assertEqual(archive_messages(now, dry_run=True)['messages'], 3)
+        report = archive_messages(now)
+        self.assertEqual(report['messages'], 3)
+        self.assertEqual(list(Message.objects.values_list('text', flat=True)), ['Recent'])
+        self.assertEqual(MessageArchive.objects.count(), 3)
+        # Archived messages no longer count as unread
+        self.assertEqual(self.client.get(f'{self.url}unread_count/').data['unread_count'], 1)
+
+        response = self.client.get(f'{self.url}archive/', {'friendship_id': self.friendship.id})
+        self.assertEqual([m['text'] for m in response.data], ['Very old', 'Old one', 'Old two'])
+        response = self.client.get(f'{self.url}archive/', {
+            'friendship_id': self.friendship.id, 'before': response.data[1]['created_at'],
+        })
+        self.assertEqual([m['text'] for m in response.data], ['Very old'])
+        stranger_token = get_token(self.client, self.stranger)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {stranger_token}')
+        response = self.client.get(f'{self.url}archive/', {'friendship_id': self.friendship.id})
+        self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(drop_expired_archive(now)['messages'], 1)
+        self.assertEqual(
+            list(MessageArchive.objects.values_list('text', flat=True)), ['Old one', 'Old two'],
+        )
+        self.friendship.delete()
+        self.assertFalse(MessageArchive.objects.exists())
+
+    # TP-11.13 Write-behind: ids and timestamps are fixed when a message is sent, rows arrive on flush
+    def test_tp11_13_write_behind_buffer(self):
+        Message.objects.create(friendship=self.friendship, sender=self.vet, text='Before')
+        self._auth_vet()
+        self.client.get(f'{self.url}unread_count/')
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            buffer = MessageBuffer(log_dir=log_dir, id_block=2)
+            sent = [buffer.add(self.friendship, self.farmer, text, 'text') for text in ('One', 'Two', 'Three')]
+            self.assertEqual(len({m.id for m in sent}), 3)
+            self.assertFalse(Message.objects.filter(id__in=[m.id for m in sent]).exists())
+            # Logged before it is acknowledged
+            segments = list(Path(log_dir).glob('*.jsonl'))
+            self.assertEqual(len(segments), 1)
+            self.assertEqual(len(segments[0].read_text().splitlines()), 3)
+
+            self.assertTrue(buffer.flush())
+            self.assertFalse(list(Path(log_dir).glob('*.jsonl')))
+
+        stored = {m.id: m for m in Message.objects.filter(id__in=[m.id for m in sent])}
+        for message in sent:
+            self.assertEqual(stored[message.id].text, message.text)
+            self.assertEqual(stored[message.id].created_at, message.created_at)
+        self.assertEqual(UnreadCounter.objects.get(user=self.vet).messages, 3)
+        # Normal inserts never reuse a reserved id, even the unused one in the block
+        later = Message.objects.create(friendship=self.friendship, sender=self.farmer, text='Later')
+        self.assertGreater(later.id, max(m.id for m in sent) + 1)
+
+    # TP-11.14 Recovery replays a dead process's log once and skips what was already written
+    def test_tp11_14_write_behind_recovery(self):
+        written = Message.objects.create(friendship=self.friendship, sender=self.farmer, text='Written')
+        now = timezone.now() - timedelta(minutes=1)
+        records = [
+            {'id': written.id, 'friendship': self.friendship.id, 'sender': self.farmer.id,
+             'text': 'Written', 'message_type': 'text', 'created_at': written.created_at.isoformat()},
+            {'id': written.id + 100, 'friendship': self.friendship.id, 'sender': self.farmer.id,
+             'text': 'Lost in a crash', 'message_type': 'text', 'created_at': now.isoformat()},
+        ]
+        with tempfile.TemporaryDirectory() as log_dir:
+            # Same pid as this process: left by an earlier process with that pid
+            path = Path(log_dir) / f'{socket.gethostname()}-{os.getpid()}-000001.jsonl'
+            path.write_text(''.join(json.dumps(r) + '\n' for r in records) + '{"id": 1, "frien')
+
+            self.assertEqual(recover(log_dir), {'segments': 1, 'messages': 1})
+            self.assertFalse(path.exists())
+            self.assertEqual(recover(log_dir), {'segments': 0, 'messages': 0})
+
+        recovered = Message.objects.get(id=written.id + 100)
+        self.assertEqual(recovered.text, 'Lost in a crash')
+        self.assertEqual(recovered.created_at, now)
+        self.assertEqual(Message.objects.filter(friendship=self.friendship).count(), 2)
+
+    # TP-11.15 A message the database refuses is set aside instead of holding back the rest
+    def test_tp11_15_write_behind_dead_letter(self):
+        self._auth_vet()
+        self.client.get(f'{self.url}unread_count/')
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            buffer = MessageBuffer(log_dir=log_dir)
+            good = buffer.add(self.friendship, self.farmer, 'Fine', 'text')
+            buffer.add(self.friendship, self.farmer, None, 'text')  # NOT NULL violation
+            later = buffer.add(self.friendship, self.farmer, 'Also fine', 'text')
+
+            buffer.close()
+            self.assertFalse(list(Path(log_dir).glob('*.jsonl')))
+            self.assertFalse(list(Path(log_dir).glob('*.lock')))
+            dead = list((Path(log_dir) / 'dead').glob('*.jsonl'))
+            self.assertEqual(len(dead), 1)
+            self.assertIsNone(json.loads(dead[0].read_text())['text'])
+
+            # Recovery does the same with a dead process's segment
+            bad = {'id': later.id + 100, 'friendship': self.friendship.id, 'sender': self.farmer.id,
+                   'text': 'No date', 'message_type': 'text', 'created_at': None}
+            fine = dict(bad, id=later.id + 101, text='Replayed', created_at=timezone.now().isoformat())
+            path = Path(log_dir) / f'{socket.gethostname()}-{os.getpid()}-000009.jsonl'
+            path.write_text(json.dumps(bad) + '\n' + json.dumps(fine) + '\n')
+            self.assertEqual(recover(log_dir), {'segments': 1, 'messages': 1})
+            self.assertFalse(path.exists())
+            self.assertTrue((Path(log_dir) / 'dead' / path.name).exists())
+
+        self.assertEqual(
+            sorted(Message.objects.filter(id__gte=good.id).values_list('text', flat=True)),
+            ['Also fine', 'Fine', 'Replayed'],
+        )
+        self.assertEqual(UnreadCounter.objects.get(user=self.vet).messages, 3)
+
+    # TP-11.16 Recovery goes by the writer's lock, so another host's log is replayed once it is gone
+    def test_tp11_16_write_behind_recovery_ownership(self):
+        def record(n, text):
+            return {'id': 900000 + n, 'friendship': self.friendship.id, 'sender': self.farmer.id,
+                    'text': text, 'message_type': 'text', 'created_at': timezone.now().isoformat()}
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            log = Path(log_dir)
+            # A crashed container: other hostname, lock file left unlocked
+            (log / 'old-container-7-000001.jsonl').write_text(json.dumps(record(1, 'From a dead host')) + '\n')
+            (log / 'old-container-7.lock').touch()
+            # A live writer elsewhere still holds its lock
+            (log / 'live-container-8-000001.jsonl').write_text(json.dumps(record(2, 'Still buffered')) + '\n')
+            holder = open(log / 'live-container-8.lock', 'a')
+            fcntl.flock(holder, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # A replay that died after claiming its segment
+            (log / 'old-container-7-000002.recovering').write_text(json.dumps(record(3, 'Half replayed')) + '\n')
+
+            try:
+                self.assertEqual(recover(log_dir), {'segments': 2, 'messages': 2})
+                self.assertEqual(
+                    sorted(p.name for p in log.iterdir()),
+                    ['live-container-8-000001.jsonl', 'live-container-8.lock', 'old-container-7.lock'],
+                )
+                # A replay in progress elsewhere keeps its claimed segment
+                claimed = log / 'live-container-8-000001.recovering'
+                (log / 'live-container-8-000001.jsonl').rename(claimed)
+                with open(claimed) as replaying:
+                    fcntl.flock(replaying, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self.assertEqual(recover(log_dir), {'segments': 0, 'messages': 0})
+            finally:
+                holder.close()
+            self.assertEqual(recover(log_dir), {'segments': 1, 'messages': 1})
+
+        self.assertEqual(
+            sorted(Message.objects.filter(id__gte=900000).values_list('text', flat=True)),
+            ['From a dead host', 'Half replayed', 'Still buffered'],
+        )
@@ -0,0 +1,104 @@
+"""
+Test Plan: Stats Endpoint Query Budget
+Test IDs : TP-13.1 to TP-13.5
+Each stats/counts endpoint answers with a single aggregate query
+(plus the one JWT user lookup every authenticated request makes).
+"""
+
+from datetime import date, timedelta
+from django.test import TestCase
+from rest_framework.test import APIClient
+from authentication.models import CustomUser
+from livestockcrud.models import Species, Breed, Livestock
+from vaccination.models import Vaccination
+from medical.models import Treatment
+from appointment.models import Appointment
+
+# JWT user lookup + the aggregate query
+STATS_QUERY_BUDGET = 2
+
+
+def make_user(username, email, phone, role='farmer', password='Test@1234'):
+    user = CustomUser.objects.create_user(
+        username=username, email=email, phone=phone,
+        full_name='Stats User', address='Pokhara', role=role, password=password,
+    )
+    user.status = 'approved'
+    user.is_email_verified = True
+    user.is_phone_verified = True
+    user.save()
+    return user
+
+
+def get_token(client, user, password='Test@1234'):
+    resp = client.post('/api/v1/auth/login/', {'phone': user.phone, 'password': password, 'role': user.role}, format='json')
+    return resp.data.get('access')
+
+
+class TP13_StatsQueryTests(TestCase):
+    """TP-13.1 to TP-13.5 — one round trip per stats call"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.farmer = make_user('statsfarmer', 'statsfarmer@gmail.com', '9800000131')
+        self.vet = make_user('statsvet', 'statsvet@gmail.com', '9800000132', role='vet')
+        token = get_token(self.client, self.farmer)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        species = Species.objects.create(name='Buffalo')
+        breed = Breed.objects.create(name='Murrah', species=species)
+        self.livestock = Livestock.objects.create(
+            user=self.farmer, tag_id='STATS-001', species=species, breed=breed,
+            date_of_birth=date.today() - timedelta(days=700), gender='Female',
+        )
+
+    def _get(self, url):
+        with self.assertNumQueries(STATS_QUERY_BUDGET):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    # TP-13.1 Appointment stats
+    def test_tp13_1_appointment_stats(self):
+        for status_value in ['Pending', 'Approved', 'Declined', 'Cancelled']:
+            Appointment.objects.create(
+                farmer=self.farmer, veterinarian=self.vet, reason='Stats',
+                preferred_date=date.today() + timedelta(days=2), preferred_time='10:00',
+                status=status_value,
+            )
+        data = self._get('/api/v1/appointments/stats/')
+        self.assertEqual(data, {'upcoming': 1, 'pending': 1, 'completed': 0, 'cancelled': 2, 'total': 4})
+
+    # TP-13.2 Transfer stats
+    def test_tp13_2_transfer_stats(self):
+        data = self._get('/api/v1/profile-transfer/transfers/stats/')
+        self.assertEqual(data['total_transfers'], 0)
+
+    # TP-13.3 Claim stats
+    def test_tp13_3_claim_stats(self):
+        data = self._get('/api/v1/insurance/claims/stats/')
+        self.assertEqual(data['total_claims'], 0)
+
+    # TP-13.4 Vaccination tab counts
+    def test_tp13_4_vaccination_counts(self):
+        for due in (-3, 0, 10):
+            Vaccination.objects.create(
+                livestock=self.livestock, user=self.farmer,
+                vaccine_name='HS', vaccine_type='Bacterial Vaccine',
+                date_given=date.today() - timedelta(days=30),
+                next_due_date=date.today() + timedelta(days=due),
+            )
+        data = self._get('/api/v1/vaccination/counts/')
+        self.assertEqual((data['upcoming'], data['overdue'], data['due_today']), (1, 1, 1))
+
+    # TP-13.5 Treatment deadline counts
+    def test_tp13_5_treatment_counts(self):
+        for days in (-1, 3, 30):
+            Treatment.objects.create(
+                livestock=self.livestock, user=self.farmer, treatment_name='Check',
+                diagnosis='Routine', vet_name='Dr. Stats',
+                treatment_date=date.today() - timedelta(days=5),
+                next_treatment_date=date.today() + timedelta(days=days),
+            )
+        data = self._get('/api/v1/medical/treatments/counts/')
+        self.assertEqual(data, {'overdue': 1, 'due_today': 0, 'due_soon': 1, 'on_track': 1, 'total': 3})
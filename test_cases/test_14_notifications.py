@@ -0,0 +1,624 @@
+"""
+Test Plan: Notifications and Due-Date Reminders
+Test IDs : TP-14.1 to TP-14.13
+Reminder engine: notifications.reminders / send_due_reminders
+State sweeper  : notifications.sweeper / sweep_expired_states
+Mail outbox    : notifications.outbox / run_outbox_worker
+Digests        : notifications.digest / send_notification_digests
+Broadcasts     : notifications.broadcast / run_broadcasts
+Unread counters: notifications.unread
+Retention      : notifications.retention / prune_history
+Client socket  : notifications.consumers.ClientConsumer (ws/client/)
+"""
+
+from datetime import date, timedelta
+from smtplib import SMTPRecipientsRefused
+from unittest.mock import patch
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.test.utils import CaptureQueriesContext
+from authentication.models import CustomUser
+from friends.models import Friendship
+from messaging.models import Message
+from livestockcrud.models import Species, Breed, Livestock
+from vaccination.models import Vaccination
+from medical.models import Treatment, Medicine
+from appointment.models import Appointment
+from notifications.models import Broadcast, Notification, OutboxMessage, Reminder, UnreadCounter
+from notifications.broadcast import role_group, run_pending
+from notifications.consumers import ClientConsumer
+from notifications.outbox import deliver_batch, drain, queue_email
+from notifications.digest import send_digests
+from notifications.utils import create_notification
+from userprofile.models import UserProfile
+from notifications.reminders import send_due_reminders
+from notifications.sweeper import sweep
+from notifications.retention import prune_notifications
+from notifications.unread import get_unread
+from insurance.models import InsurancePlan, Enrollment
+from userprofile.dashboard_counters import get_counters, live_counts
+from userprofile.models import FarmerDashboardCounter
+
+
+def make_user(username, email, phone, role='farmer', password='Test@1234'):
+    user = CustomUser.objects.create_user(
+        username=username, email=email, phone=phone,
+        full_name='Notify User', address='Chitwan', role=role, password=password,
+    )
+    user.status = 'approved'
+    user.is_email_verified = True
+    user.is_phone_verified = True
+    user.save()
+    return user
+
+
+class TP14_ReminderTests(TestCase):
+    """TP-14.1 to TP-14.2 — due-date reminders"""
+
+    def setUp(self):
+        self.today = date.today()
+        self.vet = make_user('notifyvet', 'notifyvet@gmail.com', '9800000141', role='vet')
+        self.species = Species.objects.create(name='Yak')
+        self.breed = Breed.objects.create(name='Highland', species=self.species)
+
+    def _farm(self, n):
+        """A farmer with one animal and one of each kind of due item."""
+        farmer = make_user(f'notifyfarmer{n}', f'notifyfarmer{n}@gmail.com', f'98000014{n:02d}')
+        animal = Livestock.objects.create(
+            user=farmer, tag_id=f'NTF-{n:03d}', species=self.species, breed=self.breed,
+            date_of_birth=self.today - timedelta(days=500), gender='Female',
+        )
+        for name, due in (('FMD', 1), ('PPR', -2), ('HS', 30), ('BQ', -40)):
+            Vaccination.objects.create(
+                livestock=animal, user=farmer, vaccine_name=name, vaccine_type='Viral Vaccine',
+                date_given=self.today - timedelta(days=90), next_due_date=self.today + timedelta(days=due),
+            )
+        Treatment.objects.create(
+            livestock=animal, user=farmer, treatment_name='Deworming', diagnosis='Worms',
+            vet_name='Dr. Y', treatment_date=self.today - timedelta(days=10), next_treatment_date=self.today,
+        )
+        Appointment.objects.create(
+            farmer=farmer, veterinarian=self.vet, livestock=animal, animal_type='Yak',
+            reason='Checkup', preferred_date=self.today + timedelta(days=2),
+            preferred_time='09:30', status='Approved',
+        )
+        return farmer
+
+    # TP-14.1 Items in the window are reminded once; re-runs and racing runs send nothing
+    def test_tp14_1_reminders_sent_once(self):
+        farmer = self._farm(1)
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f'notifications_{farmer.id}', channel)
+
+        summary = send_due_reminders(today=self.today, window_days=3, lookback_days=7)
+        # FMD due, PPR overdue, treatment due, appointment for farmer and vet
+        self.assertEqual(summary['sent'], 5)
+        self.assertEqual(summary['recipients'], 2)
+        self.assertEqual(
+            sorted(Notification.objects.filter(recipient=farmer).values_list('title', flat=True)),
+            ['Treatment follow-up due', 'Upcoming appointment', 'Vaccination due', 'Vaccination overdue'],
+        )
+        self.assertEqual(Reminder.objects.count(), 5)
+
+        pushed = async_to_sync(layer.receive)(channel)
+        self.assertEqual(pushed['type'], 'notification_batch')
+        self.assertEqual(len(pushed['notifications']), 4)
+
+        again = send_due_reminders(today=self.today, window_days=3, lookback_days=7)
+        self.assertEqual((again['sent'], again['already_sent']), (0, 5))
+        self.assertEqual(Notification.objects.count(), 5)
+
+        # A run that read the ledger before this one committed claims nothing
+        with patch('notifications.reminders._sent_keys', return_value=set()):
+            racing = send_due_reminders(today=self.today, window_days=3, lookback_days=7)
+        self.assertEqual((racing['sent'], racing['already_sent']), (0, 5))
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertFalse(Reminder.objects.filter(notification__isnull=True).exists())
+
+    # TP-14.2 A run costs the same number of queries for 1 user or many
+    def test_tp14_2_bounded_queries(self):
+        def run():
+            Reminder.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                send_due_reminders(today=self.today, window_days=3, lookback_days=7)
+            return len(ctx.captured_queries)
+
+        self._farm(1)
+        single = run()
+        for n in range(2, 8):
+            self._farm(n)
+        self.assertEqual(run(), single)
+
+
+class TP14_SweeperTests(TestCase):
+    """TP-14.3 to TP-14.4 — automatic state sweeper"""
+
+    def setUp(self):
+        self.today = date.today()
+        self.farmer = make_user('sweepfarmer', 'sweepfarmer@gmail.com', '9800000151')
+        self.vet = make_user('sweepvet', 'sweepvet@gmail.com', '9800000152', role='vet')
+        species = Species.objects.create(name='Buffalo')
+        breed = Breed.objects.create(name='Murrah', species=species)
+        self.animal = Livestock.objects.create(
+            user=self.farmer, tag_id='SWP-001', species=species, breed=breed,
+            date_of_birth=self.today - timedelta(days=800), gender='Female',
+        )
+        self.plan = InsurancePlan.objects.create(
+            name='Basic Cover', plan_type='basic', coverage_amount=50000, premium_amount=1500,
+            description='Death cover',
+        )
+
+        def enrollment(start, end, status):
+            return Enrollment.objects.create(
+                farmer=self.farmer, livestock=self.animal, plan=self.plan, status=status,
+                start_date=self.today + timedelta(days=start), end_date=self.today + timedelta(days=end),
+                premium_paid=1500,
+            )
+
+        def appointment(day, status):
+            return Appointment.objects.create(
+                farmer=self.farmer, veterinarian=self.vet, livestock=self.animal, animal_type='Buffalo',
+                reason='Checkup', preferred_date=self.today + timedelta(days=day),
+                preferred_time='10:00', status=status,
+            )
+
+        def treatment(started, course_days, status='In Progress'):
+            item = Treatment.objects.create(
+                livestock=self.animal, user=self.farmer, treatment_name='Mastitis', diagnosis='Udder',
+                vet_name='Dr. S', treatment_date=self.today - timedelta(days=started), status=status,
+            )
+            Medicine.objects.create(
+                treatment=item, name='Ceftiofur', dosage='5ml', frequency=1,
+                duration=course_days, start_time='08:00',
+            )
+            return item
+
+        self.expired = [enrollment(-400, -35, 'Active'), enrollment(-30, -1, 'Pending')]
+        self.current = enrollment(-10, 355, 'Active')
+        self.stale = [appointment(-3, 'Pending'), appointment(-1, 'Pending')]
+        self.kept = [appointment(0, 'Pending'), appointment(-2, 'Approved')]
+        self.finished = treatment(started=20, course_days=5)
+        self.ongoing = treatment(started=2, course_days=7)
+
+    # TP-14.3 Dry run counts without writing; a real run applies every transition
+    def test_tp14_3_transitions_applied(self):
+        expected = {'enrollments_expired': 2, 'appointments_cancelled': 2, 'treatments_completed': 1}
+
+        preview = sweep(today=self.today, dry_run=True)
+        self.assertEqual(preview, {**expected, 'users_notified': 0})
+        self.assertEqual(Enrollment.objects.filter(status='Expired').count(), 0)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(sweep(today=self.today), {**expected, 'users_notified': 2})
+        self.assertEqual(
+            set(Enrollment.objects.filter(status='Expired').values_list('pk', flat=True)),
+            {e.pk for e in self.expired},
+        )
+        self.current.refresh_from_db()
+        self.assertEqual(self.current.status, 'Active')
+        self.assertEqual(
+            set(Appointment.objects.filter(status='Cancelled').values_list('pk', flat=True)),
+            {a.pk for a in self.stale},
+        )
+        self.assertEqual([a.status for a in Appointment.objects.filter(pk__in=[a.pk for a in self.kept])
+                          .order_by('preferred_date')], ['Approved', 'Pending'])
+        self.finished.refresh_from_db()
+        self.ongoing.refresh_from_db()
+        self.assertEqual((self.finished.status, self.ongoing.status), ('Completed', 'In Progress'))
+
+    # TP-14.4 One summary per user, counters kept in step, and a re-run is a no-op
+    def test_tp14_4_single_summary_and_idempotent(self):
+        self.assertEqual(get_counters(self.farmer).under_treatment, 2)
+
+        sweep(today=self.today)
+        farmer_notes = Notification.objects.filter(recipient=self.farmer)
+        self.assertEqual(farmer_notes.count(), 1)
+        message = farmer_notes.get().message
+        self.assertIn('2 insurance enrollments', message)
+        self.assertIn('2 pending appointment requests', message)
+        self.assertIn('1 treatment finished', message)
+        vet_note = Notification.objects.get(recipient=self.vet)
+        self.assertNotIn('insurance', vet_note.message)
+
+        counter = FarmerDashboardCounter.objects.get(user=self.farmer)
+        self.assertEqual(counter.under_treatment, 1)
+        self.assertEqual(counter.under_treatment, live_counts([self.farmer.id], self.today)[self.farmer.id]['under_treatment'])
+
+        again = sweep(today=self.today)
+        self.assertEqual(again, {'enrollments_expired': 0, 'appointments_cancelled': 0,
+                                 'treatments_completed': 0, 'users_notified': 0})
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class CountingBackend(locmem.EmailBackend):
+    """locmem backend that counts connections opened."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class BouncingBackend(locmem.EmailBackend):
+    """locmem backend that refuses every address at bounce.example."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith('@bounce.example') for to in message.to):
+                raise SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+@override_settings(OUTBOX_INLINE_WORKER=False, OUTBOX_RETRY_BASE_SECONDS=30, OUTBOX_MAX_ATTEMPTS=3)
+class TP14_OutboxTests(TestCase):
+    """TP-14.5 to TP-14.6 — e-mail / SMS outbox"""
+
+    # TP-14.5 Requesting a login OTP only queues the mail; the worker sends a batch over one connection
+    @override_settings(EMAIL_BACKEND='test_cases.test_14_notifications.CountingBackend')
+    def test_tp14_5_otp_queued_then_delivered(self):
+        user = make_user('outboxfarmer', 'outboxfarmer@gmail.com', '9800000161')
+        for n in range(3):
+            queue_email(f'digest{n}@gmail.com', 'Weekly digest', 'Body')
+
+        response = APIClient().post('/api/v1/auth/login/send-otp/', {
+            'email': user.email, 'phone': user.phone, 'password': 'Test@1234', 'role': 'farmer',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        otp = OutboxMessage.objects.get(recipient=user.email)
+        self.assertEqual((otp.status, otp.priority), ('pending', OutboxMessage.PRIORITY_URGENT))
+
+        CountingBackend.opened = 0
+        report = deliver_batch()
+        self.assertEqual((report['claimed'], report['sent']), (4, 4))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(mail.outbox[0].to, [user.email])
+        self.assertEqual(mail.outbox[0].subject, 'Login Verification Code')
+        self.assertEqual(OutboxMessage.objects.filter(status='sent').count(), 4)
+        self.assertEqual(deliver_batch()['claimed'], 0)
+
+    # TP-14.6 Failures back off exponentially and are dead-lettered; expired leases are reclaimed
+    @override_settings(EMAIL_BACKEND='test_cases.test_14_notifications.BouncingBackend')
+    def test_tp14_6_retry_backoff_dead_letter(self):
+        bounced = queue_email('nobody@bounce.example', 'Hello', 'Body')
+        fine = queue_email('farmer@gmail.com', 'Hello', 'Body')
+
+        now = timezone.now()
+        report = deliver_batch(now=now)
+        self.assertEqual((report['sent'], report['retrying']), (1, 1))
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), ('pending', 1))
+        self.assertIn('No such user', bounced.last_error)
+        self.assertAlmostEqual((bounced.next_attempt_at - now).total_seconds(), 30, delta=5)
+
+        self.assertEqual(deliver_batch(now=now + timedelta(seconds=10))['claimed'], 0)
+        deliver_batch(now=now + timedelta(seconds=40))
+        bounced.refresh_from_db()
+        self.assertAlmostEqual((bounced.next_attempt_at - now).total_seconds(), 100, delta=10)
+
+        report = deliver_batch(now=now + timedelta(minutes=5))
+        bounced.refresh_from_db()
+        self.assertEqual((report['dead'], bounced.status, bounced.attempts), (1, 'dead', 3))
+        self.assertEqual(deliver_batch(now=now + timedelta(days=1))['claimed'], 0)
+
+        # A row left 'sending' by a crashed worker is picked up once its lease runs out
+        stuck = queue_email('farmer@gmail.com', 'Again', 'Body')
+        OutboxMessage.objects.filter(pk=stuck.pk).update(status='sending', attempts=1, next_attempt_at=now)
+        self.assertEqual(drain()['sent'], 1)
+        fine.refresh_from_db()
+        self.assertEqual(fine.status, 'sent')
+
+
+@override_settings(OUTBOX_INLINE_WORKER=False)
+class TP14_DigestTests(TestCase):
+    """TP-14.7 to TP-14.8 — notification e-mail cadence and digests"""
+
+    def _user(self, n, cadence, enabled=True):
+        user = make_user(f'digestuser{n}', f'digestuser{n}@gmail.com', f'98000017{n:02d}')
+        UserProfile.objects.filter(user=user).update(email_cadence=cadence, email_notifications=enabled)
+        return user
+
+    def _mailed_to(self, user):
+        return OutboxMessage.objects.filter(recipient=user.email).count()
+
+    # TP-14.7 Only critical types go out immediately, unless the user asked for everything or nothing
+    def test_tp14_7_immediate_emails_follow_preferences(self):
+        daily, instant, off, disabled = (
+            self._user(1, 'daily'), self._user(2, 'immediate'), self._user(3, 'off'), self._user(4, 'daily', False),
+        )
+        for user in (daily, instant, off, disabled):
+            create_notification(user, 'vaccination', 'Vaccination due', 'FMD is due tomorrow.', link='/vaccination')
+            create_notification(user, 'transfer', 'New Transfer Request', 'You have a transfer request.')
+
+        self.assertEqual(
+            [self._mailed_to(u) for u in (daily, instant, off, disabled)], [1, 2, 0, 0],
+        )
+        self.assertEqual(
+            list(Notification.objects.filter(recipient=daily, emailed_at__isnull=True)
+                 .values_list('notification_type', flat=True)),
+            ['vaccination'],
+        )
+
+    # TP-14.8 One digest per user covering all unread, un-mailed notifications; never twice
+    def test_tp14_8_digest_per_user(self):
+        users = [self._user(n, 'daily') for n in range(1, 4)]
+        hourly = self._user(9, 'hourly')
+        for user in users + [hourly]:
+            for i in range(3):
+                create_notification(user, 'medical', f'Treatment update {i}', 'Dose given.', link='/medical')
+        read = Notification.objects.filter(recipient=users[0]).first()
+        read.mark_as_read()
+
+        self.assertEqual(send_digests('daily', dry_run=True), {'users': 3, 'notifications': 8})
+        self.assertEqual(OutboxMessage.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            report = send_digests('daily')
+        self.assertEqual(report, {'users': 3, 'notifications': 8})
+        self.assertLessEqual(len(ctx.captured_queries), 6)
+        digest = OutboxMessage.objects.get(recipient=users[0].email)
+        self.assertEqual(digest.subject, 'You have 2 new LHMMS updates')
+        self.assertIn('Treatment update', digest.html_body)
+        self.assertFalse(Notification.objects.filter(recipient__in=users, is_read=False, emailed_at__isnull=True).exists())
+        self.assertEqual(self._mailed_to(hourly), 0)
+
+        self.assertEqual(send_digests('daily'), {'users': 0, 'notifications': 0})
+        self.assertEqual(send_digests('hourly')['users'], 1)
+        drain()
+        self.assertEqual(len(mail.outbox), 4)
+
+
+@override_settings(BROADCAST_INLINE_WORKER=False, OUTBOX_INLINE_WORKER=False, BROADCAST_CHUNK_SIZE=2)
+class TP14_BroadcastTests(TestCase):
+    """TP-14.9 to TP-14.10 — admin broadcasts fanned out in the background"""
+
+    def setUp(self):
+        self.admin = make_user('castadmin', 'castadmin@gmail.com', '9800001900', role='admin')
+        self.farmers = [
+            make_user(f'castfarmer{n}', f'castfarmer{n}@gmail.com', f'98000019{n:02d}') for n in range(1, 6)
+        ]
+        self.vet = make_user('castvet', 'castvet@gmail.com', '9800001950', role='vet')
+        pending = make_user('castpending', 'castpending@gmail.com', '9800001960')
+        CustomUser.objects.filter(pk=pending.pk).update(status='pending')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _listen(self, role):
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(role_group(role), channel)
+        return layer, channel
+
+    # TP-14.9 The request only queues; the worker inserts in chunks and pushes once per role
+    def test_tp14_9_broadcast_fan_out(self):
+        layer, channel = self._listen('farmer')
+        response = self.client.post('/api/v1/notifications/broadcast/', {
+            'title': 'Vaccination camp', 'message': 'Free FMD shots on Friday.',
+            'audience': 'farmers', 'urgency': 'important',
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(Notification.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(run_pending(), 1)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)  # 5 farmers, 2 per chunk
+
+        self.assertEqual(
+            sorted(Notification.objects.values_list('recipient_id', flat=True)),
+            sorted(f.pk for f in self.farmers),
+        )
+        notification = Notification.objects.first()
+        self.assertEqual(notification.title, '⚠️ Important: Vaccination camp')
+        self.assertEqual(notification.data['broadcast_id'], response.data['broadcast_id'])
+
+        pushed = async_to_sync(layer.receive)(channel)
+        self.assertEqual(pushed['type'], 'notification_broadcast')
+        self.assertIsNone(pushed['notification']['id'])
+
+        status = self.client.get(f"/api/v1/notifications/broadcasts/{response.data['broadcast_id']}/")
+        self.assertEqual((status.data['status'], status.data['delivered'], status.data['progress']), ('done', 5, 100))
+        self.client.force_authenticate(self.vet)
+        status = self.client.get(f"/api/v1/notifications/broadcasts/{response.data['broadcast_id']}/")
+        self.assertEqual(status.status_code, 403)
+
+    # TP-14.10 An interrupted run resumes after its last chunk without duplicates
+    def test_tp14_10_broadcast_resumes(self):
+        broadcast = Broadcast.objects.create(
+            sender=self.admin, title='Heat wave', message='Keep animals shaded.', audience='all',
+            total=6, delivered=2, last_recipient_id=self.farmers[1].pk, status='running',
+        )
+        Notification.objects.bulk_create([
+            Notification(recipient=f, notification_type='system', title='Heat wave', message='Keep animals shaded.')
+            for f in self.farmers[:2]
+        ])
+        # Heartbeat is fresh: another worker still owns it
+        self.assertEqual(run_pending(), 0)
+
+        Broadcast.objects.filter(pk=broadcast.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(run_pending(), 1)
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.delivered), ('done', 6))
+        self.assertEqual(
+            sorted(Notification.objects.values_list('recipient_id', flat=True)),
+            sorted([f.pk for f in self.farmers] + [self.vet.pk]),
+        )
+
+
+@override_settings(OUTBOX_INLINE_WORKER=False)
+class TP14_UnreadCounterTests(TestCase):
+    """TP-14.11 — denormalized unread notification counter"""
+
+    # TP-14.11 Every change moves the counter and is pushed; the endpoint reads one row
+    def test_tp14_11_unread_counter(self):
+        user = make_user('unreaduser', 'unreaduser@gmail.com', '9800001990')
+        Notification.objects.create(recipient=user, notification_type='system', title='Old', message='Before counters')
+        client = APIClient()
+        client.force_authenticate(user)
+        self.assertEqual(client.get('/api/v1/notifications/unread_count/').data, {'unread_count': 1})
+
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)(f'notifications_{user.id}', channel)
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_notification(user, 'medical', 'Dose given', 'Second dose recorded.')
+            create_notification(user, 'medical', 'Dose given', 'Third dose recorded.')
+        frames = [async_to_sync(layer.receive)(channel) for _ in range(3)]
+        self.assertEqual(
+            [f['type'] for f in frames], ['notification_message', 'notification_message', 'unread_count'],
+        )
+        self.assertEqual(frames[-1]['notifications'], 3)
+
+        # Marking twice only counts once; deleting a read one changes nothing
+        self.assertTrue(first.mark_as_read())
+        self.assertFalse(Notification.objects.get(pk=first.pk).mark_as_read())
+        client.delete(f'/api/v1/notifications/{first.pk}/')
+        self.assertEqual(UnreadCounter.objects.get(user=user).notifications, 2)
+        # is_read only changes through mark_read, which keeps the counter in step
+        other = Notification.objects.filter(recipient=user, is_read=False).first()
+        client.patch(f'/api/v1/notifications/{other.pk}/', {'is_read': True}, format='json')
+        self.assertFalse(Notification.objects.get(pk=other.pk).is_read)
+        self.assertEqual(UnreadCounter.objects.get(user=user).notifications, 2)
+        client.post('/api/v1/notifications/mark_all_read/')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/v1/notifications/unread_count/')
+        self.assertEqual(response.data, {'unread_count': 0})
+        self.assertEqual(
+            len([q for q in ctx.captured_queries if 'notifications_notification' in q['sql']]), 0,
+        )
+
+
+@override_settings(
+    OUTBOX_INLINE_WORKER=False, NOTIFICATION_MAX_AGE_DAYS=365,
+    NOTIFICATION_RETENTION_DAYS={'system': 30, 'appointment': 180},
+)
+class TP14_RetentionTests(TestCase):
+    """TP-14.12 — notification retention"""
+
+    # TP-14.12 Read notifications expire per type; anything over the maximum age goes
+    def test_tp14_12_notification_retention(self):
+        user = make_user('retainuser', 'retainuser@gmail.com', '9800001995')
+        now = timezone.now()
+
+        def notification(kind, days_ago, read):
+            n = Notification.objects.create(
+                recipient=user, notification_type=kind, title=f'{kind} {days_ago}', message='-', is_read=read,
+            )
+            Notification.objects.filter(pk=n.pk).update(created_at=now - timedelta(days=days_ago))
+
+        notification('system', 40, True)        # read, past system retention
+        notification('system', 40, False)       # unread: kept until the maximum age
+        notification('system', 10, True)        # read, still within retention
+        notification('appointment', 40, True)   # appointments are kept longer
+        notification('appointment', 400, False)  # over the maximum age, unread
+        reminder_target = Notification.objects.get(title='system 40', is_read=True)
+        Reminder.objects.create(
+            source='vaccination', object_id=1, due_date=date.today(), stage='due',
+            recipient=user, notification=reminder_target,
+        )
+        self.assertEqual(get_unread(user.id).notifications, 2)
+
+        self.assertEqual(prune_notifications(now, dry_run=True), {'read_expired': 1, 'too_old': 1})
+        self.assertEqual(prune_notifications(now), {'read_expired': 1, 'too_old': 1})
+        self.assertEqual(
+            sorted(Notification.objects.values_list('title', 'is_read')),
+            [('appointment 40', True), ('system 10', True), ('system 40', False)],
+        )
+        self.assertIsNone(Reminder.objects.get().notification)
+        self.assertEqual(UnreadCounter.objects.get(user=user).notifications, 1)
+        self.assertEqual(prune_notifications(now), {'read_expired': 0, 'too_old': 0})
+
+
+@override_settings(OUTBOX_INLINE_WORKER=False)
+class TP14_ClientSocketTests(TransactionTestCase):
+    """TP-14.13 — notifications and chat over one multiplexed socket"""
+
+    def setUp(self):
+        self.farmer = make_user('sockfarmer', 'sockfarmer@gmail.com', '9800001991')
+        self.vet = make_user('sockvet', 'sockvet@gmail.com', '9800001992', role='vet')
+        self.neighbour = make_user('sockneighbour', 'sockneighbour@gmail.com', '9800001993')
+        self.with_vet = Friendship.objects.create(user1=self.farmer, user2=self.vet)
+        self.with_neighbour = Friendship.objects.create(user1=self.farmer, user2=self.neighbour)
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(ClientConsumer.as_asgi(), '/ws/client/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())['type'], 'connection_established')
+        return communicator
+
+    async def _subscribe(self, communicator, friendship_id):
+        await communicator.send_json_to({'type': 'subscribe', 'friendship_id': friendship_id})
+        return await communicator.receive_json_from()
+
+    # TP-14.13 One socket follows notifications and several chats; subscriptions are checked
+    # and undelivered messages are reported
+    async def test_tp14_13_multiplexed_socket(self):
+        farmer = await self._connect(self.farmer)
+        vet = await self._connect(self.vet)
+        neighbour = await self._connect(self.neighbour)
+        for friendship in (self.with_vet, self.with_neighbour):
+            self.assertEqual(
+                await self._subscribe(farmer, friendship.id), {'type': 'subscribed', 'friendship_id': friendship.id},
+            )
+        await self._subscribe(neighbour, self.with_neighbour.id)
+
+        # Someone else's conversation can be neither followed nor written to
+        self.assertEqual(
+            await self._subscribe(vet, self.with_neighbour.id),
+            {'type': 'error', 'friendship_id': self.with_neighbour.id, 'error': 'not_a_member'},
+        )
+        await vet.send_json_to({'type': 'chat', 'friendship_id': self.with_neighbour.id, 'text': 'Hi'})
+        self.assertEqual((await vet.receive_json_from())['error'], 'not_subscribed')
+        await self._subscribe(vet, self.with_vet.id)
+
+        await vet.send_json_to({'type': 'chat', 'friendship_id': self.with_vet.id, 'text': 'Dose is due'})
+        await neighbour.send_json_to({'type': 'chat', 'friendship_id': self.with_neighbour.id, 'text': 'Tractor?'})
+        frames = [await farmer.receive_json_from() for _ in range(2)]
+        self.assertEqual(
+            sorted((f['type'], f['friendship_id'], f['message']['text']) for f in frames),
+            sorted([
+                ('chat_message', self.with_vet.id, 'Dose is due'),
+                ('chat_message', self.with_neighbour.id, 'Tractor?'),
+            ]),
+        )
+        self.assertEqual((await vet.receive_json_from())['message']['text'], 'Dose is due')
+
+        # Notifications share the socket
+        await database_sync_to_async(create_notification)(self.farmer, 'medical', 'Dose given', 'Recorded.')
+        self.assertEqual((await farmer.receive_json_from())['notification']['title'], 'Dose given')
+
+        await farmer.send_json_to({'type': 'unsubscribe', 'friendship_id': self.with_neighbour.id})
+        self.assertEqual((await farmer.receive_json_from())['type'], 'unsubscribed')
+        # An unknown message_type from the client is stored as text
+        await neighbour.send_json_to({
+            'type': 'chat', 'friendship_id': self.with_neighbour.id, 'text': 'Hello?', 'message_type': 'x' * 40,
+        })
+        self.assertEqual((await neighbour.receive_json_from())['message']['text'], 'Tractor?')
+        hello = (await neighbour.receive_json_from())['message']
+        self.assertEqual((hello['text'], hello['message_type']), ('Hello?', 'text'))
+        self.assertTrue(await farmer.receive_nothing())
+
+        # A message that cannot be stored is reported, so the client can use REST
+        await Friendship.objects.filter(id=self.with_vet.id).adelete()
+        await vet.send_json_to({'type': 'chat', 'friendship_id': self.with_vet.id, 'text': 'Still there?'})
+        self.assertEqual(
+            await vet.receive_json_from(),
+            {'type': 'error', 'friendship_id': self.with_vet.id, 'error': 'not_saved'},
+        )
+
+        for communicator in (farmer, vet, neighbour):
+            await communicator.disconnect()
+        self.assertEqual(await Message.objects.filter(friendship=self.with_neighbour).acount(), 2)
@@ -1,11 +1,11 @@
 from django.contrib import admin
-from .models import UserProfile
+from .models import FarmerDashboardCounter, UserProfile
 
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'gender', 'location', 'theme', 'language', 'created_at', 'updated_at']
-    list_filter = ['gender', 'theme', 'language', 'email_notifications', 'push_notifications', 'created_at']
+    list_filter = ['gender', 'theme', 'language', 'email_notifications', 'email_cadence', 'push_notifications', 'created_at']
     search_fields = ['user__username', 'user__email', 'user__full_name', 'location', 'bio']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -17,7 +17,7 @@ class UserProfileAdmin(admin.ModelAdmin):
             'fields': ('bio', 'location', 'gender', 'profile_image')
         }),
         ('Preferences', {
-            'fields': ('theme', 'language', 'email_notifications', 'push_notifications')
+            'fields': ('theme', 'language', 'email_notifications', 'email_cadence', 'push_notifications')
         }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
@@ -28,3 +28,10 @@ class UserProfileAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('user')
+
+
+@admin.register(FarmerDashboardCounter)
+class FarmerDashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ['user', 'total_livestock', 'upcoming_vaccinations', 'overdue_vaccinations', 'under_treatment', 'as_of']
+    search_fields = ['user__username', 'user__full_name']
+    readonly_fields = ['updated_at']
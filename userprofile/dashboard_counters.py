@@ -0,0 +1,240 @@
+"""
+Maintenance of FarmerDashboardCounter rows.
+
+Single-row changes arrive through the model signals in userprofile.signals;
+bulk ``.update()`` paths (transfer completion, record fix-ups) go through the
+``reassign_*`` helpers here so the counters move with the records.
+
+A counter row is only ever patched while its ``as_of`` is today. If a patch
+finds no current row, the row is dropped instead and rebuilt from live counts
+on the next read, so a missed rollover can never leave the counters wrong.
+"""
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from livestockcrud.models import Livestock
+from medical.models import Treatment
+from vaccination.models import Vaccination
+
+from .models import FarmerDashboardCounter
+
+COUNTER_FIELDS = (
+    'total_livestock',
+    'upcoming_vaccinations',
+    'overdue_vaccinations',
+    'under_treatment',
+)
+
+
+def _today():
+    return timezone.now().date()
+
+
+def vaccination_bucket(next_due_date, today=None):
+    """Counter field a vaccination with this due date falls into."""
+    today = today or _today()
+    return 'upcoming_vaccinations' if next_due_date >= today else 'overdue_vaccinations'
+
+
+def live_counts(user_ids=None, today=None):
+    """
+    Counters computed straight from the source tables, keyed by user id.
+    Three grouped queries regardless of how many users are included.
+    """
+    today = today or _today()
+
+    livestock = Livestock.objects.all()
+    vaccinations = Vaccination.objects.all()
+    treatments = Treatment.objects.filter(status='In Progress')
+    if user_ids is not None:
+        livestock = livestock.filter(user_id__in=user_ids)
+        vaccinations = vaccinations.filter(user_id__in=user_ids)
+        treatments = treatments.filter(user_id__in=user_ids)
+
+    counts = {}
+
+    def row(user_id):
+        return counts.setdefault(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+
+    for item in livestock.values('user').annotate(n=Count('id')).order_by():
+        row(item['user'])['total_livestock'] = item['n']
+
+    for item in vaccinations.values('user').annotate(
+        upcoming=Count('id', filter=Q(next_due_date__gte=today)),
+        overdue=Count('id', filter=Q(next_due_date__lt=today)),
+    ).order_by():
+        row(item['user'])['upcoming_vaccinations'] = item['upcoming']
+        row(item['user'])['overdue_vaccinations'] = item['overdue']
+
+    for item in treatments.values('user').annotate(n=Count('id')).order_by():
+        row(item['user'])['under_treatment'] = item['n']
+
+    return counts
+
+
+def refresh_counter(user_id, today=None):
+    """Rebuild one user's counter row from live counts and return it."""
+    today = today or _today()
+    values = live_counts([user_id], today).get(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+    counter, _ = FarmerDashboardCounter.objects.update_or_create(
+        user_id=user_id,
+        defaults={**values, 'as_of': today},
+    )
+    return counter
+
+
+def get_counters(user):
+    """Current counter row for ``user``; built or rolled forward if missing or stale."""
+    today = _today()
+    counter = FarmerDashboardCounter.objects.filter(user=user).first()
+    if counter is None or counter.as_of != today:
+        counter = refresh_counter(user.pk, today)
+    return counter
+
+
+def apply_delta(user_id, today=None, **deltas):
+    """Add ``deltas`` to the user's current counter row in one UPDATE."""
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not user_id or not deltas:
+        return
+    today = today or _today()
+    updated = FarmerDashboardCounter.objects.filter(user_id=user_id, as_of=today).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        invalidate(user_id)
+
+
+def invalidate(user_id):
+    """Drop the user's counter row so the next read rebuilds it."""
+    if not user_id:
+        return
+    FarmerDashboardCounter.objects.filter(user_id=user_id).delete()
+
+
+def move(old, new, today=None):
+    """
+    Move one unit between two ``(user_id, field)`` slots.
+    Either side may be None for a plain increment or decrement.
+    """
+    if old == new:
+        return
+    if old is not None:
+        apply_delta(old[0], today, **{old[1]: -1})
+    if new is not None:
+        apply_delta(new[0], today, **{new[1]: 1})
+
+
+def reassign_vaccinations(queryset, new_user, today=None):
+    """``queryset.update(user=new_user)`` that carries the vaccination counters along."""
+    today = today or _today()
+    breakdown = list(queryset.exclude(user=new_user).values('user').annotate(
+        upcoming=Count('id', filter=Q(next_due_date__gte=today)),
+        overdue=Count('id', filter=Q(next_due_date__lt=today)),
+    ).order_by())
+    updated = queryset.update(user=new_user)
+
+    for item in breakdown:
+        apply_delta(item['user'], today,
+                    upcoming_vaccinations=-item['upcoming'],
+                    overdue_vaccinations=-item['overdue'])
+    apply_delta(new_user.pk, today,
+                upcoming_vaccinations=sum(item['upcoming'] for item in breakdown),
+                overdue_vaccinations=sum(item['overdue'] for item in breakdown))
+    return updated
+
+
+def reassign_treatments(queryset, new_user, today=None):
+    """``queryset.update(user=new_user)`` that carries the under-treatment counter along."""
+    breakdown = list(queryset.exclude(user=new_user).values('user').annotate(
+        in_progress=Count('id', filter=Q(status='In Progress')),
+    ).order_by())
+    updated = queryset.update(user=new_user)
+
+    for item in breakdown:
+        apply_delta(item['user'], today, under_treatment=-item['in_progress'])
+    apply_delta(new_user.pk, today,
+                under_treatment=sum(item['in_progress'] for item in breakdown))
+    return updated
+
+
+def rollover(today=None):
+    """
+    Roll every stale counter row forward to ``today``.
+    Vaccinations whose due date passed since the row's ``as_of`` move from
+    upcoming to overdue. One UPDATE per distinct stale day (normally one).
+    Returns the number of rows rolled.
+    """
+    today = today or _today()
+    stale_days = (
+        FarmerDashboardCounter.objects.filter(as_of__lt=today)
+        .values_list('as_of', flat=True).distinct().order_by()
+    )
+
+    rolled = 0
+    for as_of in list(stale_days):
+        crossed = Coalesce(
+            Subquery(
+                Vaccination.objects.filter(
+                    user=OuterRef('user'),
+                    next_due_date__gte=as_of,
+                    next_due_date__lt=today,
+                ).values('user').annotate(n=Count('id')).values('n')[:1]
+            ),
+            Value(0),
+        )
+        rolled += FarmerDashboardCounter.objects.filter(as_of=as_of).update(
+            upcoming_vaccinations=F('upcoming_vaccinations') - crossed,
+            overdue_vaccinations=F('overdue_vaccinations') + crossed,
+            as_of=today,
+        )
+    return rolled
+
+
+def rebuild_all(today=None, dry_run=False):
+    """
+    Recompute every counter row from live counts.
+    Returns a summary dict; ``mismatched`` lists ``(user_id, field, stored, live)``
+    for every value a current row had drifted on. With ``dry_run`` the stored
+    rows are only compared, not rewritten.
+    """
+    from authentication.models import CustomUser
+
+    today = today or _today()
+    live = live_counts(today=today)
+    stored = {c.user_id: c for c in FarmerDashboardCounter.objects.all()}
+    user_ids = set(CustomUser.objects.filter(role='farmer').values_list('id', flat=True))
+    user_ids |= set(live) | set(stored)
+    zeros = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    summary = {'checked': len(user_ids), 'missing': 0, 'stale': 0, 'mismatched': []}
+    to_create = []
+    to_update = []
+    for user_id in user_ids:
+        values = live.get(user_id, zeros)
+        counter = stored.get(user_id)
+        if counter is None:
+            summary['missing'] += 1
+            to_create.append(FarmerDashboardCounter(user_id=user_id, as_of=today, **values))
+            continue
+        if counter.as_of != today:
+            summary['stale'] += 1
+        else:
+            summary['mismatched'].extend(
+                (user_id, field, getattr(counter, field), values[field])
+                for field in COUNTER_FIELDS
+                if getattr(counter, field) != values[field]
+            )
+        for field in COUNTER_FIELDS:
+            setattr(counter, field, values[field])
+        counter.as_of = today
+        to_update.append(counter)
+
+    if not dry_run:
+        FarmerDashboardCounter.objects.bulk_create(to_create, batch_size=500)
+        FarmerDashboardCounter.objects.bulk_update(
+            to_update, list(COUNTER_FIELDS) + ['as_of'], batch_size=500
+        )
+
+    return summary
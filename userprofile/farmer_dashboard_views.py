@@ -2,13 +2,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from datetime import timedelta
-from collections import defaultdict
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
 
 from livestockcrud.models import Livestock
 from medical.models import Treatment
 from vaccination.models import Vaccination
 
+from .dashboard_counters import get_counters
+
 
 class FarmerDashboardStatsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -18,76 +20,97 @@ class FarmerDashboardStatsView(APIView):
         if user.role != 'farmer':
             return Response({'success': False, 'error': 'Only farmers can access this endpoint'}, status=403)
 
-        today = timezone.now().date()
-
-        total_livestock = Livestock.objects.filter(user=user).count()
-
-        upcoming_vaccinations = Vaccination.objects.filter(
-            user=user, next_due_date__gte=today
-        ).count()
-
-        under_treatment = Treatment.objects.filter(
-            user=user, status='In Progress'
-        ).count()
-
-        overdue_vaccinations = Vaccination.objects.filter(
-            user=user, next_due_date__lt=today
-        ).count()
+        counters = get_counters(user)
 
         return Response({
             'success': True,
             'data': {
-                'total_livestock': total_livestock,
-                'upcoming_vaccinations': upcoming_vaccinations,
-                'under_treatment': under_treatment,
-                'overdue_tasks': overdue_vaccinations,
+                'total_livestock': counters.total_livestock,
+                'upcoming_vaccinations': counters.upcoming_vaccinations,
+                'under_treatment': counters.under_treatment,
+                'overdue_tasks': counters.overdue_vaccinations,
             }
         })
 
 
+def _add_months(month_start, months):
+    """First day of the month ``months`` away from ``month_start`` (may be negative)."""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
 class FarmerDashboardChartsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    DEFAULT_MONTHS = 6
+    MAX_MONTHS = 24
+
     def get(self, request):
         user = request.user
         if user.role != 'farmer':
             return Response({'success': False, 'error': 'Only farmers can access this endpoint'}, status=403)
 
+        try:
+            months = int(request.query_params.get('months', self.DEFAULT_MONTHS))
+        except (TypeError, ValueError):
+            months = 0
+        if not 1 <= months <= self.MAX_MONTHS:
+            return Response(
+                {'success': False, 'error': f'months must be between 1 and {self.MAX_MONTHS}'},
+                status=400
+            )
+
         today = timezone.now().date()
 
         # Livestock distribution by species
-        livestock = Livestock.objects.filter(user=user).select_related('species')
-        species_count = defaultdict(int)
-        for animal in livestock:
-            name = animal.species.name if animal.species else 'Unknown'
-            species_count[name] += 1
-        livestock_distribution = [{'name': k, 'value': v} for k, v in species_count.items()]
-
-        # Monthly vaccination data — last 6 months
-        monthly_data = []
-        for i in range(5, -1, -1):
-            month_start = (today.replace(day=1) - timedelta(days=i * 30)).replace(day=1)
-            if month_start.month == 12:
-                month_end = month_start.replace(year=month_start.year + 1, month=1, day=1)
-            else:
-                month_end = month_start.replace(month=month_start.month + 1, day=1)
-
-            completed = Vaccination.objects.filter(
+        species_counts = (
+            Livestock.objects.filter(user=user)
+            .values('species__name')
+            .annotate(value=Count('id'))
+            .order_by('-value', 'species__name')
+        )
+        livestock_distribution = [
+            {'name': row['species__name'] or 'Unknown', 'value': row['value']}
+            for row in species_counts
+        ]
+
+        # Monthly vaccination data — one grouped query each for completed and overdue
+        current_month = today.replace(day=1)
+        window_start = _add_months(current_month, -(months - 1))
+        window_end = _add_months(current_month, 1)
+
+        completed_by_month = dict(
+            Vaccination.objects.filter(
                 user=user,
-                date_given__gte=month_start,
-                date_given__lt=month_end,
-            ).count()
-
-            overdue = Vaccination.objects.filter(
+                date_given__gte=window_start,
+                date_given__lt=window_end,
+            )
+            .annotate(month=TruncMonth('date_given'))
+            .values('month')
+            .annotate(n=Count('id'))
+            .values_list('month', 'n')
+        )
+
+        overdue_by_month = dict(
+            Vaccination.objects.filter(
                 user=user,
-                next_due_date__gte=month_start,
-                next_due_date__lt=min(month_end, today),
-            ).count()
+                next_due_date__gte=window_start,
+                next_due_date__lt=today,
+            )
+            .annotate(month=TruncMonth('next_due_date'))
+            .values('month')
+            .annotate(n=Count('id'))
+            .values_list('month', 'n')
+        )
 
+        monthly_data = []
+        for i in range(months):
+            month_start = _add_months(window_start, i)
             monthly_data.append({
                 'month': month_start.strftime('%b'),
-                'completed': completed,
-                'overdue': overdue,
+                'year': month_start.year,
+                'completed': completed_by_month.get(month_start, 0),
+                'overdue': overdue_by_month.get(month_start, 0),
             })
 
         return Response({
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from userprofile.dashboard_counters import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuild farmer dashboard counters from live COUNTs and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only',
+            action='store_true',
+            help='Compare stored counters with live COUNTs without rewriting them',
+        )
+
+    def handle(self, *args, **options):
+        verify_only = options['verify_only']
+        summary = rebuild_all(dry_run=verify_only)
+
+        for user_id, field, stored, live in summary['mismatched']:
+            self.stdout.write(self.style.WARNING(
+                f'  user {user_id}: {field} stored={stored} live={live}'
+            ))
+
+        action = 'Checked' if verify_only else 'Rebuilt'
+        message = (
+            f"{action} {summary['checked']} users: "
+            f"{len(summary['mismatched'])} drifted values, "
+            f"{summary['missing']} missing rows, {summary['stale']} stale rows"
+        )
+        if summary['mismatched']:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
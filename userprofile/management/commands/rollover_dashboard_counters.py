@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from userprofile.dashboard_counters import rollover
+
+
+class Command(BaseCommand):
+    help = 'Roll farmer dashboard counters over to today (run once a day, shortly after midnight)'
+
+    def handle(self, *args, **options):
+        rolled = rollover()
+        self.stdout.write(self.style.SUCCESS(f'Rolled {rolled} dashboard counter rows over to today'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0002_userprofile_consultation_fee'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmerDashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_livestock', models.IntegerField(default=0)),
+                ('upcoming_vaccinations', models.IntegerField(default=0)),
+                ('overdue_vaccinations', models.IntegerField(default=0)),
+                ('under_treatment', models.IntegerField(default=0)),
+                ('as_of', models.DateField(help_text='Day the date-dependent counters are valid for.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_counter', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Farmer Dashboard Counter',
+                'verbose_name_plural': 'Farmer Dashboard Counters',
+                'db_table': 'farmer_dashboard_counters',
+                'indexes': [models.Index(fields=['as_of'], name='farmer_dash_as_of_553b7a_idx')],
+            },
+        ),
+    ]
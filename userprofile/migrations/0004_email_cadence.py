@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userprofile', '0003_farmerdashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='email_cadence',
+            field=models.CharField(choices=[('off', 'Off'), ('immediate', 'Immediately'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], default='daily', help_text='How routine notifications are e-mailed (see notifications.digest); email_notifications off stops them all.', max_length=10),
+        ),
+    ]
@@ -25,6 +25,13 @@ class UserProfile(models.Model):
         ('en', 'English'),
         ('np', 'Nepali'),
     ]
+
+    EMAIL_CADENCE_CHOICES = [
+        ('off', 'Off'),
+        ('immediate', 'Immediately'),
+        ('hourly', 'Hourly digest'),
+        ('daily', 'Daily digest'),
+    ]
     
     user = models.OneToOneField(
         CustomUser, 
@@ -57,6 +64,13 @@ class UserProfile(models.Model):
     theme = models.CharField(max_length=10, choices=THEME_CHOICES, default='light')
     language = models.CharField(max_length=10, choices=LANGUAGE_CHOICES, default='en')
     email_notifications = models.BooleanField(default=True)
+    email_cadence = models.CharField(
+        max_length=10,
+        choices=EMAIL_CADENCE_CHOICES,
+        default='daily',
+        help_text="How routine notifications are e-mailed (see notifications.digest); "
+                  "email_notifications off stops them all."
+    )
     push_notifications = models.BooleanField(default=False)
     
     # Metadata
@@ -70,3 +84,37 @@ class UserProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+class FarmerDashboardCounter(models.Model):
+    """
+    Denormalized per-farmer counters behind the farmer dashboard stats card.
+    Kept current by the signals in userprofile.signals and the bulk helpers in
+    userprofile.dashboard_counters. The vaccination buckets depend on the date,
+    so ``as_of`` records the day they were computed for and a daily rollover
+    shifts newly overdue vaccinations across.
+    """
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='dashboard_counter'
+    )
+
+    total_livestock = models.IntegerField(default=0)
+    upcoming_vaccinations = models.IntegerField(default=0)
+    overdue_vaccinations = models.IntegerField(default=0)
+    under_treatment = models.IntegerField(default=0)
+
+    as_of = models.DateField(help_text="Day the date-dependent counters are valid for.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'farmer_dashboard_counters'
+        verbose_name = 'Farmer Dashboard Counter'
+        verbose_name_plural = 'Farmer Dashboard Counters'
+        indexes = [
+            models.Index(fields=['as_of']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}'s dashboard counters ({self.as_of})"
@@ -50,6 +50,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'theme',
             'language',
             'email_notifications',
+            'email_cadence',
             'push_notifications',
             
             # Metadata
@@ -105,6 +106,7 @@ class UpdatePreferencesSerializer(serializers.ModelSerializer):
             'theme',
             'language',
             'email_notifications',
+            'email_cadence',
             'push_notifications',
         ]
 
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from authentication.models import CustomUser
 from .models import UserProfile
@@ -20,3 +20,86 @@ def save_user_profile(sender, instance, **kwargs):
     """
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+# ---------------------------------------------------------------------------
+# Farmer dashboard counters
+#
+# post_init remembers the counter slot each loaded row occupies, so saves and
+# deletes can move it without re-reading the old row from the database.
+# Fields are read from __dict__ to avoid triggering deferred-field loads; a
+# row loaded without them just invalidates its owner's counters on save.
+# ---------------------------------------------------------------------------
+
+from livestockcrud.models import Livestock
+from medical.models import Treatment
+from vaccination.models import Vaccination
+from . import dashboard_counters
+
+
+_UNKNOWN = object()
+
+
+def _loaded(instance, *fields):
+    return all(field in instance.__dict__ for field in fields)
+
+
+def _livestock_slot(instance):
+    if not _loaded(instance, 'user_id'):
+        return _UNKNOWN
+    return (instance.user_id, 'total_livestock') if instance.user_id else None
+
+
+def _vaccination_slot(instance):
+    if not _loaded(instance, 'user_id', 'next_due_date'):
+        return _UNKNOWN
+    next_due_date = Vaccination._meta.get_field('next_due_date').to_python(instance.next_due_date)
+    if not instance.user_id or next_due_date is None:
+        return None
+    return (instance.user_id, dashboard_counters.vaccination_bucket(next_due_date))
+
+
+def _treatment_slot(instance):
+    if not _loaded(instance, 'user_id', 'status'):
+        return _UNKNOWN
+    if not instance.user_id or instance.status != 'In Progress':
+        return None
+    return (instance.user_id, 'under_treatment')
+
+
+_COUNTER_SLOTS = {
+    Livestock: _livestock_slot,
+    Vaccination: _vaccination_slot,
+    Treatment: _treatment_slot,
+}
+
+
+def _remember_counter_slot(sender, instance, **kwargs):
+    instance._dashboard_slot = _COUNTER_SLOTS[sender](instance) if instance.pk else None
+
+
+def _move_counter_slot(sender, instance, created, **kwargs):
+    old_slot = None if created else getattr(instance, '_dashboard_slot', _UNKNOWN)
+    new_slot = _COUNTER_SLOTS[sender](instance)
+    if old_slot is _UNKNOWN or new_slot is _UNKNOWN:
+        for slot in (old_slot, new_slot):
+            if slot is not _UNKNOWN and slot is not None:
+                dashboard_counters.invalidate(slot[0])
+        dashboard_counters.invalidate(instance.__dict__.get('user_id'))
+    else:
+        dashboard_counters.move(old_slot, new_slot)
+    instance._dashboard_slot = new_slot
+
+
+def _release_counter_slot(sender, instance, **kwargs):
+    old_slot = getattr(instance, '_dashboard_slot', _UNKNOWN)
+    if old_slot is _UNKNOWN:
+        dashboard_counters.invalidate(instance.__dict__.get('user_id'))
+    else:
+        dashboard_counters.move(old_slot, None)
+
+
+for _model in _COUNTER_SLOTS:
+    post_init.connect(_remember_counter_slot, sender=_model, dispatch_uid=f'dashboard_init_{_model.__name__}')
+    post_save.connect(_move_counter_slot, sender=_model, dispatch_uid=f'dashboard_save_{_model.__name__}')
+    post_delete.connect(_release_counter_slot, sender=_model, dispatch_uid=f'dashboard_delete_{_model.__name__}')
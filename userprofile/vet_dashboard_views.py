@@ -3,13 +3,15 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db.models import Case, CharField, F, Q, Value, When
+from django.db.models.functions import Concat
 from django.utils import timezone
 from datetime import timedelta
 from authentication.models import CustomUser
 from livestockcrud.models import Livestock
 from medical.models import Treatment
 from vaccination.models import Vaccination
-from appointment.models import Appointment
+from appointment.models import Appointment, VetFarmerRelation
 
 
 class VetDashboardStatsView(APIView):
@@ -32,17 +34,11 @@ class VetDashboardStatsView(APIView):
         today = timezone.now().date()
         
         # Count farmers this vet has accepted/completed appointments with
-        farmers_with_appointments = Appointment.objects.filter(
-            veterinarian=user,
-            status__in=['Approved', 'Completed']
-        ).values('farmer').distinct().count()
+        farmers_with_appointments = VetFarmerRelation.objects.filter(veterinarian=user).count()
         
         # Count animals this vet has treated (completed treatments)
         # Get all farmers this vet has worked with
-        vet_farmers = Appointment.objects.filter(
-            veterinarian=user,
-            status__in=['Approved', 'Completed']
-        ).values_list('farmer', flat=True).distinct()
+        vet_farmers = VetFarmerRelation.farmer_ids_for(user)
         
         # Count completed treatments for those farmers' animals
         # Note: Treatment.status uses 'Completed' (capital C), not 'completed'
@@ -99,10 +95,7 @@ class VetDashboardActivitiesView(APIView):
         thirty_days_ago = timezone.now() - timedelta(days=30)
         
         # Get farmers this vet has worked with (accepted/completed appointments)
-        vet_farmers = Appointment.objects.filter(
-            veterinarian=user,
-            status__in=['Approved', 'Completed']
-        ).values_list('farmer', flat=True).distinct()
+        vet_farmers = VetFarmerRelation.farmer_ids_for(user)
         
         activities = []
         
@@ -170,10 +163,116 @@ class VetDashboardActivitiesView(APIView):
 class VetDashboardAlertsView(APIView):
     """
     GET: Retrieve pending tasks and alerts for vet dashboard
-    Returns overdue vaccinations and treatments needing follow-up
+    Returns pending appointments, overdue vaccinations and treatments needing follow-up.
+
+    The three sources are ranked together in one UNION ... ORDER BY ... LIMIT
+    query so only the requested page leaves the database.
+    Query params: ``limit`` (default 10, max 100) and ``cursor`` from the
+    previous page's ``next_cursor``.
     """
     permission_classes = [IsAuthenticated]
-    
+
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 100
+
+    # Rank values for the SQL ordering; lower sorts first
+    PRIORITY_RANKS = {'high': 0, 'medium': 1}
+
+    def _alert_rows(self, user, today):
+        """UNION of the three alert sources, projected onto a shared set of columns."""
+        high = Value(self.PRIORITY_RANKS['high'])
+        medium = Value(self.PRIORITY_RANKS['medium'])
+
+        vet_farmers = VetFarmerRelation.farmer_ids_for(user)
+
+        pending_appointments = Appointment.objects.filter(
+            veterinarian=user,
+            status='Pending'
+        ).annotate(
+            source=Value('pending_appointment'),
+            priority=Case(
+                When(preferred_date__lte=today + timedelta(days=1), then=high),
+                default=medium,
+            ),
+            due=F('preferred_date'),
+            title=Case(
+                When(
+                    ~Q(farmer__first_name=''),
+                    then=Concat('farmer__first_name', Value(' '), 'farmer__last_name'),
+                ),
+                default=F('farmer__username'),
+                output_field=CharField(),
+            ),
+            tag=F('animal_type'),
+        )
+
+        overdue_vaccinations = Vaccination.objects.filter(
+            user__in=vet_farmers,
+            next_due_date__lt=today
+        ).annotate(
+            source=Value('overdue_vaccination'),
+            priority=high,
+            due=F('next_due_date'),
+            title=F('vaccine_name'),
+            tag=F('livestock__tag_id'),
+        )
+
+        upcoming_treatments = Treatment.objects.filter(
+            user__in=vet_farmers,
+            next_treatment_date__lte=today + timedelta(days=7),
+            next_treatment_date__gte=today,
+            status='In Progress'
+        ).annotate(
+            source=Value('follow_up'),
+            priority=Case(
+                When(next_treatment_date__lte=today + timedelta(days=2), then=high),
+                default=medium,
+            ),
+            due=F('next_treatment_date'),
+            title=F('treatment_name'),
+            tag=F('livestock__tag_id'),
+        )
+
+        columns = ['source', 'id', 'priority', 'due', 'title', 'tag']
+        return pending_appointments.order_by().values(*columns).union(
+            overdue_vaccinations.order_by().values(*columns),
+            upcoming_treatments.order_by().values(*columns),
+            all=True,
+        ).order_by('priority', 'due', 'source', 'id')
+
+    @staticmethod
+    def _format_alert(row, today):
+        days_until = (row['due'] - today).days
+        priority = 'high' if row['priority'] == 0 else 'medium'
+
+        if row['source'] == 'pending_appointment':
+            return {
+                'id': f"pending_apt_{row['id']}",
+                'type': 'pending_appointment',
+                'description': f"Pending appointment with {row['title']} on {row['due']}",
+                'animal_tag': row['tag'],
+                'priority': priority,
+                'days_until_due': days_until if days_until >= 0 else None,
+                'days_overdue': abs(days_until) if days_until < 0 else None
+            }
+        if row['source'] == 'overdue_vaccination':
+            return {
+                'id': f"overdue_vac_{row['id']}",
+                'type': 'overdue_vaccination',
+                'description': f"{row['title']} overdue for {row['tag']}",
+                'animal_tag': row['tag'],
+                'priority': priority,
+                'days_overdue': -days_until
+            }
+        return {
+            'id': f"followup_{row['id']}",
+            'type': 'follow_up',
+            'description': f"{row['title']} ({row['tag']}) needs follow-up check-up",
+            'animal_tag': row['tag'],
+            'priority': priority,
+            'days_until_due': days_until
+        }
+
     def get(self, request):
         user = request.user
         
@@ -183,90 +282,30 @@ class VetDashboardAlertsView(APIView):
                 'success': False,
                 'error': 'Only vets can access this endpoint'
             }, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+            offset = int(request.query_params.get('cursor') or 0)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'limit and cursor must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        offset = max(0, offset)
         
         try:
             today = timezone.now().date()
-            seven_days_from_now = today + timedelta(days=7)
-            
-            # Get farmers this vet has worked with (accepted/completed appointments)
-            vet_farmers = list(Appointment.objects.filter(
-                veterinarian=user,
-                status__in=['Approved', 'Completed']
-            ).values_list('farmer', flat=True).distinct())
-            
-            alerts = []
-            
-            # Add pending appointments for this vet
-            pending_appointments = Appointment.objects.filter(
-                veterinarian=user,
-                status='Pending'
-            ).select_related('farmer').order_by('preferred_date')
-            
-            for appointment in pending_appointments:
-                days_until = (appointment.preferred_date - today).days
-                farmer_name = f"{appointment.farmer.first_name} {appointment.farmer.last_name}" if appointment.farmer.first_name else appointment.farmer.username
-                alerts.append({
-                    'id': f'pending_apt_{appointment.id}',
-                    'type': 'pending_appointment',
-                    'description': f'Pending appointment with {farmer_name} on {appointment.preferred_date}',
-                    'animal_tag': appointment.animal_type,
-                    'priority': 'high' if days_until <= 1 else 'medium',
-                    'days_until_due': days_until if days_until >= 0 else None,
-                    'days_overdue': abs(days_until) if days_until < 0 else None
-                })
-            
-            # Only query vaccinations and treatments if there are farmers
-            if vet_farmers:
-                # Find overdue vaccinations - only for farmers this vet has worked with
-                overdue_vaccinations = Vaccination.objects.filter(
-                    user__in=vet_farmers,
-                    next_due_date__lt=today
-                ).select_related('livestock')
-                
-                for vaccination in overdue_vaccinations:
-                    days_overdue = (today - vaccination.next_due_date).days
-                    alerts.append({
-                        'id': f'overdue_vac_{vaccination.id}',
-                        'type': 'overdue_vaccination',
-                        'description': f'{vaccination.vaccine_name} overdue for {vaccination.livestock.tag_id}',
-                        'animal_tag': vaccination.livestock.tag_id,
-                        'priority': 'high',
-                        'days_overdue': days_overdue
-                    })
-                
-                # Find treatments needing follow-up - only for farmers this vet has worked with
-                upcoming_treatments = Treatment.objects.filter(
-                    user__in=vet_farmers,
-                    next_treatment_date__lte=seven_days_from_now,
-                    next_treatment_date__gte=today,
-                    status='In Progress'
-                ).select_related('livestock')
-                
-                for treatment in upcoming_treatments:
-                    days_until_due = (treatment.next_treatment_date - today).days
-                    alerts.append({
-                        'id': f'followup_{treatment.id}',
-                        'type': 'follow_up',
-                        'description': f'{treatment.treatment_name} ({treatment.livestock.tag_id}) needs follow-up check-up',
-                        'animal_tag': treatment.livestock.tag_id,
-                        'priority': 'medium' if days_until_due > 2 else 'high',
-                        'days_until_due': days_until_due
-                    })
-            
-            # Sort by priority (high first) and then by days
-            def sort_key(alert):
-                priority_order = {'high': 0, 'medium': 1, 'low': 2}
-                return (priority_order.get(alert['priority'], 3), 
-                        alert.get('days_overdue', -alert.get('days_until_due', 0)))
-            
-            alerts.sort(key=sort_key)
-            
-            # Return top 10 alerts
-            alerts = alerts[:10]
+
+            # Fetch one extra row to know whether another page exists
+            rows = list(self._alert_rows(user, today)[offset:offset + limit + 1])
+            has_more = len(rows) > limit
+            alerts = [self._format_alert(row, today) for row in rows[:limit]]
             
             return Response({
                 'success': True,
-                'data': alerts
+                'data': alerts,
+                'next_cursor': str(offset + limit) if has_more else None
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -1,12 +1,12 @@
 # vaccination/admin.py
 from django.contrib import admin
-from .models import Vaccination
+from .models import ScheduledVaccination, Vaccination, VaccinationProtocol, Vaccine, VaccineAlias
 
 @admin.register(Vaccination)
 class VaccinationAdmin(admin.ModelAdmin):
-    list_display = ['livestock', 'vaccine_name', 'vaccine_type', 'date_given', 'next_due_date', 'get_status_display', 'user']
-    list_filter = ['vaccine_type', 'user', 'date_given']
-    list_select_related = ['livestock', 'user']
+    list_display = ['livestock', 'vaccine_name', 'vaccine', 'vaccine_type', 'date_given', 'next_due_date', 'get_status_display', 'user']
+    list_filter = ['vaccine_type', 'vaccine', 'user', 'date_given']
+    list_select_related = ['livestock', 'user', 'vaccine']
     search_fields = ['vaccine_name', 'livestock__tag_id', 'user__username']
     date_hierarchy = 'date_given'
 
@@ -14,3 +14,32 @@ class VaccinationAdmin(admin.ModelAdmin):
         return obj.get_status()
     get_status_display.short_description = 'Status'
 
+
+@admin.register(VaccinationProtocol)
+class VaccinationProtocolAdmin(admin.ModelAdmin):
+    list_display = ['species', 'vaccine_name', 'vaccine_type', 'first_dose_age_days', 'dose_intervals', 'booster_interval_days', 'is_active']
+    list_filter = ['species', 'vaccine_type', 'is_active']
+    search_fields = ['vaccine_name', 'species__name']
+
+
+@admin.register(ScheduledVaccination)
+class ScheduledVaccinationAdmin(admin.ModelAdmin):
+    list_display = ['livestock', 'protocol', 'dose_number', 'due_date']
+    list_select_related = ['livestock', 'protocol']
+    search_fields = ['livestock__tag_id', 'protocol__vaccine_name']
+    date_hierarchy = 'due_date'
+
+
+class VaccineAliasInline(admin.TabularInline):
+    model = VaccineAlias
+    fields = ['alias', 'normalized']
+    readonly_fields = ['normalized']
+    extra = 1
+
+
+@admin.register(Vaccine)
+class VaccineAdmin(admin.ModelAdmin):
+    list_display = ['name', 'vaccine_type', 'created_at']
+    list_filter = ['vaccine_type']
+    search_fields = ['name', 'aliases__alias']
+    inlines = [VaccineAliasInline]
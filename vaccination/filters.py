@@ -0,0 +1,58 @@
+# vaccination/filters.py
+import django_filters
+from rest_framework.filters import OrderingFilter
+from .models import Vaccination, VaccineAlias, normalize_vaccine_name
+
+
+class VaccinationFilter(django_filters.FilterSet):
+    """
+    Filters for vaccinations. ``status`` runs against the SQL-annotated
+    ``due_status`` (see VaccinationQuerySet.with_due_status); 'completed'
+    is the API's name for vaccinations due today.
+    """
+
+    STATUS_CHOICES = [
+        ('overdue', 'Overdue'),
+        ('due_today', 'Due today'),
+        ('completed', 'Completed'),
+        ('upcoming', 'Upcoming'),
+    ]
+
+    status = django_filters.ChoiceFilter(choices=STATUS_CHOICES, method='filter_status')
+    vaccine_name = django_filters.CharFilter(method='filter_vaccine_name')
+
+    class Meta:
+        model = Vaccination
+        fields = ['vaccine', 'vaccine_type', 'livestock__tag_id']
+
+    def filter_status(self, queryset, name, value):
+        if value == 'completed':
+            value = 'due_today'
+        return queryset.filter(due_status=value)
+
+    def filter_vaccine_name(self, queryset, name, value):
+        key = normalize_vaccine_name(value)
+        if not key:
+            return queryset  # "contains ''" would match every alias
+        # Match the (small) alias table, then filter records by vaccine_id
+        vaccine_ids = VaccineAlias.objects.filter(
+            normalized__contains=key
+        ).values('vaccine_id')
+        return queryset.filter(vaccine_id__in=vaccine_ids)
+
+
+class VaccinationOrderingFilter(OrderingFilter):
+    """OrderingFilter that accepts API names for SQL annotations (``ordering=days_until_due``)."""
+
+    ordering_aliases = {
+        'days_until_due': 'due_in_days',
+    }
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            ('-' if term.startswith('-') else '') + self.ordering_aliases.get(term.lstrip('-'), term.lstrip('-'))
+            for term in ordering
+        ]
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from livestockcrud.models import Livestock
+from vaccination.protocols import generate_schedules
+
+
+class Command(BaseCommand):
+    help = 'Recompute protocol-based vaccination schedules for every animal (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--species', type=int, help='Only animals of this species id')
+
+    def handle(self, *args, **options):
+        livestock = Livestock.objects.all()
+        if options['species']:
+            livestock = livestock.filter(species_id=options['species'])
+        summary = generate_schedules(livestock)
+        self.stdout.write(self.style.SUCCESS(
+            f"Scheduled {summary['scheduled']} doses for {summary['animals']} animals "
+            f"({summary['cleared']} stale schedules cleared)"
+        ))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestockcrud', '0003_tagsequence'),
+        ('vaccination', '0002_vaccination_vet_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['user', 'next_due_date'], name='vaccination_user_id_5b3602_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestockcrud', '0003_tagsequence'),
+        ('vaccination', '0003_vaccination_user_due_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VaccinationProtocol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vaccine_name', models.CharField(max_length=200)),
+                ('vaccine_type', models.CharField(choices=[('Viral Vaccine', 'Viral Vaccine'), ('Bacterial Vaccine', 'Bacterial Vaccine'), ('Clostridial Vaccine', 'Clostridial Vaccine')], max_length=50)),
+                ('first_dose_age_days', models.PositiveIntegerField(help_text='Age in days at the first dose')),
+                ('dose_intervals', models.JSONField(blank=True, default=list, help_text='Days between consecutive primary doses, e.g. [21] for a two-dose course')),
+                ('booster_interval_days', models.PositiveIntegerField(blank=True, help_text='Days between boosters once the primary course is done', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('species', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vaccination_protocols', to='livestockcrud.species')),
+            ],
+            options={
+                'ordering': ['species__name', 'vaccine_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScheduledVaccination',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField(db_index=True)),
+                ('dose_number', models.PositiveIntegerField(help_text='1-based; past the primary course it counts boosters too')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('livestock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_vaccinations', to='livestockcrud.livestock')),
+                ('protocol', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled', to='vaccination.vaccinationprotocol')),
+            ],
+            options={
+                'ordering': ['due_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vaccinationprotocol',
+            constraint=models.UniqueConstraint(fields=('species', 'vaccine_name'), name='unique_species_vaccine_protocol'),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduledvaccination',
+            constraint=models.UniqueConstraint(fields=('livestock', 'protocol'), name='unique_livestock_protocol_schedule'),
+        ),
+    ]
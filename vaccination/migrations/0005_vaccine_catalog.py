@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestockcrud', '0003_tagsequence'),
+        ('vaccination', '0004_vaccination_protocols'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vaccine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('vaccine_type', models.CharField(choices=[('Viral Vaccine', 'Viral Vaccine'), ('Bacterial Vaccine', 'Bacterial Vaccine'), ('Clostridial Vaccine', 'Clostridial Vaccine')], max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VaccineAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=200)),
+                ('normalized', models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['alias'],
+            },
+        ),
+        migrations.AddField(
+            model_name='vaccination',
+            name='vaccine',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='vaccinations', to='vaccination.vaccine'),
+        ),
+        migrations.AddField(
+            model_name='vaccinationprotocol',
+            name='vaccine',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='protocols', to='vaccination.vaccine'),
+        ),
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['user', 'vaccine'], name='vaccination_user_id_583014_idx'),
+        ),
+        migrations.AddField(
+            model_name='vaccinealias',
+            name='vaccine',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='vaccination.vaccine'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+"""
+One-off: link every existing Vaccination (and VaccinationProtocol) to a
+catalog Vaccine.
+
+Free-text names are normalized the same way as vaccination.models does
+today (kept inline so later changes there don't alter this migration),
+matched against a seed list of common livestock vaccines and their usual
+abbreviations, then fuzzily (difflib) against everything already in the
+catalog. Names that match nothing become catalog entries of their own.
+"""
+import re
+from collections import Counter
+from difflib import get_close_matches
+
+from django.db import migrations
+
+FILLER_WORDS = {'vaccine', 'vaccines', 'vaccination', 'vac', 'vacc', 'shot', 'dose', 'the'}
+FUZZY_CUTOFF = 0.85
+
+# name: (type, aliases)
+SEED_CATALOG = {
+    'Foot and Mouth Disease (FMD)': ('Viral Vaccine', ['FMD', 'Foot and Mouth', 'Foot & Mouth Disease', 'Khoret']),
+    'Peste des Petits Ruminants (PPR)': ('Viral Vaccine', ['PPR', 'Peste des Petits Ruminants', 'Goat Plague']),
+    'Haemorrhagic Septicaemia (HS)': ('Bacterial Vaccine', ['HS', 'Hemorrhagic Septicemia', 'Haemorrhagic Septicaemia']),
+    'Black Quarter (BQ)': ('Clostridial Vaccine', ['BQ', 'Black Quarter', 'Blackleg']),
+    'Anthrax': ('Bacterial Vaccine', ['Anthrax']),
+    'Brucellosis': ('Bacterial Vaccine', ['Brucella', 'Brucellosis', 'S19']),
+    'Enterotoxaemia (ET)': ('Clostridial Vaccine', ['ET', 'Enterotoxemia', 'Enterotoxaemia', 'Overeating Disease']),
+    'Lumpy Skin Disease (LSD)': ('Viral Vaccine', ['LSD', 'Lumpy Skin', 'Lumpy Skin Disease']),
+    'Rabies': ('Viral Vaccine', ['Rabies', 'Anti Rabies']),
+    'Goat Pox': ('Viral Vaccine', ['Goat Pox', 'Sheep and Goat Pox']),
+    'Newcastle Disease (Ranikhet)': ('Viral Vaccine', ['Newcastle', 'ND', 'Ranikhet', 'RD']),
+    'Swine Fever': ('Viral Vaccine', ['Classical Swine Fever', 'CSF', 'Hog Cholera']),
+}
+
+
+def normalize(name):
+    text = (name or '').lower().replace('&', ' and ')
+    words = re.findall(r'[a-z0-9]+', text)
+    return ' '.join(word for word in words if word not in FILLER_WORDS)
+
+
+def link_vaccines(apps, schema_editor):
+    Vaccine = apps.get_model('vaccination', 'Vaccine')
+    VaccineAlias = apps.get_model('vaccination', 'VaccineAlias')
+    Vaccination = apps.get_model('vaccination', 'Vaccination')
+    VaccinationProtocol = apps.get_model('vaccination', 'VaccinationProtocol')
+
+    by_key = {}  # normalized alias -> Vaccine
+
+    def add_alias(vaccine, alias):
+        key = normalize(alias)
+        if key and key not in by_key:
+            VaccineAlias.objects.create(vaccine=vaccine, alias=alias, normalized=key)
+            by_key[key] = vaccine
+
+    for name, (vaccine_type, aliases) in SEED_CATALOG.items():
+        vaccine = Vaccine.objects.create(name=name, vaccine_type=vaccine_type)
+        for alias in [name] + aliases:
+            add_alias(vaccine, alias)
+
+    # Most common type recorded under each distinct name
+    types = {}
+    for row in Vaccination.objects.values('vaccine_name', 'vaccine_type').order_by():
+        types.setdefault(row['vaccine_name'], Counter())[row['vaccine_type']] += 1
+    for row in VaccinationProtocol.objects.values('vaccine_name', 'vaccine_type').order_by():
+        types.setdefault(row['vaccine_name'], Counter())[row['vaccine_type']] += 1
+
+    resolved = {}
+    for name, type_counts in sorted(types.items()):
+        key = normalize(name)
+        vaccine = by_key.get(key)
+        if vaccine is None and key:
+            close = get_close_matches(key, list(by_key), n=1, cutoff=FUZZY_CUTOFF)
+            vaccine = by_key[close[0]] if close else None
+        if vaccine is None:
+            display = ' '.join(name.split()) or 'Unnamed vaccine'
+            vaccine = Vaccine.objects.filter(name=display).first() or Vaccine.objects.create(
+                name=display, vaccine_type=type_counts.most_common(1)[0][0],
+            )
+        add_alias(vaccine, name)
+        resolved[name] = vaccine
+
+    # One UPDATE per distinct name, not per record
+    for name, vaccine in resolved.items():
+        Vaccination.objects.filter(vaccine_name=name, vaccine__isnull=True).update(vaccine=vaccine)
+        VaccinationProtocol.objects.filter(vaccine_name=name, vaccine__isnull=True).update(vaccine=vaccine)
+
+
+def unlink_vaccines(apps, schema_editor):
+    apps.get_model('vaccination', 'Vaccination').objects.update(vaccine=None)
+    apps.get_model('vaccination', 'VaccinationProtocol').objects.update(vaccine=None)
+    apps.get_model('vaccination', 'Vaccine').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vaccination', '0005_vaccine_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_vaccines, unlink_vaccines),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestockcrud', '0003_tagsequence'),
+        ('vaccination', '0006_normalize_vaccine_names'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vaccination',
+            index=models.Index(fields=['next_due_date'], name='vaccination_next_du_d8e495_idx'),
+        ),
+    ]
@@ -1,11 +1,13 @@
 # vaccination/models.py
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db.models import Case, CharField, Q, Value, When
 from django.utils import timezone
+import re
 from datetime import timedelta
 from django.conf import settings
-from livestockcrud.models import Livestock
+from livestockcrud.models import Livestock, Species
+from backend.expressions import DaysUntil
 
 VACCINE_TYPES = [
     ('Viral Vaccine', 'Viral Vaccine'),
@@ -13,10 +15,99 @@ VACCINE_TYPES = [
     ('Clostridial Vaccine', 'Clostridial Vaccine'),
 ]
 
+# Words that don't tell vaccines apart ("FMD vaccine" is "FMD")
+_FILLER_WORDS = {'vaccine', 'vaccines', 'vaccination', 'vac', 'vacc', 'shot', 'dose', 'the'}
+
+
+def normalize_vaccine_name(name):
+    """
+    Catalog lookup key: lower-case, '&' as 'and', no punctuation or filler
+    words. A name made only of filler ("Vaccine") keeps its lower-cased text,
+    so such names never share the empty key.
+    """
+    text = (name or '').lower().replace('&', ' and ')
+    words = re.findall(r'[a-z0-9]+', text)
+    key = ' '.join(word for word in words if word not in _FILLER_WORDS)
+    return key or ' '.join(text.split())
+
+
+class Vaccine(models.Model):
+    """Catalog entry every Vaccination points at, whatever name it was entered under"""
+    name = models.CharField(max_length=200, unique=True)
+    vaccine_type = models.CharField(max_length=50, choices=VACCINE_TYPES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+
+    @classmethod
+    def lookup(cls, name):
+        """Catalog vaccine known under ``name`` (indexed alias lookup), or None."""
+        key = normalize_vaccine_name(name)
+        if not key:
+            return None
+        alias = VaccineAlias.objects.select_related('vaccine').filter(normalized=key).first()
+        return alias.vaccine if alias else None
+
+    @classmethod
+    def resolve(cls, name, vaccine_type):
+        """Catalog vaccine for ``name``, adding a new entry the first time a name is seen."""
+        vaccine = cls.lookup(name)
+        if vaccine is not None:
+            return vaccine
+        key = normalize_vaccine_name(name)
+        vaccine, _ = cls.objects.get_or_create(
+            name=' '.join(name.split()) or key,
+            defaults={'vaccine_type': vaccine_type},
+        )
+        VaccineAlias.objects.get_or_create(normalized=key, defaults={'vaccine': vaccine, 'alias': name})
+        return vaccine
+
+    def __str__(self):
+        return self.name
+
+
+class VaccineAlias(models.Model):
+    """Another name a catalog vaccine goes by; ``normalized`` is the lookup key"""
+    vaccine = models.ForeignKey(Vaccine, on_delete=models.CASCADE, related_name='aliases')
+    alias = models.CharField(max_length=200)
+    normalized = models.CharField(max_length=200, unique=True)
+
+    class Meta:
+        ordering = ['alias']
+
+    def save(self, *args, **kwargs):
+        self.normalized = normalize_vaccine_name(self.alias)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.alias} -> {self.vaccine.name}"
+
+
+class VaccinationQuerySet(models.QuerySet):
+    def with_due_status(self, today=None):
+        """
+        Annotate ``due_status`` ('overdue' / 'due_today' / 'upcoming') and
+        ``due_in_days`` in SQL, so status can be filtered and ordered on.
+        Mirrors Vaccination.get_status() and days_until_due().
+        """
+        today = today or timezone.now().date()
+        return self.annotate(
+            due_status=Case(
+                When(next_due_date__lt=today, then=Value('overdue')),
+                When(next_due_date=today, then=Value('due_today')),
+                default=Value('upcoming'),
+                output_field=CharField(),
+            ),
+            due_in_days=DaysUntil('next_due_date', today),
+        )
+
+
 class Vaccination(models.Model):
     livestock = models.ForeignKey(Livestock, on_delete=models.CASCADE, related_name='vaccinations')
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='vaccinations')
     vaccine_name = models.CharField(max_length=200)
+    vaccine = models.ForeignKey(Vaccine, on_delete=models.PROTECT, related_name='vaccinations', null=True, blank=True)
     vaccine_type = models.CharField(max_length=50, choices=VACCINE_TYPES)
     date_given = models.DateField()
     next_due_date = models.DateField()
@@ -25,13 +116,26 @@ class Vaccination(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = VaccinationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'next_due_date']),
+            models.Index(fields=['user', 'vaccine']),
+            models.Index(fields=['next_due_date']),
+        ]
 
     def clean(self):
         if self.next_due_date <= self.date_given:
             raise ValidationError("Next due date must be after date given")
 
+    def save(self, *args, **kwargs):
+        # Link to the catalog; callers that rename a record reset ``vaccine`` first
+        if self.vaccine_id is None and self.vaccine_name:
+            self.vaccine = Vaccine.resolve(self.vaccine_name, self.vaccine_type)
+        super().save(*args, **kwargs)
+
     def get_status(self):
         today = timezone.now().date()
         if self.next_due_date < today:
@@ -49,3 +153,71 @@ class Vaccination(models.Model):
     def __str__(self):
         return f"{self.livestock.tag_id} - {self.vaccine_name}"
 
+
+class VaccinationProtocol(models.Model):
+    """
+    Standard course of one vaccine for a species: first dose at
+    ``first_dose_age_days`` of age, further primary doses ``dose_intervals``
+    days apart, then a booster every ``booster_interval_days`` (if set).
+    """
+    species = models.ForeignKey(Species, on_delete=models.CASCADE, related_name='vaccination_protocols')
+    vaccine_name = models.CharField(max_length=200)
+    vaccine = models.ForeignKey(Vaccine, on_delete=models.PROTECT, related_name='protocols', null=True, blank=True)
+    vaccine_type = models.CharField(max_length=50, choices=VACCINE_TYPES)
+    first_dose_age_days = models.PositiveIntegerField(help_text="Age in days at the first dose")
+    dose_intervals = models.JSONField(
+        default=list, blank=True,
+        help_text="Days between consecutive primary doses, e.g. [21] for a two-dose course"
+    )
+    booster_interval_days = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Days between boosters once the primary course is done"
+    )
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['species__name', 'vaccine_name']
+        constraints = [
+            models.UniqueConstraint(fields=['species', 'vaccine_name'], name='unique_species_vaccine_protocol'),
+        ]
+
+    def clean(self):
+        if not isinstance(self.dose_intervals, list) or not all(
+            isinstance(days, int) and days > 0 for days in self.dose_intervals
+        ):
+            raise ValidationError("Dose intervals must be a list of positive day counts")
+
+    def save(self, *args, **kwargs):
+        if self.vaccine_id is None and self.vaccine_name:
+            self.vaccine = Vaccine.resolve(self.vaccine_name, self.vaccine_type)
+        super().save(*args, **kwargs)
+
+    @property
+    def primary_doses(self):
+        return 1 + len(self.dose_intervals)
+
+    def __str__(self):
+        return f"{self.species} - {self.vaccine_name}"
+
+
+class ScheduledVaccination(models.Model):
+    """Next dose an animal is due under a protocol; written by vaccination.protocols"""
+    livestock = models.ForeignKey(Livestock, on_delete=models.CASCADE, related_name='scheduled_vaccinations')
+    protocol = models.ForeignKey(VaccinationProtocol, on_delete=models.CASCADE, related_name='scheduled')
+    due_date = models.DateField(db_index=True)
+    dose_number = models.PositiveIntegerField(help_text="1-based; past the primary course it counts boosters too")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['due_date']
+        constraints = [
+            models.UniqueConstraint(fields=['livestock', 'protocol'], name='unique_livestock_protocol_schedule'),
+        ]
+
+    @property
+    def is_booster(self):
+        return self.dose_number > self.protocol.primary_doses
+
+    def __str__(self):
+        return f"{self.livestock.tag_id} - {self.protocol.vaccine_name} #{self.dose_number} on {self.due_date}"
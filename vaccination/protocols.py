@@ -0,0 +1,104 @@
+"""
+Schedule generation from VaccinationProtocol templates.
+
+For every active animal of a species with protocols, the next dose of each
+protocol is worked out from the animal's ``date_of_birth`` and the doses of
+that catalog vaccine already recorded for it (whatever name they were
+entered under):
+
+  - nothing recorded yet       -> first dose at ``first_dose_age_days`` of age
+  - inside the primary course  -> last dose + the next ``dose_intervals`` gap
+  - course done, boosters set  -> last dose + ``booster_interval_days``
+  - course done, no boosters   -> nothing scheduled
+
+The whole herd is read with three queries (protocols, animals, a grouped
+vaccination history), the schedules are computed in one pass in memory and
+written back with a batched upsert, so the cost stays a handful of queries
+whatever the herd size.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from livestockcrud.models import Livestock
+
+from .models import ScheduledVaccination, Vaccination, VaccinationProtocol
+
+BATCH_SIZE = 1000
+
+
+def next_dose(protocol, date_of_birth, doses_given, last_given):
+    """``(dose_number, due_date)`` of the next dose, or None once the course is complete."""
+    if not doses_given:
+        return 1, date_of_birth + timedelta(days=protocol.first_dose_age_days)
+    if doses_given < protocol.primary_doses:
+        return doses_given + 1, last_given + timedelta(days=protocol.dose_intervals[doses_given - 1])
+    if protocol.booster_interval_days:
+        return doses_given + 1, last_given + timedelta(days=protocol.booster_interval_days)
+    return None
+
+
+def generate_schedules(livestock=None):
+    """
+    Recompute and upsert ScheduledVaccination rows for ``livestock`` (a
+    Livestock queryset; every animal when None). Schedules that no longer
+    apply (course complete, protocol retired, animal inactive) are removed.
+    Returns ``{'animals': n, 'scheduled': n, 'cleared': n}``.
+    """
+    livestock = Livestock.objects.all() if livestock is None else livestock
+
+    protocols = {}
+    for protocol in VaccinationProtocol.objects.filter(is_active=True):
+        protocols.setdefault(protocol.species_id, []).append(protocol)
+
+    animals = list(
+        livestock.filter(is_active=True, species_id__in=protocols)
+        .values_list('id', 'species_id', 'date_of_birth')
+        .order_by()
+    )
+    animal_ids = [animal_id for animal_id, _, _ in animals]
+
+    # {(livestock id, catalog vaccine id): (doses given, last date given)}
+    history = {
+        (row['livestock'], row['vaccine']): (row['doses'], row['last'])
+        for row in Vaccination.objects.filter(livestock_id__in=animal_ids)
+        .values('livestock', 'vaccine')
+        .annotate(doses=Count('id'), last=Max('date_given'))
+        .order_by()
+    } if animal_ids else {}
+
+    schedules = []
+    for animal_id, species_id, date_of_birth in animals:
+        for protocol in protocols[species_id]:
+            doses_given, last_given = history.get((animal_id, protocol.vaccine_id), (0, None))
+            dose = next_dose(protocol, date_of_birth, doses_given, last_given)
+            if dose is not None:
+                schedules.append(ScheduledVaccination(
+                    livestock_id=animal_id, protocol=protocol, dose_number=dose[0], due_date=dose[1],
+                ))
+
+    with transaction.atomic():
+        # Everything for these animals that is not about to be rewritten goes
+        stale = ScheduledVaccination.objects.filter(livestock__in=livestock)
+        keep = {(s.livestock_id, s.protocol.pk) for s in schedules}
+        cleared = 0
+        if keep:
+            existing = stale.values_list('pk', 'livestock_id', 'protocol_id')
+            stale_ids = [pk for pk, animal_id, protocol_id in existing if (animal_id, protocol_id) not in keep]
+            for start in range(0, len(stale_ids), BATCH_SIZE):
+                cleared += ScheduledVaccination.objects.filter(
+                    pk__in=stale_ids[start:start + BATCH_SIZE]
+                ).delete()[0]
+        else:
+            cleared = stale.delete()[0]
+
+        ScheduledVaccination.objects.bulk_create(
+            schedules,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['livestock', 'protocol'],
+            update_fields=['due_date', 'dose_number', 'updated_at'],
+        )
+
+    return {'animals': len(animals), 'scheduled': len(schedules), 'cleared': cleared}
@@ -1,6 +1,6 @@
 # vaccination/serializers.py
 from rest_framework import serializers
-from .models import Vaccination
+from .models import ScheduledVaccination, Vaccination, VACCINE_TYPES
 from livestockcrud.models import Livestock
 
 class LivestockSerializer(serializers.ModelSerializer):
@@ -17,15 +17,16 @@ class VaccinationSerializer(serializers.ModelSerializer):
     status = serializers.SerializerMethodField()
     days_until_due = serializers.SerializerMethodField()
     status_display = serializers.SerializerMethodField()
+    vaccine_catalog_name = serializers.CharField(source='vaccine.name', read_only=True, default=None)
 
     class Meta:
         model = Vaccination
         fields = [
-            'id', 'livestock', 'livestock_tag', 'vaccine_name', 'vaccine_type',
-            'date_given', 'next_due_date', 'notes', 'vet_name', 'status', 'days_until_due',
-            'status_display', 'created_at', 'updated_at'
+            'id', 'livestock', 'livestock_tag', 'vaccine_name', 'vaccine', 'vaccine_catalog_name',
+            'vaccine_type', 'date_given', 'next_due_date', 'notes', 'vet_name', 'status',
+            'days_until_due', 'status_display', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['user', 'status', 'days_until_due', 'status_display']
+        read_only_fields = ['user', 'vaccine', 'status', 'days_until_due', 'status_display']
 
     def validate_livestock_tag(self, value):
         try:
@@ -57,24 +58,92 @@ class VaccinationSerializer(serializers.ModelSerializer):
         if livestock_tag:
             livestock = Livestock.objects.get(tag_id=livestock_tag)
             validated_data['livestock'] = livestock
-        return super().update(instance, validated_data)
+        if validated_data.get('vaccine_name', instance.vaccine_name) != instance.vaccine_name:
+            # Re-linked to the catalog by Vaccination.save()
+            validated_data['vaccine'] = None
+        instance = super().update(instance, validated_data)
+        # The due date may have changed; drop the queryset annotations
+        for attr in ('due_status', 'due_in_days'):
+            instance.__dict__.pop(attr, None)
+        return instance
+
+    # Rows from VaccinationViewSet.get_queryset() carry ``due_status`` and
+    # ``due_in_days`` annotations; freshly saved instances fall back to Python.
+    def _due_status(self, obj):
+        status = getattr(obj, 'due_status', None)
+        return status if status is not None else obj.get_status()
+
+    def _due_in_days(self, obj):
+        days = getattr(obj, 'due_in_days', None)
+        return days if days is not None else obj.days_until_due()
 
     def get_status(self, obj):
-        status = obj.get_status()
+        status = self._due_status(obj)
         # Only treat due_today as completed (when user marks it as completed)
         if status == 'due_today':
             return 'completed'
         return status
 
     def get_days_until_due(self, obj):
-        return obj.days_until_due()
+        return self._due_in_days(obj)
 
     def get_status_display(self, obj):
-        status = obj.get_status()
+        status = self._due_status(obj)
         if status == 'overdue':
-            days = abs(obj.days_until_due())
+            days = abs(self._due_in_days(obj))
             return f"Overdue by {days} days"
         elif status == 'due_today':
             return "Due today"
         else:
-            return f"Due in {obj.days_until_due()} days"
+            return f"Due in {self._due_in_days(obj)} days"
+
+
+class VaccinationCampaignSerializer(serializers.Serializer):
+    """
+    One vaccine given to many animals. Target either an explicit list of
+    ``livestock_tags`` or the requesting user's own active herd narrowed by
+    ``species`` and/or ``tag_prefix`` (or ``all_active`` for the whole herd).
+    """
+    MAX_ANIMALS = 1000
+
+    vaccine_name = serializers.CharField(max_length=200)
+    vaccine_type = serializers.ChoiceField(choices=VACCINE_TYPES)
+    date_given = serializers.DateField()
+    next_due_date = serializers.DateField()
+    vet_name = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+    livestock_tags = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False, max_length=MAX_ANIMALS
+    )
+    species = serializers.IntegerField(required=False)
+    tag_prefix = serializers.CharField(max_length=50, required=False)
+    all_active = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        if data['next_due_date'] <= data['date_given']:
+            raise serializers.ValidationError({'next_due_date': 'Next due date must be after date given'})
+
+        has_filter = 'species' in data or 'tag_prefix' in data or data['all_active']
+        if 'livestock_tags' in data and has_filter:
+            raise serializers.ValidationError('Give either livestock_tags or herd filters, not both')
+        if not data.get('livestock_tags') and not has_filter:
+            raise serializers.ValidationError(
+                'Choose the animals: livestock_tags, species, tag_prefix or all_active'
+            )
+        return data
+
+
+class ScheduledVaccinationSerializer(serializers.ModelSerializer):
+    livestock_tag = serializers.CharField(source='livestock.tag_id', read_only=True)
+    vaccine_name = serializers.CharField(source='protocol.vaccine_name', read_only=True)
+    vaccine_type = serializers.CharField(source='protocol.vaccine_type', read_only=True)
+    is_booster = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ScheduledVaccination
+        fields = [
+            'id', 'livestock', 'livestock_tag', 'protocol', 'vaccine_name', 'vaccine_type',
+            'dose_number', 'is_booster', 'due_date'
+        ]
+        read_only_fields = fields
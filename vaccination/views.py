@@ -1,58 +1,188 @@
 # vaccination/views.py
+from collections import Counter
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count
+from rest_framework.filters import SearchFilter
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
-from .models import Vaccination
-from .serializers import VaccinationSerializer
+from backend.aggregates import breakdown
+from livestockcrud.models import Livestock
+from userprofile.dashboard_counters import apply_delta, vaccination_bucket
+from .filters import VaccinationFilter, VaccinationOrderingFilter
+from .models import ScheduledVaccination, Vaccination, Vaccine
+from .protocols import generate_schedules
+from .serializers import ScheduledVaccinationSerializer, VaccinationCampaignSerializer, VaccinationSerializer
 
 class VaccinationViewSet(viewsets.ModelViewSet):
     serializer_class = VaccinationSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['vaccine_type', 'livestock__tag_id']
-    search_fields = ['vaccine_name', 'livestock__tag_id']
-    ordering_fields = ['next_due_date', 'date_given', 'created_at']
+    filter_backends = [DjangoFilterBackend, SearchFilter, VaccinationOrderingFilter]
+    filterset_class = VaccinationFilter
+    search_fields = ['vaccine__name', 'vaccine__aliases__alias', 'livestock__tag_id']
+    ordering_fields = ['next_due_date', 'date_given', 'created_at', 'days_until_due']
 
     def get_queryset(self):
-        return Vaccination.objects.filter(user=self.request.user).select_related('livestock', 'livestock__species', 'livestock__breed')
+        return (
+            Vaccination.objects.filter(user=self.request.user)
+            .with_due_status()
+            .select_related('livestock', 'livestock__species', 'livestock__breed')
+        )
+
+    def _status_page(self, due_status, ordering):
+        queryset = self.filter_queryset(self.get_queryset()).filter(due_status=due_status).order_by(ordering)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def counts(self, request):
         """Get counts for tabs: upcoming, completed, overdue"""
         today = timezone.now().date()
-        counts = {}
-        counts['upcoming'] = self.get_queryset().filter(next_due_date__gt=today).count()
-        counts['overdue'] = self.get_queryset().filter(next_due_date__lt=today).count()
-        counts['due_today'] = self.get_queryset().filter(next_due_date=today).count()
-        counts['completed'] = self.get_queryset().filter(next_due_date=today).count()
+        counts = breakdown(self.get_queryset(), {
+            'upcoming': Q(next_due_date__gt=today),
+            'overdue': Q(next_due_date__lt=today),
+            'due_today': Q(next_due_date=today),
+            'completed': Q(next_due_date=today),
+        })
         return Response(counts)
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
         """Upcoming vaccinations (matches frontend tab)"""
-        today = timezone.now().date()
-        queryset = self.get_queryset().filter(next_due_date__gt=today).order_by('next_due_date')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._status_page('upcoming', 'next_due_date')
 
     @action(detail=False, methods=['get'])
     def overdue(self, request):
         """Overdue vaccinations"""
-        today = timezone.now().date()
-        queryset = self.get_queryset().filter(next_due_date__lt=today).order_by('next_due_date')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._status_page('overdue', 'next_due_date')
 
     @action(detail=False, methods=['get'])
     def completed(self, request):
         """Completed vaccinations (next_due_date is today - marked as completed)"""
-        today = timezone.now().date()
-        queryset = self.get_queryset().filter(next_due_date=today).order_by('-next_due_date')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._status_page('due_today', '-next_due_date')
+
+    @action(detail=False, methods=['post'])
+    def campaign(self, request):
+        """
+        Vaccinate many animals in one request. Ownership is checked with one
+        IN query and the records go in with one bulk_create; animals that
+        can't be vaccinated are listed under ``failed`` instead of aborting.
+        """
+        serializer = VaccinationCampaignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        user = request.user
+        limit = VaccinationCampaignSerializer.MAX_ANIMALS
+        failed = []
+
+        fields = ('id', 'tag_id', 'user_id', 'is_active')
+        if 'livestock_tags' in data:
+            tags = list(dict.fromkeys(data['livestock_tags']))
+            found = {a.tag_id: a for a in Livestock.objects.filter(tag_id__in=tags).only(*fields)}
+            animals = []
+            for tag in tags:
+                animal = found.get(tag)
+                if animal is None:
+                    failed.append({'tag_id': tag, 'error': 'Livestock not found'})
+                elif user.role != 'vet' and animal.user_id != user.pk:
+                    failed.append({'tag_id': tag, 'error': 'You can only access your own livestock'})
+                elif not animal.is_active:
+                    failed.append({'tag_id': tag, 'error': 'Livestock is not active'})
+                else:
+                    animals.append(animal)
+        else:
+            herd = Livestock.objects.filter(user=user, is_active=True)
+            if 'species' in data:
+                herd = herd.filter(species_id=data['species'])
+            if 'tag_prefix' in data:
+                herd = herd.filter(tag_id__startswith=data['tag_prefix'])
+            animals = list(herd.only(*fields).order_by('tag_id')[:limit + 1])
+            if len(animals) > limit:
+                return Response(
+                    {'error': f'A campaign can cover at most {limit} animals; narrow the filters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        vaccine = Vaccine.resolve(data['vaccine_name'], data['vaccine_type']) if animals else None
+        already = set(
+            Vaccination.objects.filter(
+                livestock__in=animals,
+                vaccine=vaccine,
+                date_given=data['date_given'],
+            ).values_list('livestock_id', flat=True)
+        ) if animals else set()
+        for animal in animals:
+            if animal.pk in already:
+                failed.append({'tag_id': animal.tag_id, 'error': 'Already vaccinated with this vaccine on this date'})
+        animals = [animal for animal in animals if animal.pk not in already]
+
+        record_fields = ('vaccine_name', 'vaccine_type', 'date_given', 'next_due_date', 'vet_name', 'notes')
+        records = [
+            # Stored under the livestock owner, as in VaccinationSerializer.create
+            Vaccination(livestock=animal, user_id=animal.user_id, vaccine=vaccine,
+                        **{f: data[f] for f in record_fields})
+            for animal in animals
+        ]
+        per_owner = Counter(animal.user_id for animal in animals)
+        bucket = vaccination_bucket(data['next_due_date'])
+        with transaction.atomic():
+            Vaccination.objects.bulk_create(records, batch_size=500)
+            # bulk_create skips the signals that keep the dashboard counters current
+            for owner_id, n in per_owner.items():
+                apply_delta(owner_id, **{bucket: n})
+
+        return Response({
+            'created': len(records),
+            'vaccinations': [{'id': r.pk, 'tag_id': r.livestock.tag_id} for r in records],
+            'failed': failed,
+        }, status=status.HTTP_201_CREATED if records else status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    def schedule(self, request):
+        """Protocol-generated upcoming doses for the user's herd, soonest first"""
+        queryset = ScheduledVaccination.objects.filter(
+            livestock__user=request.user
+        ).select_related('livestock', 'protocol').order_by('due_date', 'livestock__tag_id')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(ScheduledVaccinationSerializer(page, many=True).data)
+        return Response(ScheduledVaccinationSerializer(queryset, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def regenerate_schedule(self, request):
+        """Recompute the user's herd schedule from the species protocols"""
+        summary = generate_schedules(Livestock.objects.filter(user=request.user))
+        return Response(summary)
+
+    @action(detail=False, methods=['get'])
+    def by_vaccine(self, request):
+        """Records, animals covered and overdue doses per catalog vaccine (GROUP BY vaccine_id)"""
+        today = timezone.now().date()
+        rows = (
+            Vaccination.objects.filter(user=request.user)
+            .values('vaccine', 'vaccine__name')
+            .annotate(
+                records=Count('id'),
+                animals=Count('livestock', distinct=True),
+                overdue=Count('id', filter=Q(next_due_date__lt=today)),
+            )
+            .order_by('-records', 'vaccine__name')
+        )
+        return Response([
+            {
+                'vaccine': row['vaccine'],
+                'vaccine_name': row['vaccine__name'],
+                'records': row['records'],
+                'animals': row['animals'],
+                'overdue': row['overdue'],
+            }
+            for row in rows
+        ])